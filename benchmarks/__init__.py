@@ -0,0 +1 @@
+"""性能基准脚本集合，在仓库根目录以 ``python -m benchmarks.<name>`` 运行。"""
@@ -0,0 +1,144 @@
+"""BKT 参数拟合基准：合成交互日志上的参数恢复、进程池分片、trace 加载参数表与拟合耗时。
+
+- 参数恢复：按已知的逐技能 BKT 参数（L0、T、G、S）模拟学生作答，EM 拟合结果与真值相差不超过 0.05；
+  进程池与串行拟合结果一致；参数表可写出、按内容版本重新加载；
+- trace：参数表里的技能用拟合出的学习率/保持率与初始掌握度，逐条与批量回放仍一致；
+  响应标注 ``mode="trained"`` 与参数版本；没有参数的技能、撤下参数表后结果与原规则相同；
+- 对比学生数 × 技能数不同规模下的拟合耗时。
+
+运行：python -m benchmarks.bkt_fitting --students 1000,10000 --skills 10,50 --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+from benchmarks import generators
+from benchmarks.trace_scan import replay
+from models import bkt, knowledge_tracking
+from models.param_table import ParamFile, write_params
+from schemas import KnowledgeTracingRequest
+
+
+def synthesize(
+    students: int, skills: int, steps: int, seed: int
+) -> Tuple[Tuple[List[str], List[str], np.ndarray], np.ndarray]:
+    """返回 (交互列, 真值)。每个学生在每个技能上作答 ``steps`` 次，各技能轮流出现。真值每行为 (L0, T, G, S)。"""
+    rng = np.random.default_rng(seed)
+    truth = np.column_stack(
+        [
+            rng.uniform(0.1, 0.5, skills),
+            rng.uniform(0.05, 0.3, skills),
+            rng.uniform(0.1, 0.25, skills),
+            rng.uniform(0.05, 0.15, skills),
+        ]
+    )
+    init, learn, guess, slip = (truth[:, k][None, :] for k in range(4))
+    known = rng.random((students, skills)) < init
+    correct = np.empty((steps, students, skills), dtype=bool)
+    for t in range(steps):
+        p = np.where(known, 1.0 - slip, guess)
+        correct[t] = rng.random((students, skills)) < p
+        known |= rng.random((students, skills)) < learn
+    student_names = np.char.add("s", np.arange(students).astype(str))
+    skill_names = np.char.add("k", np.arange(skills).astype(str))
+    _, s_idx, k_idx = np.indices(correct.shape).reshape(3, -1)
+    columns = (student_names[s_idx].tolist(), skill_names[k_idx].tolist(), correct.reshape(-1))
+    return columns, truth
+
+
+def check_recovery(workers: int, seed: int) -> dict:
+    columns, truth = synthesize(4000, 6, 25, seed)
+    params = bkt.fit(*columns, workers=1)
+    col = {name: k for k, name in enumerate(params["columns"])}
+    worst = 0.0
+    for k in range(truth.shape[0]):
+        row = params["skills"][f"k{k}"]
+        fitted = [row[col[name]] for name in ("init", "learn", "guess", "slip")]
+        worst = max(worst, float(np.max(np.abs(np.array(fitted) - truth[k]))))
+    assert worst <= 0.05, worst
+    if workers > 1:
+        assert bkt.fit(*columns, workers=workers) == params
+    print(f"参数恢复：6 个技能 (L0, T, G, S) 与真值的最大偏差 {worst:.3f}")
+    return params
+
+
+def check_trace(params: dict) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bkt_params.json")
+        write_params(params, path)
+        loaded = ParamFile("BKT-bench", path, bkt.BKTTable.from_json)
+        table = loaded.current()
+    assert table is not None and table.version.startswith("p") and len(table.skills) == len(params["skills"])
+
+    # 交互里的技能名换成参数表里的技能，另留两个没有参数的技能
+    interactions = generators.interactions(3000, 8, 11)
+    for interaction in interactions:
+        index = int(interaction.skill.rsplit("-", 1)[1])
+        interaction.skill = f"k{index}" if index < 6 else interaction.skill
+    rng = random.Random(5)
+    prior = {f"k{k}": rng.uniform(0, 1) for k in range(3)}
+
+    baseline, _ = replay(interactions, prior, vectorized=False)
+    old = bkt.BKT_PARAMS.set(table)
+    try:
+        expected, expected_history = replay(interactions, prior, vectorized=False)
+        actual, actual_history = replay(interactions, prior, vectorized=True)
+        assert list(actual) == list(expected) and actual_history == expected_history
+        for skill, prob in expected.items():
+            assert abs(actual[skill] - prob) <= 1e-9, (skill, actual[skill], prob)
+        assert expected["skill-6"] == baseline["skill-6"] and expected["skill-7"] == baseline["skill-7"]
+        assert any(abs(expected[f"k{k}"] - baseline[f"k{k}"]) > 1e-6 for k in range(6))
+
+        payload = KnowledgeTracingRequest(
+            student_id="bkt-check", interactions=[{"skill": "k4", "correct": False}, {"skill": "skill-9", "correct": True}]
+        )
+        response = knowledge_tracking.trace(payload)
+        assert response.mode == "trained" and response.model_version == table.model_version, response
+        init, learning_rate, forgetting = table.skills["k4"]
+        k4 = next(s for s in response.skills if s.skill == "k4")
+        assert k4.probability_mastery == round(max(init, 0.001) * forgetting, 3), (k4, table.skills["k4"])
+        skill_9 = next(s for s in response.skills if s.skill == "skill-9")
+        assert skill_9.probability_mastery == round(0.5 + 0.5 * knowledge_tracking.LEARNING_RATE, 3)
+        unfitted = knowledge_tracking.trace(
+            KnowledgeTracingRequest(student_id="bkt-check", interactions=[{"skill": "skill-9", "correct": True}])
+        )
+        assert unfitted.mode == "rule" and unfitted.model_version == "rule-0.1"
+    finally:
+        bkt.BKT_PARAMS.set(old)
+    assert replay(interactions, prior, vectorized=False)[0] == baseline
+    print("trace 校验通过：参数表技能逐条/批量一致，未拟合技能与撤表后结果与原规则相同。")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--students", default="1000,10000", help="学生数列表")
+    parser.add_argument("--skills", default="10,50", help="技能数列表")
+    parser.add_argument("--steps", type=int, default=20, help="每个学生在每个技能上的作答次数")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    params = check_recovery(args.workers, args.seed)
+    check_trace(params)
+
+    print(f"{'students':>9} {'skills':>7} {'interactions':>13} {'workers':>8} {'fit(s)':>8} {'inter/s':>10}")
+    for students in (int(n) for n in args.students.split(",")):
+        for skills in (int(n) for n in args.skills.split(",")):
+            columns, _ = synthesize(students, skills, args.steps, args.seed)
+            count = len(columns[0])
+            start = time.perf_counter()
+            bkt.fit(*columns, workers=args.workers)
+            elapsed = time.perf_counter() - start
+            print(f"{students:>9} {skills:>7} {count:>13} {args.workers:>8} {elapsed:>8.1f} {count / elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
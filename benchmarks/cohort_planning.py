@@ -0,0 +1,101 @@
+"""全班批量规划基准：/plan/batch 的矩阵化分层遍历 vs 逐个调用 plan。
+
+- 性质校验：随机 DAG（含重复边、大量同分掌握度）、随机阈值/推荐数/班级规模下，
+  批量结果与逐个 ``path_planning._recommend`` 完全相同；
+- 接口校验：/plan/batch 与逐个 /plan 的响应一致（含从“数据库”读掌握度的学生）；
+- 对比不同班级规模下两种方式的耗时。
+
+运行：python -m benchmarks.cohort_planning --nodes 2000 --sizes 40,100,300
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from benchmarks import generators
+from models import cohort_planning, knowledge_graph, path_planning
+from models.knowledge_graph import compile_graph
+
+
+def check_property(trials: int, seed: int) -> None:
+    rng = random.Random(seed)
+    for trial in range(trials):
+        adj = generators.curriculum(rng.randint(1, 200), rng.randint(1, 4), seed + trial)
+        if rng.random() < 0.3:  # 重复边
+            for name in rng.sample(list(adj), min(5, len(adj))):
+                adj[name] = adj[name] + adj[name][:1]
+        graph = compile_graph(adj)
+        cohort = [generators.mastery(adj, rng.random(), rng.random() * 1e9) for _ in range(rng.randint(1, 40))]
+        threshold = rng.choice((0.0, 0.5, 0.7, 0.95, 1.0))
+        max_recommend = rng.choice((1, 3, 5, 50, 10_000))
+        expected = [path_planning._recommend(graph, mastery, threshold, max_recommend) for mastery in cohort]
+        actual = cohort_planning.recommend_cohort(graph, cohort, threshold, max_recommend)
+        assert actual == expected, (trial, threshold, max_recommend)
+
+
+def check_endpoint() -> None:
+    from fastapi.testclient import TestClient
+
+    import database
+    from main import app
+
+    client = TestClient(app)
+    database.set_mastery("cohort-a", "集合论基础", 0.9)
+    database.set_mastery("cohort-a", "外测度", 0.5)
+    students = [
+        {"student_id": "cohort-a"},
+        {"student_id": "inline", "mastery": {"集合论基础": 0.95, "外测度": 0.9}},
+        {"mastery": {}},
+    ]
+    batch = client.post("/plan/batch", json={"students": students, "max_recommend": 3}).json()
+    for student, plan in zip(students, batch["plans"]):
+        single = client.post("/plan", json={"mastery": {}, "max_recommend": 3, **student}).json()
+        assert plan["recommended_path"] == single["recommended_path"], (student, plan, single)
+        assert batch["model_version"] == single["model_version"]
+    assert client.post("/plan/batch", json={"students": [], "subject": "no-such-course"}).status_code == 404
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--nodes", type=int, default=2000)
+    parser.add_argument("--degree", type=int, default=3)
+    parser.add_argument("--sizes", default="40,100,300", help="班级规模列表")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    check_property(trials=300, seed=args.seed)
+    print("性质校验通过：随机图/掌握度/参数下批量结果与逐个 plan 完全一致。")
+    check_endpoint()
+    print("接口校验通过：/plan/batch 与逐个 /plan 响应一致，未知学科返回 404。")
+
+    adj = generators.curriculum(args.nodes, args.degree, args.seed)
+    graph = compile_graph(adj)
+    original = knowledge_graph.set_graph(graph)
+    try:
+        cohort_planning.recommend_cohort(graph, [{}], 0.7, 5)  # 预先构建分层索引
+        print(f"{graph!r}，拓扑层数 {len(graph.layers)}")
+        print(f"{'scenario':<10} {'students':>9} {'per-plan(ms)':>13} {'batch(ms)':>10} {'speedup':>8}")
+        for scenario, coverage, threshold, max_recommend in (
+            ("typical", 0.5, 0.7, 5),
+            ("review", 1.0, 0.3, 10),  # 多数已掌握，需要深入多层才能凑满
+            ("deep", 1.0, 0.0, 10),  # 阈值为 0 凑不满，每个学生都要走完整张图
+        ):
+            for size in (int(s) for s in args.sizes.split(",")):
+                rng = random.Random(args.seed + size)
+                cohort = [generators.mastery(adj, coverage, rng.random() * 1e9) for _ in range(size)]
+                start = time.perf_counter()
+                expected = [path_planning._recommend(graph, mastery, threshold, max_recommend) for mastery in cohort]
+                single_ms = (time.perf_counter() - start) * 1e3
+                start = time.perf_counter()
+                actual = cohort_planning.recommend_cohort(graph, cohort, threshold, max_recommend)
+                batch_ms = (time.perf_counter() - start) * 1e3
+                assert actual == expected
+                print(f"{scenario:<10} {size:>9} {single_ms:>13.1f} {batch_ms:>10.1f} {single_ms / batch_ms:>7.1f}x")
+    finally:
+        knowledge_graph.set_graph(original)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""情绪历史基准：旧版无界 List[EmotionLog] vs 定长环形缓冲 + 衰减累加器。
+
+对比长会话下每个学生的内存占用与“最近 10 分钟主导情绪”查询耗时，
+并校验衰减汇总与按定义逐条计算的结果一致；客户端发来大量不同的情绪名时，单个学生的情绪槽位仍有上界。
+
+运行：python -m benchmarks.emotion_history --events 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from benchmarks.generators import EMOTIONS
+from storage import EmotionHistory, EmotionLog
+from storage.emotions import MIN_EMOTION_SLOTS
+
+WINDOW = 600.0
+
+
+def make_events(count: int, seed: int) -> List[EmotionLog]:
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 1)
+    t = 0.0
+    events = []
+    for i in range(count):
+        t += rng.expovariate(1 / 20)  # 平均 20 秒一次情感调用
+        events.append(
+            EmotionLog(
+                emotion=rng.choice(EMOTIONS),
+                confidence=round(rng.random(), 3),
+                timestamp=start + timedelta(seconds=t),
+                context="".join(("学生情绪较为平稳，保持当前节奏并轻量检查理解情况。#", str(i))),
+            )
+        )
+    return events
+
+
+def legacy_dominant(logs: List[EmotionLog], now: datetime) -> Dict[str, float]:
+    """旧做法：每次查询扫描整段历史。"""
+    cutoff = now - timedelta(seconds=WINDOW)
+    weights: Dict[str, float] = {}
+    for log in logs:
+        if log.timestamp >= cutoff:
+            weights[log.emotion] = weights.get(log.emotion, 0.0) + log.confidence
+    return weights
+
+
+def expected_decayed(events: List[EmotionLog], now: datetime) -> Dict[str, float]:
+    weights: Dict[str, float] = {}
+    for log in events:
+        age = (now - log.timestamp).total_seconds()
+        weights[log.emotion] = weights.get(log.emotion, 0.0) + log.confidence * math.exp(-age / WINDOW)
+    total = sum(weights.values())
+    return {k: v / total for k, v in weights.items()}
+
+
+def check_open_vocabulary(capacity: int, distinct: int) -> None:
+    """每条记录一个新情绪名：槽位数不超过 max(capacity, MIN_EMOTION_SLOTS)，保留的记录与精确窗口仍正确。"""
+    start = datetime(2024, 1, 1)
+    history = EmotionHistory(capacity=capacity)
+    events = [EmotionLog(f"emo-{i}", 0.5, start + timedelta(seconds=i)) for i in range(distinct)]
+    for event in events:
+        history.append(event)
+        assert len(history._names) <= max(capacity, MIN_EMOTION_SLOTS)
+    assert list(history) == events[-capacity:]
+    window = history.summary(capacity - 0.5, events[-1].timestamp)
+    assert set(window.weights) == {event.emotion for event in events[-capacity:]}
+    print(f"开放词表校验通过：{distinct} 种情绪名，单个学生只占 {len(history._names)} 个槽位。")
+
+
+def measure_bytes(build) -> tuple:
+    tracemalloc.start()
+    obj = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, current
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=5000, help="单个学生的情绪记录条数")
+    parser.add_argument("--capacity", type=int, default=64)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    events = make_events(args.events, args.seed)
+    now = events[-1].timestamp + timedelta(seconds=5)
+
+    legacy, legacy_bytes = measure_bytes(
+        lambda: [EmotionLog(e.emotion, e.confidence, e.timestamp, "".join((e.context, ""))) for e in events]
+    )
+    ring, ring_bytes = measure_bytes(lambda: EmotionHistory(events, capacity=args.capacity))
+    lean, lean_bytes = measure_bytes(lambda: EmotionHistory(events, capacity=args.capacity, keep_context=False))
+
+    start = time.perf_counter()
+    for _ in range(args.queries):
+        legacy_dominant(legacy, now)
+    legacy_us = (time.perf_counter() - start) / args.queries * 1e6
+    start = time.perf_counter()
+    for _ in range(args.queries):
+        summary = ring.summary(WINDOW, now)
+    ring_us = (time.perf_counter() - start) / args.queries * 1e6
+
+    expected = expected_decayed(events, now)
+    for emotion, share in expected.items():
+        assert abs(summary.weights.get(emotion, 0.0) - share) < 1e-9, (emotion, share, summary.weights)
+    assert ring.latest() == events[-1] and len(ring) == min(args.events, args.capacity)
+    assert list(ring) == events[-args.capacity :]
+    print("一致性校验通过：衰减汇总与逐条计算一致，latest/遍历与最近记录一致。")
+    check_open_vocabulary(args.capacity, 70_000)  # 超过旧版 uint16 情绪 id 的上限
+
+    print(f"单个学生 {args.events} 条情绪记录，环形缓冲容量 {args.capacity}")
+    print(f"{'layout':<16} {'KiB':>10} {'summary(us)':>12}")
+    print(f"{'legacy-list':<16} {legacy_bytes / 1024:>10.1f} {legacy_us:>12.2f}")
+    print(f"{'ring':<16} {ring_bytes / 1024:>10.1f} {ring_us:>12.2f}")
+    print(f"{'ring-no-context':<16} {lean_bytes / 1024:>10.1f} {'-':>12}")
+
+
+if __name__ == "__main__":
+    main()
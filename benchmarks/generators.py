@@ -0,0 +1,120 @@
+"""基准用的合成数据生成器：学生、作答历史、概念快照、情感信号、情感文本与随机先修图（DAG）。
+
+全部由 ``seed`` 决定，同样的参数每次生成同样的数据，便于不同提交之间对比。
+``benchmarks`` 下的基准套件、负载发生器与各专项脚本（一致性校验与扩展曲线）共用这些生成器；
+只有针对特定边界构造输入的校验（词表模糊测试、带时间戳的情绪流、固定的并发争用模式）
+与金标准响应的请求体（输入须与已记录的响应一起固定）才在脚本内自行生成。
+"""
+
+from __future__ import annotations
+
+import random
+from typing import Dict, List, Optional, Sequence
+
+from schemas import AffectiveSignal, ConceptSnapshot, ItemResponse, SkillInteraction
+
+EMOTIONS = ("frustration", "bored", "confident", "neutral", "excited", "anxious")
+CHANNELS = ("text", "voice", "face", "clickstream")
+MISCONCEPTIONS = ("符号错误", "概念混淆", "计算粗心", "审题不清")
+_TEXT_ALPHABET = "我不会懂好难太棒了喜欢清楚明白差糟生气的题目这道又错还是，。！"
+
+
+def skill_names(count: int) -> List[str]:
+    return [f"skill-{k}" for k in range(count)]
+
+
+def students(count: int, seed: int = 0) -> List[str]:
+    """打乱顺序的学生 id，避免按插入顺序访问带来的缓存偏差。"""
+    ids = [f"stu-{k:06d}" for k in range(count)]
+    random.Random(seed).shuffle(ids)
+    return ids
+
+
+def interactions(
+    count: int, skills: int, seed: int = 0, names: Optional[Sequence[str]] = None
+) -> List[SkillInteraction]:
+    """作答历史：技能按 Zipf 式分布（少数技能练得多），正确率随练习次数上升。
+
+用时覆盖 0 与超时阈值（120 秒）两侧，自信度含缺省。
+
+    ``names`` 为技能名池（如先修图的概念），取前 ``skills`` 个；默认 ``skill-0``、``skill-1``……
+    """
+    rng = random.Random(seed)
+    names = list(names[:skills]) if names is not None else skill_names(skills)
+    skills = len(names)
+    weights = [1.0 / (rank + 1) for rank in range(skills)]
+    seen: Dict[str, int] = {}
+    history: List[SkillInteraction] = []
+    for skill in rng.choices(names, weights, k=count):
+        practiced = seen[skill] = seen.get(skill, 0) + 1
+        history.append(
+            SkillInteraction(
+                skill=skill,
+                correct=rng.random() < min(0.9, 0.4 + 0.05 * practiced),
+                time_spent_seconds=rng.choice((None, 0, 15, 45, 90, 121, 150, 300)),
+                confidence=rng.choice((None, round(rng.random(), 2))),
+            )
+        )
+    return history
+
+
+def snapshots(
+    count: int, seed: int = 0, items: int = 0, names: Optional[Sequence[str]] = None
+) -> List[ConceptSnapshot]:
+    """概念快照；``items`` > 0 时每个概念附带逐题作答（IRT 模式使用）。``names`` 给出时从中随机取概念名。"""
+    rng = random.Random(seed)
+    if names is not None:
+        concepts = rng.sample(list(names), min(count, len(names)))
+    else:
+        concepts = [f"concept-{k}" for k in range(count)]
+    result: List[ConceptSnapshot] = []
+    for k, concept in enumerate(concepts):
+        attempts = rng.randint(1, 30)
+        responses = [ItemResponse(item_id=f"c{k}-i{j}", correct=rng.random() < 0.6) for j in range(items)]
+        result.append(
+            ConceptSnapshot(
+                concept_name=concept,
+                attempts=attempts,
+                correct=rng.randint(0, attempts),
+                misconceptions=rng.sample(MISCONCEPTIONS, rng.randint(0, 2)),
+                item_responses=responses,
+            )
+        )
+    return result
+
+
+def signals(count: int, seed: int = 0) -> List[AffectiveSignal]:
+    rng = random.Random(seed)
+    return [
+        AffectiveSignal(
+            channel=rng.choice(CHANNELS),
+            emotion=rng.choice(EMOTIONS),
+            intensity=round(rng.random(), 3),
+            evidence=rng.choice((None, "停顿较长", "多次删除重写")),
+        )
+        for _ in range(count)
+    ]
+
+
+def text(length: int, seed: int = 0) -> str:
+    """由常见情感字词随机拼成的文本，命中词表的密度与真实作答反馈相近。"""
+    rng = random.Random(seed)
+    return "".join(rng.choice(_TEXT_ALPHABET) for _ in range(length))
+
+
+def curriculum(nodes: int, degree: int = 3, seed: int = 0) -> Dict[str, List[str]]:
+    """随机先修图：按随机顺序声明的分层 DAG，每个节点指向编号更大的若干后继。"""
+    rng = random.Random(seed)
+    order = list(range(nodes))
+    rng.shuffle(order)
+    adj: Dict[str, List[str]] = {}
+    for i in order:
+        span = range(i + 1, min(nodes, i + 1 + degree * 20))
+        adj[f"k{i}"] = [f"k{j}" for j in rng.sample(span, min(len(span), rng.randint(0, degree * 2)))]
+    return adj
+
+
+def mastery(concepts: Sequence[str], coverage: float = 0.5, seed: int = 0) -> Dict[str, float]:
+    """覆盖 ``coverage`` 比例概念的掌握度，取少量离散值以制造同分节点。"""
+    rng = random.Random(seed)
+    return {name: rng.choice((0.0, 0.3, 0.5, 0.7, 0.9, 1.0)) for name in concepts if rng.random() < coverage}
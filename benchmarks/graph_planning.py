@@ -0,0 +1,156 @@
+"""先修图规划基准：旧版每次请求重建入度 vs 编译后的 CSR 图。
+
+- 在随机 DAG 上校验两种实现的推荐结果完全一致（含大量同分节点的情形）；
+- 在 5 万节点的合成图上对比单次 plan 耗时与编译耗时；
+- 演示热更新：改写图文件后 reload_if_changed 替换当前图，版本号随之变化，坏文件不会替换。
+
+运行：python -m benchmarks.graph_planning --nodes 50000 --degree 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from collections import deque
+from typing import Dict, List
+
+from benchmarks import generators
+from models import knowledge_graph, path_planning
+from schemas import PathRequest
+
+
+def legacy_plan(adj: Dict[str, List[str]], mastery: Dict[str, float], threshold: float, max_recommend: int) -> List[str]:
+    """旧版 path_planning.plan 的遍历部分，原样保留用于对照。"""
+    indegree: Dict[str, int] = {k: 0 for k in adj}
+    for prereq, next_list in adj.items():
+        for nxt in next_list:
+            indegree[nxt] = indegree.get(nxt, 0) + 1
+
+    def get_mastery(name: str) -> float:
+        return float(mastery.get(name, 0.0))
+
+    queue = deque([k for k, deg in indegree.items() if deg == 0])
+    visited: set = set()
+    recommended: List[str] = []
+    while queue and len(recommended) < max_recommend:
+        current_layer = list(queue)
+        queue.clear()
+        scored_layer = []
+        for node in current_layer:
+            if node in visited:
+                continue
+            m = get_mastery(node)
+            scored_layer.append((path_planning._priority(m), 1.0 - m, node))
+        scored_layer.sort(key=lambda x: (-x[0], -x[1]))
+        next_queue = deque()
+        for priority, gap, node in scored_layer:
+            if node in visited:
+                continue
+            visited.add(node)
+            m = get_mastery(node)
+            if m < threshold and len(recommended) < max_recommend:
+                recommended.append(node)
+            for nxt in adj.get(node, []):
+                indegree[nxt] -= 1
+                if indegree[nxt] == 0 and nxt not in visited:
+                    next_queue.append(nxt)
+            if len(recommended) >= max_recommend:
+                break
+        queue = next_queue
+    return recommended
+
+
+def compiled_plan(mastery: Dict[str, float], threshold: float, max_recommend: int) -> List[str]:
+    payload = PathRequest(mastery=mastery, threshold=threshold, max_recommend=max_recommend)
+    return path_planning.plan(payload).recommended_path
+
+
+def check_equivalence(trials: int, seed: int) -> None:
+    rng = random.Random(seed)
+    for trial in range(trials):
+        adj = generators.curriculum(rng.randint(1, 300), rng.randint(1, 4), seed + trial)
+        knowledge_graph.set_graph(knowledge_graph.compile_graph(adj))
+        for _ in range(5):
+            mastery = generators.mastery(adj, rng.random(), rng.random() * 1e9) or {next(iter(adj)): 0.5}
+            threshold = rng.choice((0.5, 0.7, 0.95))
+            max_recommend = rng.choice((1, 5, 20, 10_000))
+            expected = legacy_plan(adj, mastery, threshold, max_recommend)
+            actual = compiled_plan(mastery, threshold, max_recommend)
+            assert actual == expected, (trial, expected[:10], actual[:10])
+
+
+def check_hot_reload() -> None:
+    original = knowledge_graph.current_graph()
+    fd, path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    try:
+        knowledge_graph.reload_if_changed(path)  # 空文件：解析失败，保留当前图
+        assert knowledge_graph.current_graph() is original
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"a": ["b"], "b": []}, f)
+        os.utime(path, ns=(1, 1))
+        assert knowledge_graph.reload_if_changed(path)
+        swapped = knowledge_graph.current_graph()
+        assert swapped.names == ("a", "b") and swapped.version != original.version
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"a": ["b"], "b": ["a"]}, f)  # 有环
+        os.utime(path, ns=(2, 2))
+        assert not knowledge_graph.reload_if_changed(path)
+        assert knowledge_graph.current_graph() is swapped
+        version = path_planning.plan(PathRequest(mastery={"a": 0.1})).model_version
+        assert version.endswith(swapped.version), version
+    finally:
+        os.remove(path)
+        knowledge_graph.set_graph(original)
+    print("热更新校验通过：新图原子替换、版本号变化，坏文件/有环文件保留旧图。")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--nodes", type=int, default=50_000)
+    parser.add_argument("--degree", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    original = knowledge_graph.current_graph()
+    try:
+        check_equivalence(trials=60, seed=args.seed)
+        print("一致性校验通过：随机 DAG 上编译版与旧版推荐结果完全一致。")
+        check_hot_reload()
+
+        adj = generators.curriculum(args.nodes, args.degree, args.seed)
+        start = time.perf_counter()
+        graph = knowledge_graph.compile_graph(adj)
+        compile_ms = (time.perf_counter() - start) * 1e3
+        knowledge_graph.set_graph(graph)
+        print(f"{graph!r}，拓扑层数 {len(graph.layers)}，编译 {compile_ms:.1f} ms")
+
+        print(f"{'mastery':<14} {'max_rec':>8} {'legacy(ms)':>12} {'compiled(ms)':>13} {'speedup':>8}")
+        for label, coverage, threshold, max_recommend in (
+            ("sparse", 0.01, 0.7, 5),
+            ("dense", 1.0, 0.7, 5),
+            ("mastered", 1.0, 0.0, 5),  # 阈值为 0，没有可推荐节点，两者都要走完整张图
+            ("full-path", 0.5, 0.7, args.nodes),
+        ):
+            mastery = generators.mastery(adj, coverage, args.seed + 1)
+            assert compiled_plan(mastery, threshold, max_recommend) == legacy_plan(adj, mastery, threshold, max_recommend)
+            start = time.perf_counter()
+            for _ in range(args.requests):
+                legacy_plan(adj, mastery, threshold, max_recommend)
+            legacy_ms = (time.perf_counter() - start) / args.requests * 1e3
+            start = time.perf_counter()
+            for _ in range(args.requests):
+                compiled_plan(mastery, threshold, max_recommend)
+            compiled_ms = (time.perf_counter() - start) / args.requests * 1e3
+            print(f"{label:<14} {max_recommend:>8} {legacy_ms:>12.2f} {compiled_ms:>13.2f} {legacy_ms / compiled_ms:>7.1f}x")
+    finally:
+        knowledge_graph.set_graph(original)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""多学科先修图注册表基准：按需加载、LRU 内存预算与常驻统计。
+
+在临时目录生成一批课程图（大小不一），校验：
+- 创建注册表不读取任何课程文件，耗时与目录大小无关；
+- 首次访问加载编译，之后命中内存；超出预算时淘汰最久未用的课程，再次访问重新加载；
+- 改写已常驻课程的文件后 refresh() 换上新图；
+- 并发加载与探测大量不存在的课程之后，不残留任何加载锁；
+- /plan 的 subject 选择器与未知课程的 404；/step 有课程图时按 subject 规划，否则用默认先修图。
+
+运行：python -m benchmarks.graph_registry --subjects 200 --nodes 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+from benchmarks import generators
+from models import knowledge_graph
+from models.knowledge_graph import GraphRegistry, UnknownSubjectError
+
+
+def write_catalog(directory: str, subjects: int, nodes: int, seed: int) -> None:
+    rng = random.Random(seed)
+    for i in range(subjects):
+        adj = generators.curriculum(rng.randint(nodes // 4, nodes), 3, seed + i)
+        with open(os.path.join(directory, f"course-{i}.json"), "w", encoding="utf-8") as f:
+            json.dump(adj, f, ensure_ascii=False)
+
+
+def check_load_locks(directory: str, subjects: int) -> None:
+    """加载锁随加载结束释放：未知课程与被淘汰课程都不会让注册表无界增长。"""
+    registry = GraphRegistry(directory, memory_budget=1)  # 每次只常驻一门，反复淘汰再加载
+    for k in range(2000):
+        try:
+            registry.get(f"probe-{k}")
+        except UnknownSubjectError:
+            pass
+        else:
+            raise AssertionError("不存在的课程应当抛 UnknownSubjectError")
+
+    def work(seed: int) -> None:
+        rng = random.Random(seed)
+        for _ in range(50):
+            registry.get(f"course-{rng.randrange(min(subjects, 8))}")
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not registry._loading, f"残留 {len(registry._loading)} 把加载锁"
+    assert len(registry.stats()["resident"]) == 1
+
+
+def check_plan_endpoint(directory: str) -> None:
+    from fastapi.testclient import TestClient
+
+    from main import app
+
+    saved = knowledge_graph.REGISTRY
+    knowledge_graph.REGISTRY = GraphRegistry(directory)
+    try:
+        client = TestClient(app)
+        resp = client.post("/plan", json={"mastery": {}, "subject": "course-0", "max_recommend": 3})
+        assert resp.status_code == 200, resp.text
+        version = knowledge_graph.REGISTRY.get("course-0").version
+        assert resp.json()["model_version"].endswith(version)
+        assert client.post("/plan", json={"mastery": {}, "subject": "no-such-course"}).status_code == 404
+        assert client.post("/plan", json={"mastery": {}, "subject": "../etc/passwd"}).status_code == 404
+        assert "course-0" in client.get("/stats/graphs").json()["subjects"]["resident"]
+
+        # /step 的规划与诊断用同一门课程；subject 只是诊断标签（没有图文件）时规划用默认先修图
+        body = {"student_id": "step-subject", "subject": "course-0", "prior_mastery": {"k0": 0.9}, "max_recommend": 3}
+        resp = client.post("/step", json=body)
+        assert resp.status_code == 200, resp.text
+        assert resp.json()["plan"]["model_version"].endswith(version), resp.json()["plan"]
+        for label in ("函数", "../etc/passwd"):
+            resp = client.post("/step", json={**body, "subject": label})
+            assert resp.status_code == 200, resp.text
+            assert resp.json()["plan"]["model_version"].endswith(knowledge_graph.current_graph().version)
+    finally:
+        knowledge_graph.REGISTRY = saved
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--subjects", type=int, default=200)
+    parser.add_argument("--nodes", type=int, default=2000, help="每门课程的最大节点数")
+    parser.add_argument("--budget-mb", type=float, default=8.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="edu-graphs-")
+    try:
+        write_catalog(directory, args.subjects, args.nodes, args.seed)
+
+        start = time.perf_counter()
+        registry = GraphRegistry(directory, memory_budget=int(args.budget_mb * 1024 * 1024))
+        startup_ms = (time.perf_counter() - start) * 1e3
+        assert registry.stats()["resident"] == {}
+        print(f"目录 {args.subjects} 门课程，创建注册表 {startup_ms:.3f} ms，常驻 0 门")
+
+        rng = random.Random(args.seed)
+        hot = [f"course-{i}" for i in range(5)]
+        cold_ms = []
+        for subject in hot:
+            t = time.perf_counter()
+            registry.get(subject)
+            cold_ms.append((time.perf_counter() - t) * 1e3)
+        start = time.perf_counter()
+        for _ in range(10_000):
+            registry.get(rng.choice(hot))
+        hit_us = (time.perf_counter() - start) / 10_000 * 1e6
+        print(f"首次加载 {sum(cold_ms) / len(cold_ms):.1f} ms/门，命中 {hit_us:.2f} us/次")
+
+        for i in range(args.subjects):
+            registry.get(f"course-{i}")
+        stats = registry.stats()
+        assert stats["resident_bytes"] <= registry.memory_budget or len(stats["resident"]) == 1
+        assert stats["evictions"] == args.subjects - len(stats["resident"])
+        assert f"course-{args.subjects - 1}" in stats["resident"] and "course-0" not in stats["resident"]
+        print(
+            f"遍历全部课程后常驻 {len(stats['resident'])} 门，{stats['resident_bytes'] / 1024 / 1024:.2f} MiB"
+            f" / 预算 {args.budget_mb} MiB，淘汰 {stats['evictions']} 次，累计加载 {stats['load_ms_total']:.0f} ms"
+        )
+
+        subject = f"course-{args.subjects - 1}"
+        before = registry.get(subject).version
+        path = os.path.join(directory, subject + ".json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"x": ["y"], "y": []}, f)
+        os.utime(path, ns=(1, 1))
+        assert registry.refresh() == 1 and registry.get(subject).version != before
+        print("热更新校验通过：常驻课程文件变化后 refresh() 换上新图。")
+
+        check_load_locks(directory, args.subjects)
+        print("加载锁校验通过：探测 2000 个不存在的课程、并发加载与淘汰之后没有残留。")
+
+        check_plan_endpoint(directory)
+        print("接口校验通过：subject 选择课程图，未知/非法课程返回 404。")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
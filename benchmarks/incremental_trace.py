@@ -0,0 +1,162 @@
+"""增量知识追踪基准：服务端事件溯源状态 + cursor vs 每次重发完整交互历史。
+
+- 一致性校验：事件按随机大小分批发送，批内乱序、跨批迟到（不超出保留窗口）、重复重发、
+  部分事件不带 seq，最终每个技能的概率与最近对错都等于“按 seq 排序后一次性回放”的结果；
+- 淘汰校验：TraceStore 满员淘汰后，学生从数据库中的掌握度重新起步；
+- 对比历史长度增长时，每次追加 10 条新交互的单次调用耗时（增量应与历史长度无关）。
+
+运行：python -m benchmarks.incremental_trace --histories 1000,10000,100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import database
+from benchmarks import generators
+from models import knowledge_tracking
+from schemas import KnowledgeTracingRequest, SkillInteraction
+from storage.tracing import TraceLog, TraceStore
+
+
+def numbered(count: int, skills: int, seed: int) -> List[SkillInteraction]:
+    return [
+        SkillInteraction.model_construct(**{**i.__dict__, "seq": seq})
+        for seq, i in enumerate(generators.interactions(count, skills, seed))
+    ]
+
+
+def expected_state(events: List[SkillInteraction], priors: Dict[str, float]):
+    prob_map: Dict[str, float] = defaultdict(lambda: 0.5)
+    prob_map.update(priors)
+    history = knowledge_tracking._replay_scalar(prob_map, sorted(events, key=lambda e: e.seq))
+    return prob_map, {skill: tuple(recent[-2:]) for skill, recent in history.items()}
+
+
+def check_stream(trials: int, seed: int) -> None:
+    rng = random.Random(seed)
+    for trial in range(trials):
+        events = numbered(rng.randint(1, 3000), rng.randint(1, 30), seed + trial)
+        snapshot_every = rng.choice((4, 32, 256))
+        log = TraceLog({"skill-0": 0.9}, snapshot_every=snapshot_every, max_snapshots=rng.choice((2, 8)))
+        # 迟到距离不超过保留窗口（最早快照之后的事件），否则会按重复丢弃
+        max_delay = snapshot_every * (log.max_snapshots - 1)
+        arrival = sorted(range(len(events)), key=lambda k: k + rng.randint(0, max_delay))
+        sent = 0
+        while sent < len(arrival):
+            size = rng.randint(1, 600)
+            batch = [events[k] for k in arrival[sent : sent + size]]
+            if sent and rng.random() < 0.3:  # 重发上一批中的一部分
+                batch += [events[k] for k in rng.sample(arrival[:sent], min(sent, 20))]
+            rng.shuffle(batch)
+            log.apply(batch, knowledge_tracking._replay)
+            sent += size
+        prob, recent = expected_state(events, {"skill-0": 0.9})
+        assert log.cursor == len(events) - 1, trial
+        for skill, value in prob.items():
+            assert abs(log.value(skill) - value) <= 1e-9, (trial, skill)
+            assert log.recent.get(skill, ()) == recent.get(skill, ()), (trial, skill)
+
+    # 不带 seq 的事件排在已有事件之后
+    log = TraceLog()
+    replay = knowledge_tracking._replay
+    log.apply([SkillInteraction(skill="a", correct=True), SkillInteraction(skill="a", correct=False)], replay)
+    skills, duplicates = log.apply([SkillInteraction(skill="a", correct=True, seq=1)], replay)
+    assert (log.cursor, skills, duplicates) == (1, [], 1)
+
+
+def check_endpoint() -> None:
+    from fastapi.testclient import TestClient
+
+    from main import app
+
+    client = TestClient(app)
+    database.set_mastery("inc-a", "极限", 0.8)
+    first = client.post(
+        "/track",
+        json={
+            "student_id": "inc-a",
+            "incremental": True,
+            "interactions": [{"skill": "极限", "correct": True, "seq": 0}, {"skill": "导数", "correct": False, "seq": 1}],
+            "prior_mastery": {"极限": 0.1, "导数": 0.4},
+        },
+    ).json()
+    # 数据库里的 0.8 优先于请求先验 0.1；导数没有记录，用请求先验
+    full = client.post(
+        "/track",
+        json={
+            "student_id": "inc-b",
+            "interactions": [{"skill": "极限", "correct": True}, {"skill": "导数", "correct": False}],
+            "prior_mastery": {"极限": 0.8, "导数": 0.4},
+        },
+    ).json()
+    assert first["skills"] == full["skills"] and first["cursor"] == 1, (first, full)
+    again = client.post(
+        "/track",
+        json={"student_id": "inc-a", "incremental": True, "interactions": [{"skill": "极限", "correct": True, "seq": 1}]},
+    ).json()
+    assert again["duplicates"] == 1 and again["skills"] == [] and again["cursor"] == 1
+
+
+def check_eviction() -> None:
+    store = TraceStore(capacity=2)
+    store.get("s1", dict).apply([SkillInteraction(skill="x", correct=True, seq=0)], knowledge_tracking._replay)
+    store.get("s2", dict)
+    store.get("s3", dict)
+    assert store.evictions == 1
+    assert store.get("s1", lambda: {"x": 0.65}).value("x") == 0.65  # 被淘汰后从“数据库”重新起步
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--histories", default="1000,10000,100000", help="已有交互历史长度")
+    parser.add_argument("--skills", type=int, default=50)
+    parser.add_argument("--calls", type=int, default=50, help="每个历史长度下测量的追加调用次数")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    check_stream(trials=100, seed=args.seed)
+    print("一致性校验通过：乱序/迟到/重复/无 seq 事件下增量状态等于按 seq 一次性回放的结果。")
+    check_endpoint()
+    check_eviction()
+    print("接口校验通过：数据库掌握度优先于请求先验，重复事件被忽略，淘汰后从数据库重新起步。")
+
+    print(f"{'history':>9} {'resend(ms/call)':>16} {'incremental(ms/call)':>21}")
+    for length in (int(n) for n in args.histories.split(",")):
+        events = numbered(length + args.calls * 10, args.skills, args.seed)
+        history, tail = events[:length], events[length:]
+        knowledge_tracking.TRACE_STORE.clear()
+        student = f"bench-{length}"
+        knowledge_tracking.trace(
+            KnowledgeTracingRequest.model_construct(
+                student_id=student, interactions=history, prior_mastery={}, incremental=True
+            )
+        )
+
+        start = time.perf_counter()
+        for k in range(args.calls):
+            batch = tail[k * 10 : (k + 1) * 10]
+            knowledge_tracking.trace(
+                KnowledgeTracingRequest.model_construct(
+                    student_id=student, interactions=batch, prior_mastery={}, incremental=True
+                )
+            )
+        incremental_ms = (time.perf_counter() - start) / args.calls * 1e3
+
+        calls = max(1, min(args.calls, 2_000_000 // max(length, 1)))
+        start = time.perf_counter()
+        for k in range(calls):
+            resend = history + tail[: (k + 1) * 10]
+            knowledge_tracking.trace(
+                KnowledgeTracingRequest.model_construct(student_id=student + "-full", interactions=resend, prior_mastery={})
+            )
+        resend_ms = (time.perf_counter() - start) / calls * 1e3
+        print(f"{length:>9} {resend_ms:>16.2f} {incremental_ms:>21.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""快照 + 追加日志的热重启基准，以及日志截断/损坏与快照截断的恢复校验。
+
+对不同规模的掌握度条目数，分别测量：只有日志时的重放启动耗时、有快照时的启动耗时
+以及首次访问某个学生（懒解码）的延迟。
+
+运行：python -m benchmarks.journal_restart --entries 10000 100000 1000000
+      python -m benchmarks.journal_restart --check    # 只跑恢复校验，失败时非零退出
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from storage import journal
+from storage.journal import CorruptSnapshotError, JournaledBackend
+
+CONCEPTS_PER_STUDENT = 20
+
+
+def _fill(directory: str, entries: int) -> JournaledBackend:
+    store = JournaledBackend(directory, snapshot_bytes=None)
+    for i in range(entries):
+        store.set_mastery(f"stu-{i // CONCEPTS_PER_STUDENT}", f"c{i % CONCEPTS_PER_STUDENT}", (i % 100) / 100)
+    return store
+
+
+def _timed_open(directory: str):
+    start = time.perf_counter()
+    store = JournaledBackend(directory, snapshot_bytes=None)
+    return store, time.perf_counter() - start
+
+
+def bench(entries: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        _fill(tmp, entries).close()
+        store, replay_time = _timed_open(tmp)
+        store.snapshot()
+        store.close()
+        store, snap_time = _timed_open(tmp)
+        start = time.perf_counter()
+        store.dump_mastery(f"stu-{entries // CONCEPTS_PER_STUDENT // 2}")
+        first_access = time.perf_counter() - start
+        size = os.path.getsize(os.path.join(tmp, JournaledBackend.SNAPSHOT_NAME))
+        store.close()
+    print(
+        f"{entries:>10} {replay_time * 1000:>12.1f} {snap_time * 1000:>12.1f} "
+        f"{first_access * 1e6:>14.1f} {size / 1024 / 1024:>10.1f}"
+    )
+
+
+def _log_path(directory: str) -> str:
+    logs = sorted(name for name in os.listdir(directory) if name.startswith("log-"))
+    return os.path.join(directory, logs[-1])
+
+
+def check_recovery() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        store = _fill(tmp, 100)
+        store.snapshot()
+        for i in range(50):
+            store.update_mastery("tail", f"c{i}", i + 1)
+        store.close()
+
+        # 1. 日志尾部截断：半条记录被丢弃，之前的完整记录全部恢复，之后还能正常追加
+        path = _log_path(tmp)
+        size = os.path.getsize(path)
+        with open(path, "r+b") as f:
+            f.truncate(size - 3)
+        store = JournaledBackend(tmp)
+        mastery = store.dump_mastery("tail")
+        assert len(mastery) == 49 and "c49" not in mastery, mastery
+        assert store.dump_mastery("stu-0")["c0"] == 0.0 and os.path.getsize(path) < size - 3
+        store.set_mastery("tail", "c49", 0.5)
+        store.close()
+        store = JournaledBackend(tmp)
+        assert store.dump_mastery("tail")["c49"] == 0.5
+        store.close()
+
+        # 2. 日志中间某条记录损坏：重放停在损坏处，前面的记录保留
+        path = _log_path(tmp)
+        with open(path, "r+b") as f:
+            f.seek(os.path.getsize(path) // 2)
+            byte = f.read(1)
+            f.seek(-1, os.SEEK_CUR)
+            f.write(bytes([byte[0] ^ 0xFF]))
+        store = JournaledBackend(tmp)
+        recovered = len(store.dump_mastery("tail"))
+        assert 0 < recovered < 50, recovered
+        store.close()
+
+        # 3. 快照被截断：拒绝启动，而不是静默丢数据
+        snap = os.path.join(tmp, JournaledBackend.SNAPSHOT_NAME)
+        with open(snap, "r+b") as f:
+            f.truncate(os.path.getsize(snap) - 10)
+        try:
+            JournaledBackend(tmp)
+        except CorruptSnapshotError:
+            pass
+        else:
+            raise AssertionError("截断的快照应当被拒绝")
+    print("恢复校验通过：日志截断/损坏按最后完整记录恢复，快照截断被拒绝。")
+
+
+def check_restart_fidelity() -> None:
+    """超过 64 KiB 的字符串、情绪历史容量/context 设置与未 group commit 的写入在重启后保持不变。"""
+    long_id, long_concept = "s" * 70_000, "概" * 30_000
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JournaledBackend(tmp, snapshot_bytes=None, emotion_capacity=3, emotion_context=False)
+        store.set_mastery(long_id, long_concept, 0.5)
+        for i in range(5):
+            store.log_emotion("ctx", f"e{i}", 0.5, "提示")
+        store.close()
+        for snapshot in (False, True):
+            store = JournaledBackend(tmp, snapshot_bytes=None, emotion_capacity=3, emotion_context=False)
+            assert store.dump_mastery(long_id) == {long_concept: 0.5}
+            history = store.get_student("ctx").emotion_logs
+            assert history.capacity == 3 and [log.emotion for log in history] == ["e2", "e3", "e4"]
+            assert history.latest().context is None
+            if not snapshot:
+                store.snapshot()  # 第二轮从快照装载
+            store.close()
+
+        # 不调用 close() 直接退出解释器：atexit 把缓冲写盘
+        code = (
+            "from storage.journal import JournaledBackend\n"
+            f"store = JournaledBackend({tmp!r}, fsync_interval=3600, snapshot_bytes=None)\n"
+            "store.set_mastery('exit', '极限', 0.7)\n"
+        )
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        subprocess.run([sys.executable, "-c", code], cwd=root, check=True)
+        store = JournaledBackend(tmp, snapshot_bytes=None)
+        assert store.dump_mastery("exit") == {"极限": 0.7}
+        store.close()
+    print("重启保真校验通过：超长字符串、情绪容量/context 设置与退出前未提交的写入均被恢复。")
+
+
+def check_commit_during_snapshot(delay: float = 1.0) -> None:
+    """自动快照写文件期间 group commit 照常进行：写入在 fsync_interval 量级内落盘，而不是等快照写完。"""
+    write_snapshot = journal.write_snapshot
+    started, release = threading.Event(), threading.Event()
+
+    def slow_write(*args, **kwargs):
+        started.set()
+        release.wait(delay)  # 模拟慢盘上的大快照
+        return write_snapshot(*args, **kwargs)
+
+    journal.write_snapshot = slow_write
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = JournaledBackend(tmp, fsync_interval=0.01, snapshot_bytes=4096)
+            try:
+                for i in range(200):
+                    store.set_mastery(f"stu-{i}", "c", 0.5)
+                assert started.wait(5.0), "日志超过阈值后没有触发快照"
+                store.set_mastery("during", "c", 0.7)
+                deadline = time.perf_counter() + delay / 2
+                while store._flushed_offset < store._log_offset and time.perf_counter() < deadline:
+                    time.sleep(0.005)
+                assert store._flushed_offset == store._log_offset, "快照期间日志没有 group commit"
+                release.set()
+            finally:
+                release.set()
+                store.close()
+            store = JournaledBackend(tmp, snapshot_bytes=None)
+            assert store.dump_mastery("during") == {"c": 0.7} and store.dump_mastery("stu-199") == {"c": 0.5}
+            store.close()
+    finally:
+        journal.write_snapshot = write_snapshot
+    print("快照校验通过：写快照期间新写入仍按 fsync_interval 落盘。")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--check", action="store_true", help="只运行恢复校验")
+    args = parser.parse_args()
+
+    check_recovery()
+    check_restart_fidelity()
+    check_commit_during_snapshot()
+    if args.check:
+        return
+    print(f"{'entries':>10} {'replay(ms)':>12} {'snapshot(ms)':>12} {'first read(us)':>14} {'snap MiB':>10}")
+    for entries in args.entries:
+        bench(entries)
+
+
+if __name__ == "__main__":
+    main()
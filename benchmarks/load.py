@@ -0,0 +1,425 @@
+"""端到端压测：对真实 HTTP 服务与 MCP 工具路径施加混合流量，报告吞吐与各接口的 p50/p95/p99/p999 延迟。
+
+- 目标（``--target``）：
+  * ``http``：子进程启动 ``python main.py``（或 ``--url`` 指向已在运行的服务），经 httpx 长连接发 POST；
+  * ``mcp``：子进程启动 ``python mcp_server.py --startup eager --no-http``，用 MCP SDK 的 ``ClientSession``
+    经 stdio 调用工具（JSON-RPC 编解码、工具参数校验与结果序列化都计入），即 LLM 客户端看到的路径；
+- 流量：``--mix`` 按权重混合 ``/track``、``/diagnose``、``/emotion``、``/plan``；``--students`` 名学生按 Zipf 式
+  活跃度发请求，作答与诊断的概念取自当前先修图，``/plan`` 只带 ``student_id``，读取此前请求写入的掌握度；
+- 模式：``closed`` 固定并发（每个客户端收到响应后立刻发下一个）；``open`` 固定到达率（泊松或均匀到达），
+  延迟从计划发出时刻算起，服务跟不上时排队时间计入延迟，不会被客户端放慢掩盖；同时在途超过
+  ``--max-inflight`` 的请求记为 dropped。``--concurrency`` / ``--rate`` 可给逗号分隔的多个档位，逐档提高，
+  实际吞吐不再随之增长、延迟陡增的档位即饱和点；
+- 两个目标都跑时最后给出 MCP 相对 HTTP 的延迟倍数；``--output`` 写出 JSON。
+
+压测客户端与服务在同一台机器上，会分走服务的 CPU；p999 至少需要数千个样本才有意义。
+
+运行：python -m benchmarks.load --mode closed --concurrency 1,8,32 --duration 10
+      python -m benchmarks.load --mode open --rate 50,100,200 --target http --mix track=1,plan=1
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from benchmarks import generators
+from models import knowledge_graph
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 接口名 -> (HTTP 路径, MCP 工具名)
+ENDPOINTS: Dict[str, Tuple[str, str]] = {
+    "track": ("/track", "trace"),
+    "diagnose": ("/diagnose", "diagnose"),
+    "emotion": ("/emotion", "analyze_affective"),
+    "plan": ("/plan", "recommend_path"),
+}
+DEFAULT_MIX = "track=4,diagnose=2,emotion=2,plan=2"
+PERCENTILES = (("p50", 0.5), ("p95", 0.95), ("p99", 0.99), ("p999", 0.999))
+
+
+# ---- 流量 ----
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix: Dict[str, float] = {}
+    for part in filter(None, spec.split(",")):
+        name, _, weight = part.partition("=")
+        if name not in ENDPOINTS:
+            raise ValueError(f"未知接口 {name!r}，可选：{', '.join(ENDPOINTS)}")
+        mix[name] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("流量配比为空")
+    return mix
+
+
+def _dump(items: Sequence[Any]) -> List[Dict[str, Any]]:
+    return [item.model_dump(mode="json", exclude_none=True) for item in items]
+
+
+class Workload:
+    """预先生成的请求池：按配比抽接口，再从该接口的池中抽一个请求体（生成开销不计入压测）。"""
+
+    def __init__(self, mix: Dict[str, float], students: int, pool: int, seed: int) -> None:
+        rng = random.Random(seed)
+        self.concepts = list(knowledge_graph.load_adj())
+        ids = generators.students(students, seed)
+        activity = [1.0 / (rank + 1) ** 0.8 for rank in range(len(ids))]  # 少数学生贡献多数请求
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+        self.payloads = {
+            name: [self._payload(name, sid, rng) for sid in rng.choices(ids, activity, k=pool)] for name in self.names
+        }
+
+    def _payload(self, name: str, student_id: str, rng: random.Random) -> Dict[str, Any]:
+        seed = rng.randrange(1 << 30)
+        if name == "track":
+            practiced = rng.sample(self.concepts, min(len(self.concepts), rng.randint(2, 8)))
+            history = generators.interactions(rng.randint(1, 20), len(practiced), seed, names=practiced)
+            return {"student_id": student_id, "interactions": _dump(history)}
+        if name == "diagnose":
+            snapshots = generators.snapshots(rng.randint(2, 6), seed, names=self.concepts)
+            return {"student_id": student_id, "subject": "数学", "concept_snapshots": _dump(snapshots)}
+        if name == "emotion":
+            return {
+                "student_id": student_id,
+                "current_task": rng.choice(self.concepts),
+                "affective_signals": _dump(generators.signals(rng.randint(1, 4), seed)),
+                "recent_performance": rng.choice((None, "连续答错 3 题", "用时明显变长")),
+            }
+        return {"student_id": student_id, "mastery": {}}  # 掌握度为空：按 student_id 读取存储
+
+    def draw(self, rng: random.Random) -> Tuple[str, Dict[str, Any]]:
+        name = rng.choices(self.names, self.weights)[0]
+        return name, rng.choice(self.payloads[name])
+
+
+# ---- 目标 ----
+
+
+def _server_env(store: str) -> Dict[str, str]:
+    return {**os.environ, "EDU_STORE": store, "PYTHONUNBUFFERED": "1"}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class HttpTarget:
+    name = "http"
+
+    def __init__(self, url: str, store: str, connections: int, timeout: float) -> None:
+        self.url = url
+        self.store = store
+        self.connections = connections
+        self.timeout = timeout
+        self.proc: Optional[subprocess.Popen] = None
+        self.client: Optional[httpx.AsyncClient] = None
+
+    async def __aenter__(self) -> "HttpTarget":
+        if not self.url:
+            port = _free_port()
+            self.proc = subprocess.Popen(
+                [sys.executable, "main.py", "--port", str(port)],
+                cwd=ROOT,
+                env=_server_env(self.store),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            self.url = f"http://127.0.0.1:{port}"
+        limits = httpx.Limits(max_connections=self.connections, max_keepalive_connections=self.connections)
+        self.client = httpx.AsyncClient(base_url=self.url, timeout=self.timeout, limits=limits)
+        try:
+            await self._wait_ready()
+        except BaseException:
+            await self.__aexit__()
+            raise
+        return self
+
+    async def _wait_ready(self, limit: float = 60.0) -> None:
+        deadline = time.perf_counter() + limit
+        while True:
+            if self.proc is not None and self.proc.poll() is not None:
+                raise RuntimeError(f"HTTP 服务启动失败，退出码 {self.proc.returncode}")
+            try:
+                if (await self.client.get("/stats/store")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            if time.perf_counter() > deadline:
+                raise RuntimeError(f"{self.url} 在 {limit:.0f}s 内未就绪")
+            await asyncio.sleep(0.1)
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.client.aclose()
+        if self.proc is not None:
+            self.proc.terminate()
+            self.proc.wait(timeout=10)
+
+    async def call(self, endpoint: str, payload: Dict[str, Any]) -> bool:
+        response = await self.client.post(ENDPOINTS[endpoint][0], json=payload)
+        return response.status_code < 400
+
+
+class McpTarget:
+    name = "mcp"
+
+    def __init__(self, store: str, timeout: float) -> None:
+        self.store = store
+        self.timeout = timeout
+        self.session: Optional[ClientSession] = None
+        self._stack = AsyncExitStack()
+
+    async def __aenter__(self) -> "McpTarget":
+        params = StdioServerParameters(
+            command=sys.executable,
+            args=["mcp_server.py", "--startup", "eager", "--no-http"],
+            cwd=ROOT,
+            env=_server_env(self.store),
+        )
+        try:
+            errlog = self._stack.enter_context(open(os.devnull, "w"))
+            read, write = await self._stack.enter_async_context(stdio_client(params, errlog=errlog))
+            self.session = await self._stack.enter_async_context(ClientSession(read, write))
+            await asyncio.wait_for(self.session.initialize(), 60)
+            tools = {tool.name for tool in (await self.session.list_tools()).tools}
+        except BaseException:
+            await self._stack.aclose()
+            raise
+        missing = sorted(tool for _, tool in ENDPOINTS.values() if tool not in tools)
+        if missing:
+            raise RuntimeError(f"MCP 服务缺少工具：{missing}")
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self._stack.aclose()
+
+    async def call(self, endpoint: str, payload: Dict[str, Any]) -> bool:
+        result = await asyncio.wait_for(
+            self.session.call_tool(ENDPOINTS[endpoint][1], {"payload": payload}), self.timeout
+        )
+        return not result.isError
+
+
+# ---- 施压 ----
+
+
+@dataclass
+class Recorder:
+    latencies: Dict[str, List[float]] = field(default_factory=dict)
+    errors: Dict[str, int] = field(default_factory=dict)
+    dropped: int = 0
+
+    async def issue(self, target: Any, endpoint: str, payload: Dict[str, Any], start: float, record: bool) -> None:
+        try:
+            ok = await target.call(endpoint, payload)
+        except Exception:  # 超时、连接断开等传输错误与 4xx/5xx 一样计为失败
+            ok = False
+        if not record:
+            return
+        if ok:
+            self.latencies.setdefault(endpoint, []).append(time.perf_counter() - start)
+        else:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+
+async def closed_loop(target: Any, workload: Workload, concurrency: int, args: argparse.Namespace) -> Recorder:
+    recorder = Recorder()
+    measure_from = time.perf_counter() + args.warmup
+    deadline = measure_from + args.duration
+
+    async def client(index: int) -> None:
+        rng = random.Random(args.seed * 1000 + index)
+        while (now := time.perf_counter()) < deadline:
+            endpoint, payload = workload.draw(rng)
+            await recorder.issue(target, endpoint, payload, now, now >= measure_from)
+
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+    return recorder
+
+
+async def open_loop(target: Any, workload: Workload, rate: float, args: argparse.Namespace) -> Recorder:
+    recorder = Recorder()
+    rng = random.Random(args.seed)
+    inflight: set = set()
+    scheduled = time.perf_counter()
+    measure_from = scheduled + args.warmup
+    deadline = measure_from + args.duration
+    while scheduled < deadline:
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        record = scheduled >= measure_from
+        if len(inflight) >= args.max_inflight:
+            recorder.dropped += record
+        else:
+            endpoint, payload = workload.draw(rng)
+            # 延迟从计划发出时刻算起：事件循环落后于到达计划的时间也计入
+            task = asyncio.create_task(recorder.issue(target, endpoint, payload, scheduled, record))
+            inflight.add(task)
+            task.add_done_callback(inflight.discard)
+        scheduled += rng.expovariate(rate) if args.arrivals == "poisson" else 1.0 / rate
+    await asyncio.gather(*inflight)
+    return recorder
+
+
+# ---- 报告 ----
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """最近秩百分位：ordered 已升序。"""
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def summarize(recorder: Recorder, duration: float) -> Dict[str, Dict[str, float]]:
+    # 全部失败的接口也要出现在报告里
+    groups = {name: recorder.latencies.get(name, []) for name in sorted({*recorder.latencies, *recorder.errors})}
+    groups["all"] = [sample for samples in groups.values() for sample in samples]
+    summary: Dict[str, Dict[str, float]] = {}
+    for name, samples in groups.items():
+        ordered = sorted(samples)
+        errors = sum(recorder.errors.values()) if name == "all" else recorder.errors.get(name, 0)
+        row: Dict[str, float] = {"count": len(ordered), "errors": errors, "throughput": len(ordered) / duration}
+        if ordered:
+            row.update({label: percentile(ordered, q) * 1000 for label, q in PERCENTILES})
+            row["max"] = ordered[-1] * 1000
+        summary[name] = row
+    return summary
+
+
+def print_run(run: Dict[str, Any]) -> None:
+    level = f"c={run['level']}" if run["mode"] == "closed" else f"rate={run['level']}/s"
+    extra = f"，dropped {run['dropped']}" if run["mode"] == "open" else ""
+    print(f"\n[{run['target']}] {run['mode']} {level}（{run['duration']:.0f}s{extra}）")
+    columns = ["p50", "p95", "p99", "p999", "max"]
+    print(f"  {'endpoint':<10} {'count':>7} {'err':>5} {'req/s':>8} " + " ".join(f"{c + '(ms)':>10}" for c in columns))
+    for name, row in run["endpoints"].items():
+        cells = " ".join(f"{row[c]:>10.2f}" if c in row else f"{'-':>10}" for c in columns)
+        print(f"  {name:<10} {row['count']:>7} {row['errors']:>5} {row['throughput']:>8.1f} {cells}")
+
+
+def print_gap(runs: List[Dict[str, Any]]) -> None:
+    by_key = {(run["target"], run["mode"], run["level"]): run for run in runs}
+    rows = []
+    for run in runs:
+        if run["target"] != "mcp" or ("http", run["mode"], run["level"]) not in by_key:
+            continue
+        http = by_key[("http", run["mode"], run["level"])]["endpoints"]
+        for name, row in run["endpoints"].items():
+            base = http.get(name, {})
+            if "p50" in row and "p50" in base:
+                rows.append((run["level"], name, base["p50"], row["p50"], base["p99"], row["p99"]))
+    if not rows:
+        return
+    print("\nMCP 相对 HTTP（同档位、同接口）")
+    print(f"  {'level':>6} {'endpoint':<10} {'http p50':>9} {'mcp p50':>9} {'x':>6} {'http p99':>9} {'mcp p99':>9} {'x':>6}")
+    for level, name, h50, m50, h99, m99 in rows:
+        print(f"  {level:>6} {name:<10} {h50:>9.2f} {m50:>9.2f} {m50 / h50:>6.2f} {h99:>9.2f} {m99:>9.2f} {m99 / h99:>6.2f}")
+
+
+async def run_target(target: Any, workload: Workload, levels: Sequence[float], args: argparse.Namespace) -> List[Dict[str, Any]]:
+    runs = []
+    async with target:
+        for level in levels:
+            if args.mode == "closed":
+                recorder = await closed_loop(target, workload, int(level), args)
+            else:
+                recorder = await open_loop(target, workload, level, args)
+            run = {
+                "target": target.name,
+                "mode": args.mode,
+                "level": level,
+                "duration": args.duration,
+                "dropped": recorder.dropped,
+                "endpoints": summarize(recorder, args.duration),
+            }
+            print_run(run)
+            runs.append(run)
+    return runs
+
+
+def _levels(spec: str) -> List[float]:
+    return [float(part) if "." in part else int(part) for part in spec.split(",") if part]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default="http,mcp", help="http、mcp 或二者（逗号分隔）")
+    parser.add_argument("--url", default="", help="压测已在运行的 HTTP 服务，而不是自行启动 main.py")
+    parser.add_argument("--mode", choices=("closed", "open"), default="closed")
+    parser.add_argument("--concurrency", default="8", help="closed 模式的并发档位，如 1,8,32")
+    parser.add_argument("--rate", default="100", help="open 模式的到达率档位（请求/秒），如 50,100,200")
+    parser.add_argument("--arrivals", choices=("poisson", "uniform"), default="poisson")
+    parser.add_argument("--duration", type=float, default=10.0, help="每档计入统计的秒数")
+    parser.add_argument("--warmup", type=float, default=2.0, help="每档开始时不计入统计的秒数")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="接口配比，如 track=4,diagnose=2,emotion=2,plan=2")
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--pool", type=int, default=500, help="每个接口预生成的请求体数")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--store", default="memory", help="自行启动的服务使用的 EDU_STORE")
+    parser.add_argument("--max-inflight", type=int, default=1000, help="open 模式同时在途请求上限")
+    parser.add_argument("--timeout", type=float, default=30.0, help="单个请求的超时秒数")
+    parser.add_argument("--output", default="", help="把结果写成 JSON")
+    args = parser.parse_args()
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as exc:
+        parser.error(str(exc))
+    names = [name for name in args.target.split(",") if name]
+    if not names or set(names) - {"http", "mcp"}:
+        parser.error("--target 只能是 http、mcp")
+    levels = _levels(args.concurrency if args.mode == "closed" else args.rate)
+    connections = max(int(level) for level in levels) if args.mode == "closed" else args.max_inflight
+    workload = Workload(mix, args.students, args.pool, args.seed)
+
+    async def run_all() -> List[Dict[str, Any]]:
+        runs: List[Dict[str, Any]] = []
+        for name in names:
+            if name == "http":
+                target: Any = HttpTarget(args.url, args.store, connections, args.timeout)
+            else:
+                target = McpTarget(args.store, args.timeout)
+            runs.extend(await run_target(target, workload, levels, args))
+        return runs
+
+    runs = asyncio.run(run_all())
+    print_gap(runs)
+    if args.output:
+        document = {
+            "meta": {
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "mix": mix,
+                "students": args.students,
+                "warmup": args.warmup,
+                "arrivals": args.arrivals,
+                "seed": args.seed,
+            },
+            "runs": runs,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(document, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""MCP 工具分发基准：对比 inprocess 直连与 TestClient(http) 兜底的单次调用延迟，
+以及一轮 agent 调用（trace/diagnose/analyze_affective/recommend_path）串行与 batch 的耗时。
+
+运行：python -m benchmarks.mcp_dispatch --calls 500 --concurrency 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from typing import Any, Dict, List, Tuple
+
+from main import create_app
+from mcp_server import FastApiMCP
+
+PAYLOADS: Dict[str, Dict[str, Any]] = {
+    "trace": {
+        "student_id": "bench",
+        "interactions": [
+            {"skill": "测度", "correct": True},
+            {"skill": "测度", "correct": False, "confidence": 0.4},
+            {"skill": "可测函数", "correct": True, "time_spent_seconds": 150},
+        ],
+    },
+    "diagnose": {
+        "student_id": "bench",
+        "subject": "实分析",
+        "concept_snapshots": [
+            {"concept_name": "外测度", "attempts": 10, "correct": 9},
+            {"concept_name": "可测集", "attempts": 8, "correct": 4, "misconceptions": ["可数可加性"]},
+        ],
+    },
+    "analyze_affective": {
+        "student_id": "bench",
+        "current_task": "Fubini定理",
+        "affective_signals": [{"channel": "text", "emotion": "frustration", "intensity": 0.7}],
+    },
+    "analyze_sentiment": {"text": "这道题好难，我不懂"},
+    "recommend_path": {"student_id": "bench", "mastery": {"集合论基础": 0.9, "外测度": 0.5}},
+}
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def _sequential(bridge: FastApiMCP, tool: str, calls: int) -> List[float]:
+    payload = PAYLOADS[tool]
+    latencies: List[float] = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        await bridge.call_tool(tool, payload)
+        latencies.append((time.perf_counter() - start) * 1e6)
+    return latencies
+
+
+async def _concurrent(bridge: FastApiMCP, tool: str, calls: int, concurrency: int) -> float:
+    payload = PAYLOADS[tool]
+    per_worker = max(1, calls // concurrency)
+
+    async def worker() -> None:
+        for _ in range(per_worker):
+            await bridge.call_tool(tool, payload)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return per_worker * concurrency / (time.perf_counter() - start)
+
+
+AGENT_TURN = ["trace", "diagnose", "analyze_affective", "recommend_path"]
+
+
+async def _agent_turn(bridge: FastApiMCP, turns: int) -> Tuple[float, float]:
+    """返回 (串行逐个调用, batch 一次调用) 的单轮中位耗时，单位 us。
+
+    走 FastMCP.call_tool，计入每次工具调用的参数校验与结果序列化；不含真实传输往返。
+    """
+    batch = [{"tool": tool, "payload": PAYLOADS[tool]} for tool in AGENT_TURN]
+    chained: List[float] = []
+    batched: List[float] = []
+    for _ in range(turns):
+        start = time.perf_counter()
+        for tool in AGENT_TURN:
+            await bridge.mcp.call_tool(tool, {"payload": PAYLOADS[tool]})
+        chained.append((time.perf_counter() - start) * 1e6)
+
+        start = time.perf_counter()
+        await bridge.mcp.call_tool(bridge.batch_tool_name, {"calls": batch})
+        batched.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(chained), statistics.median(batched)
+
+
+async def run(calls: int, concurrency: int) -> List[Tuple[str, str, float, float, float]]:
+    rows = []
+    for mode in FastApiMCP.DISPATCH_MODES:
+        bridge = FastApiMCP(create_app(), name=f"bench-{mode}", dispatch=mode)
+        bridge.setup_server()
+        for tool in PAYLOADS:
+            await _sequential(bridge, tool, min(20, calls))  # 预热
+            latencies = await _sequential(bridge, tool, calls)
+            throughput = await _concurrent(bridge, tool, calls, concurrency)
+            rows.append((mode, tool, statistics.median(latencies), _percentile(latencies, 0.99), throughput))
+        chained, batched = await _agent_turn(bridge, max(1, calls // 10))
+        print(f"[{mode}] 单轮 {len(AGENT_TURN)} 次调用：串行 {chained:.0f}us，batch {batched:.0f}us")
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)  # TestClient 每次请求都会打 INFO
+
+    rows = asyncio.run(run(args.calls, args.concurrency))
+    print(f"{'mode':<10} {'tool':<18} {'p50(us)':>10} {'p99(us)':>10} {'ops/s@c' + str(args.concurrency):>12}")
+    for mode, tool, p50, p99, throughput in rows:
+        print(f"{mode:<10} {tool:<18} {p50:>10.1f} {p99:>10.1f} {throughput:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
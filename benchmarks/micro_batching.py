@@ -0,0 +1,227 @@
+"""推理微批基准：``models.batching.MicroBatcher`` 的正确性，以及批窗口对吞吐与延迟的影响。
+
+- 正确性：``trace_batch`` 与逐个 ``trace`` 的结果一致（含增量请求、参数表以外的技能）；并发提交时每个请求
+  拿回自己的结果；批内单个请求出错只影响它自己；进程池执行的情感批与直接调用一致；
+  开启批处理后 /track、/diagnose、/emotion/sentiment 的响应与关闭时相同，/stats/batch 记录批次；
+- 吞吐/延迟：固定并发的闭环客户端（每个线程发完一个等结果再发下一个），对比关闭批处理与不同
+  max_batch / max_wait_ms 时的吞吐和 p50/p99 延迟。两组负载：
+  * 规则版 ``trace_batch``：单次计算很轻、主要是 Python 对象开销，批处理的收益有限；
+  * 模拟训练模型（一层 512×512 稠密网络，``dense_batch``）：单次调用有固定开销、批量矩阵乘更省，
+    代表 DKVMN/AKT 等模型接入后的情形。
+
+运行：python -m benchmarks.micro_batching --clients 32 --windows 0,1,2,5 --batches 8,32
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import threading
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+from benchmarks import generators
+from models import batching, cognitive_diagnosis, emotion_analysis, knowledge_tracking
+from schemas import KnowledgeTracingRequest, SentimentRequest
+
+
+def make_payloads(count: int, length: int, seed: int, prefix: str = "mb") -> List[KnowledgeTracingRequest]:
+    rng = random.Random(seed)
+    payloads = []
+    for k in range(count):
+        interactions = generators.interactions(length, 6, seed + k)
+        payloads.append(
+            KnowledgeTracingRequest.model_construct(
+                request_id=f"r{k}",
+                student_id=f"{prefix}-{k}",
+                interactions=interactions,
+                prior_mastery={"skill-0": rng.random()} if k % 3 == 0 else {},
+                incremental=False,
+            )
+        )
+    return payloads
+
+
+def _comparable(response) -> Tuple:
+    return (
+        response.request_id,
+        response.student_id,
+        [(s.skill, s.probability_mastery, s.trend) for s in response.skills],
+        response.recommended_sequence,
+        response.mode,
+        response.model_version,
+    )
+
+
+def check_trace_batch() -> None:
+    limit = knowledge_tracking.VECTOR_MIN_INTERACTIONS
+    payloads = make_payloads(24, 30, 1)
+    incremental = [
+        KnowledgeTracingRequest(
+            student_id=f"mb-inc-{run}",
+            interactions=[{"skill": "a", "correct": True, "seq": 0}, {"skill": "b", "correct": False, "seq": 1}],
+            incremental=True,
+        )
+        for run in range(2)
+    ]
+    expected = [_comparable(knowledge_tracking.trace(p)) for p in payloads]
+    expected_inc = _comparable(knowledge_tracking.trace(incremental[0]))
+    try:
+        for threshold in (1, 10**9):  # 合并后走批量归约 / 逐个回放
+            knowledge_tracking.VECTOR_MIN_INTERACTIONS = threshold
+            mixed = payloads[:10] + [incremental[1]] + payloads[10:]
+            results = knowledge_tracking.trace_batch(mixed)
+            got = [_comparable(r) for r in results[:10] + results[11:]]
+            for a, b in zip(got, expected):
+                assert a[:2] == b[:2] and a[3:] == b[3:], (a, b)
+                for (sa, pa, ta), (sb, pb, tb) in zip(a[2], b[2]):
+                    # 概率保留 3 位小数：两条路径 1e-9 级的差异落在舍入边界两侧时恰好相差 0.001
+                    assert sa == sb and ta == tb and abs(pa - pb) <= 1e-3 + 1e-9, (sa, pa, pb)
+            inc = _comparable(results[10])
+            assert inc[2] == expected_inc[2], (inc, expected_inc)
+            incremental[1] = KnowledgeTracingRequest(**{**incremental[1].model_dump(), "student_id": "mb-inc-again"})
+    finally:
+        knowledge_tracking.VECTOR_MIN_INTERACTIONS = limit
+    print("trace_batch 校验通过：合并回放与逐个 trace 一致，增量请求照常从各自状态继续。")
+
+
+def check_batcher() -> None:
+    def square_batch(items: List[int]):
+        if 13 in items:
+            raise ValueError("整批失败")
+        return [ValueError("坏请求") if item == 7 else item * item for item in items]
+
+    batcher = batching.MicroBatcher("bench-square", square_batch, max_batch=8, max_wait_ms=5, pool="thread:2")
+    results: dict = {}
+
+    def worker(k: int) -> None:
+        try:
+            results[k] = batcher.call(k)
+        except ValueError as exc:
+            results[k] = str(exc)
+
+    threads = [threading.Thread(target=worker, args=(k,)) for k in range(64)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stats = batcher.stats()
+    batcher.close()
+    assert all(results[k] == (("坏请求" if k == 7 else "整批失败") if k in (7, 13) else k * k) for k in range(64)), results
+    assert stats["calls"] == 64 and stats["largest_batch"] > 1 and stats["errors"] == 2, stats
+    assert batcher.call(3) == 9  # 关闭后再次提交会重新启动
+    batcher.close()
+
+    texts = ["讲得很清晰，我很喜欢", "太难了，完全不懂", "今天天气一般", "好难", ""] * 20
+    requests = [SentimentRequest(text=text, request_id=str(k)) for k, text in enumerate(texts)]
+    pooled = batching.MicroBatcher(
+        "bench-sentiment", emotion_analysis.analyze_sentiment_many, max_batch=16, max_wait_ms=2, pool="process:2"
+    )
+    futures = [pooled.submit(request) for request in requests]
+    got = [future.result() for future in futures]
+    pooled.close()
+    assert got == emotion_analysis.analyze_sentiment_many(requests)
+    print(f"批处理器校验通过：64 个并发请求分成 {stats['batches']} 批，异常只落到出错请求；进程池情感结果一致。")
+
+
+def check_routes() -> None:
+    from fastapi.testclient import TestClient
+
+    from main import app
+
+    body_track = {"student_id": "mb-http", "interactions": [{"skill": "x", "correct": True}]}
+    body_diag = {"student_id": "mb-http", "subject": "demo", "concept_snapshots": [{"concept_name": "x", "attempts": 4, "correct": 3}]}
+    body_sent = {"text": "讲得很清晰"}
+    batchers = [knowledge_tracking.TRACE_BATCHER, cognitive_diagnosis.DIAGNOSE_BATCHER, emotion_analysis.SENTIMENT_BATCHER]
+    with TestClient(app) as client:
+        plain = [
+            client.post(path, json=body).json()
+            for path, body in (("/track", body_track), ("/diagnose", body_diag), ("/emotion/sentiment", body_sent))
+        ]
+        saved = [b.max_batch for b in batchers]
+        try:
+            for b in batchers:
+                b.max_batch = 16
+            batched = [
+                client.post(path, json=body).json()
+                for path, body in (("/track", body_track), ("/diagnose", body_diag), ("/emotion/sentiment", body_sent))
+            ]
+            stats = client.get("/stats/batch").json()
+        finally:
+            for b, size in zip(batchers, saved):
+                b.max_batch = size
+    assert batched == plain, (batched, plain)
+    assert stats["trace"]["enabled"] and stats["trace"]["calls"] >= 2, stats
+    print("路由校验通过：开启批处理后 /track、/diagnose、/emotion/sentiment 响应不变。")
+
+
+_WEIGHTS = np.random.default_rng(0).standard_normal((512, 512)) / 512**0.5
+
+
+def dense_batch(items: List[np.ndarray]) -> List[float]:
+    """模拟训练模型的批量推理：一层稠密网络，输出每个请求的一个分数。"""
+    hidden = np.tanh(np.stack(items) @ _WEIGHTS)
+    return (hidden @ _WEIGHTS[:, 0]).tolist()
+
+
+def run_load(call, payloads: list, clients: int, duration: float) -> Tuple[float, float, float]:
+    """闭环负载：``clients`` 个线程各自循环发请求，返回 (每秒请求数, p50 毫秒, p99 毫秒)。"""
+    latencies: List[List[float]] = [[] for _ in range(clients)]
+    stop = time.perf_counter() + duration
+
+    def client(k: int) -> None:
+        own = latencies[k]
+        i = k
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            call(payloads[i % len(payloads)])
+            own.append(time.perf_counter() - start)
+            i += clients
+
+    threads = [threading.Thread(target=client, args=(k,)) for k in range(clients)]
+    begin = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - begin
+    merged = np.array([x for own in latencies for x in own])
+    return len(merged) / elapsed, float(np.percentile(merged, 50) * 1e3), float(np.percentile(merged, 99) * 1e3)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=32, help="并发客户端（线程）数")
+    parser.add_argument("--length", type=int, default=20, help="每个请求的交互条数")
+    parser.add_argument("--windows", default="0,1,2,5", help="max_wait_ms 列表")
+    parser.add_argument("--batches", default="8,32", help="max_batch 列表")
+    parser.add_argument("--duration", type=float, default=2.0, help="每种配置的压测秒数")
+    args = parser.parse_args()
+
+    check_trace_batch()
+    check_batcher()
+    check_routes()
+
+    rows = [(1, 0.0)] + [(int(b), float(w)) for b in args.batches.split(",") for w in args.windows.split(",")]
+    workloads = [
+        ("trace", knowledge_tracking.trace_batch, make_payloads(256, args.length, 3, prefix="load")),
+        ("dense", dense_batch, list(np.random.default_rng(1).standard_normal((256, 512)))),
+    ]
+    for name, batch_fn, payloads in workloads:
+        print(f"[{name}] {args.clients} 个并发客户端")
+        print(f"{'max_batch':>9} {'wait_ms':>8} {'req/s':>9} {'p50(ms)':>8} {'p99(ms)':>8} {'avg_batch':>10}")
+        for max_batch, wait in rows:
+            batcher = batching.MicroBatcher(
+                f"bench-{name}", batch_fn, max_batch=max_batch, max_wait_ms=wait, pure=name != "trace"
+            )
+            rate, p50, p99 = run_load(batcher.call, payloads, args.clients, args.duration)
+            avg = batcher.stats()["avg_batch"]
+            batcher.close()
+            label = "off" if max_batch == 1 else str(max_batch)
+            print(f"{label:>9} {wait:>8.1f} {rate:>9.0f} {p50:>8.2f} {p99:>8.2f} {avg:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""规划缓存基准：掌握度版本号 + LRU 缓存 vs 每次重新遍历。
+
+- 随机交错的掌握度写入与规划请求下，带缓存的结果始终等于不走缓存直接计算的结果
+  （内存后端，以及容量很小、学生频繁淘汰再装载的内存后端）；
+- 并发写入与规划结束后，缓存结果与最终掌握度一致；
+- 对比掌握度未变时重复规划的耗时与命中率。
+
+运行：python -m benchmarks.plan_cache --students 200 --requests 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import threading
+import time
+
+import database
+from benchmarks import generators
+from models import path_planning
+from models.cache import LRUCache
+from models.knowledge_graph import current_graph
+from schemas import PathRequest
+
+
+def uncached(student_id: str, threshold: float, max_recommend: int) -> list:
+    return path_planning._recommend(current_graph(), database.dump_mastery(student_id), threshold, max_recommend)
+
+
+def cached(student_id: str, threshold: float, max_recommend: int) -> list:
+    payload = PathRequest(student_id=student_id, mastery={}, threshold=threshold, max_recommend=max_recommend)
+    return path_planning.plan(payload).recommended_path
+
+
+def check_interleaved(backend_url: str, students: int, steps: int, seed: int) -> None:
+    database.configure(backend_url)
+    path_planning.PLAN_CACHE.clear()
+    rng = random.Random(seed)
+    concepts = list(current_graph().names)
+    for _ in range(steps):
+        sid = f"stu-{rng.randrange(students)}"
+        if rng.random() < 0.3:
+            if rng.random() < 0.5:
+                database.set_mastery(sid, rng.choice(concepts), rng.random())
+            else:
+                database.update_mastery(sid, rng.choice(concepts), rng.randint(-30, 30))
+        else:
+            threshold, max_recommend = rng.choice((0.7, 0.9)), rng.choice((3, 5))
+            assert cached(sid, threshold, max_recommend) == uncached(sid, threshold, max_recommend), sid
+
+
+def check_concurrent(students: int, seed: int) -> None:
+    database.configure("memory")
+    path_planning.PLAN_CACHE.clear()
+    concepts = list(current_graph().names)
+    stop = threading.Event()
+
+    def writer(k: int) -> None:
+        rng = random.Random(seed + k)
+        while not stop.is_set():
+            database.set_mastery(f"stu-{rng.randrange(students)}", rng.choice(concepts), rng.random())
+
+    def planner(k: int) -> None:
+        rng = random.Random(seed * 31 + k)
+        while not stop.is_set():
+            cached(f"stu-{rng.randrange(students)}", 0.7, 5)
+
+    threads = [threading.Thread(target=writer, args=(k,)) for k in range(2)]
+    threads += [threading.Thread(target=planner, args=(k,)) for k in range(4)]
+    for t in threads:
+        t.start()
+    time.sleep(1.0)
+    stop.set()
+    for t in threads:
+        t.join()
+    for s in range(students):
+        sid = f"stu-{s}"
+        assert cached(sid, 0.7, 5) == uncached(sid, 0.7, 5), sid
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    plan_cache = path_planning.PLAN_CACHE
+    try:
+        check_interleaved("memory", args.students, 5000, args.seed)
+        check_interleaved("memory?capacity=8", args.students // 4, 5000, args.seed + 1)
+        print("一致性校验通过：交错写入/规划（含 LRU 淘汰再装载）时缓存结果与直接计算一致。")
+        check_concurrent(args.students // 10, args.seed)
+        print("并发校验通过：并发写入与规划结束后缓存结果与最终掌握度一致。")
+
+        database.configure("memory")
+        rng = random.Random(args.seed)
+        concepts = list(current_graph().names)
+        for s in range(args.students):
+            for concept, value in generators.mastery(concepts, 0.5, args.seed + s).items():
+                database.set_mastery(f"stu-{s}", concept, value)
+        workload = [f"stu-{rng.randrange(args.students)}" for _ in range(args.requests)]
+
+        # 同样走 plan()：容量为 1 的缓存对随机学生几乎全部未命中，即原先每次遍历的耗时
+        path_planning.PLAN_CACHE = LRUCache(1)
+        start = time.perf_counter()
+        for sid in workload:
+            cached(sid, 0.7, 5)
+        base_us = (time.perf_counter() - start) / len(workload) * 1e6
+
+        path_planning.PLAN_CACHE = LRUCache(args.students * 2)
+        start = time.perf_counter()
+        for sid in workload:
+            cached(sid, 0.7, 5)
+        cached_us = (time.perf_counter() - start) / len(workload) * 1e6
+        stats = path_planning.PLAN_CACHE.stats()
+        print(f"{args.requests} 次 plan() / {args.students} 名学生（掌握度不变，含请求/响应对象构造）")
+        print(f"{'path':<10} {'us/plan':>10}")
+        print(f"{'traverse':<10} {base_us:>10.2f}")
+        print(f"{'cached':<10} {cached_us:>10.2f}   命中率 {stats['hit_rate']:.1%}")
+    finally:
+        path_planning.PLAN_CACHE = plan_cache
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""纯接口响应记忆化基准：``models.memo`` 的命中语义、失效与内存上限，以及命中/未命中的耗时。
+
+- 语义：只有 ``request_id`` 不同（或字典键顺序不同）的请求命中同一条目，响应透传本次 ``request_id``，其余字段与
+  未缓存时完全相同；只带 ``student_id`` 的 /plan 不走缓存；先修图换版本、替换词表后不再命中旧条目；
+- ``TTLCache``：过期条目视为不存在，超出条数/字节上限时按 LRU 淘汰；所有 POST 路由都已声明 pure/impure，
+  漏标的路由在 ``check_routes`` 时报错；
+- 耗时：/emotion/sentiment、/plan（显式掌握度）经 HTTP 与直接调用路由函数时命中/未命中的单次耗时。
+
+运行：python -m benchmarks.response_memo --rounds 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from main import app
+from models import emotion_analysis, knowledge_graph, memo
+from models.cache import TTLCache
+from routers import emotion, planning
+from schemas import PathRequest, SentimentRequest
+
+
+def _endpoint(name: str) -> dict:
+    return memo.stats()["endpoints"][name]
+
+
+def check_semantics(client: TestClient) -> None:
+    memo.clear()
+    graph = knowledge_graph.current_graph()
+    concepts = list(graph.names)[:6]
+    mastery = {name: 0.1 * k for k, name in enumerate(concepts)}
+    before = dict(_endpoint("plan"))
+    first = client.post("/plan", json={"mastery": mastery, "request_id": "a"}).json()
+    reordered = dict(reversed(list(mastery.items())))
+    second = client.post("/plan", json={"mastery": reordered, "request_id": "b", "threshold": 0.7}).json()
+    after = _endpoint("plan")
+    assert after["misses"] == before["misses"] + 1 and after["hits"] == before["hits"] + 1, (before, after)
+    assert first["request_id"] == "a" and second["request_id"] == "b"
+    assert {**first, "request_id": None} == {**second, "request_id": None}
+
+    # 只带 student_id：读数据库，不走缓存
+    client.post("/plan", json={"student_id": "memo-s", "mastery": {}})
+    assert _endpoint("plan")["bypassed"] == after["bypassed"] + 1
+
+    # 先修图换版本：不再命中旧条目，结果按新图计算
+    adj = {name: [] for name in concepts}
+    old = knowledge_graph.set_graph(knowledge_graph.compile_graph(adj))
+    try:
+        flat = client.post("/plan", json={"mastery": mastery, "request_id": "c"}).json()
+    finally:
+        knowledge_graph.set_graph(old)
+    assert _endpoint("plan")["misses"] == after["misses"] + 1
+    assert flat["model_version"] != first["model_version"]
+    again = client.post("/plan", json={"mastery": mastery, "request_id": "d"}).json()
+    assert {**again, "request_id": None} == {**first, "request_id": None}
+
+    # 词表替换：同一段文本按新词表重新打分
+    text = {"text": "这道题讲得很清晰", "request_id": "x"}
+    plain = client.post("/emotion/sentiment", json=text).json()
+    hits = _endpoint("sentiment")["hits"]
+    assert client.post("/emotion/sentiment", json={**text, "request_id": "y"}).json()["request_id"] == "y"
+    assert _endpoint("sentiment")["hits"] == hits + 1
+    saved = emotion_analysis._LEXICON
+    emotion_analysis.load_lexicon()
+    try:
+        assert client.post("/emotion/sentiment", json=text).json() == plain
+        assert _endpoint("sentiment")["hits"] == hits + 1
+    finally:
+        emotion_analysis._LEXICON = saved
+
+    stats = client.get("/stats/cache").json()["memo"]
+    assert stats["enabled"] and stats["cache"]["size"] >= 3, stats
+    print("语义校验通过：request_id/键顺序不影响命中，student_id 规划不缓存，换图与换词表后重新计算。")
+
+
+def check_cache() -> None:
+    now = [0.0]
+    cache = TTLCache(maxsize=3, max_bytes=1000, ttl=10, clock=lambda: now[0])
+    cache.put("a", 1, 100)
+    now[0] = 9.9
+    assert cache.get("a") == 1
+    now[0] = 10.0
+    assert cache.get("a") is None and cache.stats()["expirations"] == 1
+    for key in "bcde":
+        cache.put(key, key, 100)
+    assert len(cache) == 3 and cache.get("b") is None  # 超出条数，淘汰最久未用的 b
+    cache.get("c")
+    cache.put("big", "x", 800)  # 字节超限：从最久未用的 d 开始淘汰
+    assert cache.get("d") is None and cache.get("c") == "c" and cache.stats()["bytes"] <= 1000
+    cache.put("huge", "x", 5000)  # 单条超过上限，不缓存
+    assert cache.get("huge") is None
+
+    router = APIRouter()
+
+    @router.post("/undeclared")
+    def undeclared(payload: SentimentRequest) -> dict:
+        return {}
+
+    probe = FastAPI()
+    probe.include_router(router)
+    try:
+        memo.check_routes(probe.routes)
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("未声明的 POST 路由应当报错")
+    memo.check_routes(app.routes)
+    print("TTLCache 校验通过：过期、条数与字节上限按 LRU 淘汰；漏标 pure/impure 的路由会报错。")
+
+
+def timed(fn, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    with TestClient(app) as client:
+        check_semantics(client)
+        check_cache()
+
+        concepts = list(knowledge_graph.current_graph().names)
+        mastery = {name: (k % 10) / 10 for k, name in enumerate(concepts)}
+        text = "老师讲得很清晰，我很喜欢这种讲法，但是最后一道题好难，我还是不懂。" * 4
+        cases = [
+            ("/emotion/sentiment", {"text": text}, emotion.analyze_sentiment, SentimentRequest(text=text)),
+            ("/plan", {"mastery": mastery}, planning.recommend_path, PathRequest(mastery=mastery)),
+        ]
+        # 大图：2000 个概念、每层 50 个的分层 DAG
+        big = {f"c{k}": [f"c{k + 50 + j}" for j in range(3) if k + 50 + j < 2000] for k in range(2000)}
+        big_mastery = {name: (k % 10) / 10 for k, name in enumerate(big)}
+        cases.append(("/plan (2000 概念)", {"mastery": big_mastery}, planning.recommend_path, PathRequest(mastery=big_mastery)))
+        print(f"{'endpoint':<20} {'path':<7} {'miss(us)':>10} {'hit(us)':>10} {'speedup':>8}")
+        for label, body, route, payload in cases:
+            path = label.split()[0]
+            old = knowledge_graph.set_graph(knowledge_graph.compile_graph(big)) if "2000" in label else None
+            try:
+                memo.clear()
+                miss_http = timed(lambda: (memo.clear(), client.post(path, json=body)), args.rounds // 4)
+                hit_http = timed(lambda: client.post(path, json=body), args.rounds // 4)
+                miss = timed(lambda: (memo.clear(), route(payload)), args.rounds)
+                hit = timed(lambda: route(payload), args.rounds)
+            finally:
+                if old is not None:
+                    knowledge_graph.set_graph(old)
+            print(f"{label:<20} {'http':<7} {miss_http:>10.1f} {hit_http:>10.1f} {miss_http / hit_http:>7.1f}x")
+            print(f"{label:<20} {'direct':<7} {miss:>10.1f} {hit:>10.1f} {miss / hit:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
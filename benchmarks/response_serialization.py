@@ -0,0 +1,387 @@
+"""响应构造与序列化基准：路由快速路径（``routers.responses``）与 FastAPI 默认路径的输出一致性及耗时。
+
+- 金标准：一组固定请求（各接口的常规请求与边界情况：空列表、全对/全错、IRT/BKT 参数表、增量去重、
+  特殊字符、未知学科、校验失败等）按顺序经 HTTP 调用，状态码与响应字节必须与 ``golden/responses.json``
+  完全相同。金标准文件在默认配置（内存存储、无参数文件与先修图文件）下由改动前的代码生成，
+  ``--update`` 重新生成。只有 ``FLOAT_FORMAT_CASES`` 比较解析后的值：回显的请求字段里绝对值小于 1e-4 的浮点数
+  写法不同（``0.00005`` / ``5e-05``）；
+- 路径对比：各接口由模型层构造的响应（含时间相关的情绪汇总）分别经 ``ModelJSONResponse`` 与 FastAPI 默认的
+  ``serialize_response`` + ``JSONResponse`` 写出，字节相同；
+- 耗时：各接口响应随规模（技能数、概念数、文本数、学生数）增长时，默认路径（重新校验 + json.dumps）与快速路径的
+  序列化耗时；以及逐层构造响应时构造函数（pydantic-core 校验）与 ``model_construct`` 的对比——后者是纯 Python，
+  反而更慢，所以模型层照常用构造函数。
+
+运行：python -m benchmarks.response_serialization --sizes 10,100,1000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import time
+import typing
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from benchmarks import generators
+from main import app
+from models import bkt, cognitive_diagnosis, cohort_planning, emotion_analysis, irt, knowledge_tracking, tutor_step
+from routers.responses import ModelJSONResponse
+from schemas import (
+    AffectiveAnalysisRequest,
+    AffectSummaryRequest,
+    CognitiveDiagnosisRequest,
+    KnowledgeTracingRequest,
+    PathBatchRequest,
+    SentimentBatchRequest,
+    SkillInteraction,
+    TutorStepRequest,
+)
+
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), "golden", "responses.json")
+FLOAT_FORMAT_CASES = {"emotion/summary-tiny-window"}
+
+# 学生名、任务名会原样写进响应：覆盖引号、反斜杠、换行、控制字符、行分隔符与 emoji
+ODD_TEXT = '引号"与\\反斜杠\n换行\t制表\x01控制\u2028分隔 😀 <b>&amp;</b>'
+
+
+def _interactions(count: int, skills: int, seed: int) -> List[Dict[str, Any]]:
+    return [item.model_dump(exclude_none=True) for item in generators.interactions(count, skills, seed)]
+
+
+def _golden_interactions(count: int, skills: int, seed: int) -> List[Dict[str, Any]]:
+    """金标准请求体的交互：固定在这里而不用共享生成器，生成器调整不会改动已记录的响应。"""
+    rng = random.Random(seed)
+    names = [f"skill-{k}" for k in range(skills)]
+    return [
+        SkillInteraction.model_construct(
+            skill=rng.choice(names),
+            correct=rng.random() < 0.6,
+            time_spent_seconds=rng.choice((None, 0, 30, 121, 300)),
+            confidence=rng.choice((None, rng.random())),
+        ).model_dump(exclude_none=True)
+        for _ in range(count)
+    ]
+
+
+def _snapshots(count: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "concept_name": f"概念-{k}",
+            "attempts": 1 + k % 9,
+            "correct": (k * 7) % (2 + k % 9),
+            "misconceptions": [f"误区-{k}"] if k % 4 == 0 else [],
+        }
+        for k in range(count)
+    ]
+
+
+def _irt_table() -> irt.IRTTable:
+    items = {f"q{k}": [0.6 + 0.2 * k, -1.0 + 0.5 * k] for k in range(5)}
+    return irt.IRTTable.from_json({"model": "2pl", "concepts": {"函数": {"items": items}}}, "golden")
+
+
+def _bkt_table() -> bkt.BKTTable:
+    data = {"columns": list(bkt.COLUMNS), "skills": {"skill-0": [0.3, 0.25, 0.95, 0.2, 0.15, 0.1, 100, 1000]}}
+    return bkt.BKTTable.from_json(data, "golden")
+
+
+@contextlib.contextmanager
+def _tables(irt_table: Optional[irt.IRTTable] = None, bkt_table: Optional[bkt.BKTTable] = None) -> Iterator[None]:
+    old_irt, old_bkt = irt.IRT_PARAMS.set(irt_table), bkt.BKT_PARAMS.set(bkt_table)
+    try:
+        yield
+    finally:
+        irt.IRT_PARAMS.set(old_irt)
+        bkt.BKT_PARAMS.set(old_bkt)
+
+
+def golden_cases() -> List[Tuple[str, str, Dict[str, Any], str]]:
+    """(名称, 路径, 请求体, 参数表)；按顺序执行，后面的请求会读到前面写入的掌握度与情绪记录。"""
+    return [
+        # ---- /diagnose ----
+        ("diagnose/basic", "/diagnose", {
+            "request_id": "g-1", "student_id": "golden", "subject": "函数",
+            "concept_snapshots": [
+                {"concept_name": "函数", "attempts": 10, "correct": 9},
+                {"concept_name": "极限", "attempts": 8, "correct": 4, "misconceptions": ["无穷小"]},
+                {"concept_name": "导数", "attempts": 6, "correct": 1},
+            ],
+            "recent_behaviors": ["频繁回看", "提交前犹豫"],
+        }, ""),
+        ("diagnose/all-or-nothing", "/diagnose", {
+            "student_id": "golden-2", "subject": "代数",
+            "concept_snapshots": [
+                {"concept_name": "全对", "attempts": 3, "correct": 3},
+                {"concept_name": "全错", "attempts": 3, "correct": 0},
+                {"concept_name": "超出", "attempts": 2, "correct": 5},
+            ],
+            "method": "rule",
+        }, ""),
+        ("diagnose/empty", "/diagnose", {"student_id": "golden-3", "subject": "空", "concept_snapshots": []}, ""),
+        ("diagnose/irt", "/diagnose", {
+            "student_id": "golden-irt", "subject": "函数",
+            "concept_snapshots": [
+                {"concept_name": "函数", "attempts": 5, "correct": 3, "item_responses": [
+                    {"item_id": "q0", "correct": True}, {"item_id": "q3", "correct": False},
+                    {"item_id": "未校准", "correct": True},
+                ]},
+                {"concept_name": "函数", "attempts": 4, "correct": 4},
+                {"concept_name": "未校准概念", "attempts": 4, "correct": 1},
+            ],
+        }, "irt"),
+        ("diagnose/many", "/diagnose", {"student_id": "golden-many", "subject": "大", "concept_snapshots": _snapshots(200)}, ""),
+        ("diagnose/invalid", "/diagnose", {"student_id": "x", "subject": "y", "concept_snapshots": [{"concept_name": "z", "attempts": 0, "correct": 0}]}, ""),
+        # ---- /track ----
+        ("track/basic", "/track", {
+            "request_id": "g-2", "student_id": "golden",
+            "interactions": [
+                {"skill": "函数", "correct": True},
+                {"skill": "函数", "correct": True, "confidence": 0.9},
+                {"skill": "极限", "correct": False, "time_spent_seconds": 400},
+                {"skill": "导数", "correct": False, "confidence": 0.0},
+            ],
+            "prior_mastery": {"极限": 0.2, "积分": 1.0},
+        }, ""),
+        ("track/empty", "/track", {"student_id": "golden-empty", "interactions": []}, ""),
+        ("track/prior-only", "/track", {"student_id": "golden-prior", "interactions": [], "prior_mastery": {"a": 0, "b": 1, "c": 0.12345}}, ""),
+        ("track/hundreds", "/track", {"student_id": "golden-big", "interactions": _golden_interactions(3000, 300, 5)}, ""),
+        ("track/incremental-1", "/track", {
+            "student_id": "golden-inc", "incremental": True,
+            "interactions": [{"skill": "a", "correct": True, "seq": 0}, {"skill": "b", "correct": False, "seq": 1}],
+        }, ""),
+        ("track/incremental-2", "/track", {
+            "student_id": "golden-inc", "incremental": True,
+            "interactions": [{"skill": "a", "correct": True, "seq": 1}, {"skill": "a", "correct": False, "seq": 2}],
+        }, ""),
+        ("track/bkt", "/track", {
+            "student_id": "golden-bkt",
+            "interactions": [{"skill": "skill-0", "correct": False}, {"skill": "skill-9", "correct": True}],
+        }, "bkt"),
+        ("track/invalid", "/track", {"student_id": "x", "interactions": [{"skill": "a", "correct": True, "confidence": 2}]}, ""),
+        # ---- /emotion ----
+        ("emotion/frustration", "/emotion", {
+            "request_id": "g-3", "student_id": "golden", "current_task": "链式法则",
+            "affective_signals": [
+                {"channel": "text", "emotion": "Frustration", "intensity": 0.7},
+                {"channel": "face", "emotion": "confident", "intensity": 0.3},
+                {"channel": "face", "emotion": "frustration", "intensity": 0.2},
+            ],
+            "recent_performance": "连续两题出错",
+        }, ""),
+        ("emotion/no-signals", "/emotion", {"student_id": "golden-calm", "current_task": "复习", "affective_signals": []}, ""),
+        ("emotion/zero-intensity", "/emotion", {
+            "student_id": "golden-zero", "current_task": "练习",
+            "affective_signals": [{"channel": "text", "emotion": "bored", "intensity": 0.0}],
+        }, ""),
+        ("emotion/odd-text", "/emotion", {
+            "student_id": ODD_TEXT, "current_task": ODD_TEXT, "affective_signals": [], "recent_performance": ODD_TEXT,
+        }, ""),
+        ("emotion/sentiment", "/emotion/sentiment", {"request_id": "g-4", "text": "老师讲得很清晰，我很喜欢，但是最后一题好难"}, ""),
+        ("emotion/sentiment-neutral", "/emotion/sentiment", {"text": ""}, ""),
+        ("emotion/sentiment-batch", "/emotion/sentiment/batch", {
+            "texts": ["讲得很清晰", "太难了，完全不懂", "", ODD_TEXT, "好难好难好难，喜欢"],
+        }, ""),
+        ("emotion/sentiment-batch-empty", "/emotion/sentiment/batch", {"texts": []}, ""),
+        ("emotion/summary-empty", "/emotion/summary", {"student_id": "golden-nobody", "window_seconds": 60}, ""),
+        ("emotion/summary-tiny-window", "/emotion/summary", {"student_id": "golden-nobody", "window_seconds": 0.00005}, ""),
+        # ---- /plan ----
+        ("plan/mastery", "/plan", {"request_id": "g-5", "mastery": {"函数": 0.9, "极限": 0.4, "未知概念": 0.1}}, ""),
+        ("plan/empty", "/plan", {"mastery": {}}, ""),
+        ("plan/student", "/plan", {"student_id": "golden", "mastery": {}, "max_recommend": 2}, ""),
+        ("plan/threshold-zero", "/plan", {"mastery": {"函数": 0.0}, "threshold": 0.0}, ""),
+        ("plan/unknown-subject", "/plan", {"mastery": {"函数": 0.5}, "subject": "不存在的学科"}, ""),
+        ("plan/batch", "/plan/batch", {
+            "students": [
+                {"student_id": "s1", "mastery": {"函数": 0.9}},
+                {"student_id": "golden"},
+                {"mastery": {}},
+                {"student_id": None, "mastery": {"极限": 0.95, "导数": 0.3}},
+            ],
+            "max_recommend": 3,
+        }, ""),
+        ("plan/batch-empty", "/plan/batch", {"students": []}, ""),
+        # ---- /step ----
+        ("step/full", "/step", {
+            "request_id": "g-6", "student_id": "golden-step", "subject": "函数",
+            "interactions": [{"skill": "函数", "correct": True}, {"skill": "极限", "correct": False}],
+            "concept_snapshots": [{"concept_name": "导数", "attempts": 5, "correct": 2}],
+            "current_task": "求导", "affective_signals": [{"channel": "text", "emotion": "anxious", "intensity": 0.6}],
+            "threshold": 0.8, "max_recommend": 3,
+        }, ""),
+        ("step/minimal", "/step", {"student_id": "golden-step-2"}, ""),
+        ("step/trained", "/step", {
+            "student_id": "golden-step-3", "subject": "函数",
+            "interactions": [{"skill": "skill-0", "correct": True}],
+            "concept_snapshots": [{"concept_name": "函数", "attempts": 3, "correct": 2}],
+        }, "irt+bkt"),
+    ]
+
+
+def capture(client: TestClient) -> Dict[str, Dict[str, Any]]:
+    tables = {"": {}, "irt": {"irt_table": _irt_table()}, "bkt": {"bkt_table": _bkt_table()}}
+    tables["irt+bkt"] = {**tables["irt"], **tables["bkt"]}
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, path, body, table in golden_cases():
+        with _tables(**tables[table]):
+            response = client.post(path, json=body)
+        results[name] = {"status": response.status_code, "body": response.content.decode("utf-8")}
+    return results
+
+
+def check_golden(client: TestClient, update: bool) -> None:
+    results = capture(client)
+    if update:
+        os.makedirs(os.path.dirname(GOLDEN_PATH), exist_ok=True)
+        with open(GOLDEN_PATH, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=1)
+            f.write("\n")
+        print(f"已写入 {len(results)} 条金标准响应：{GOLDEN_PATH}")
+        return
+    with open(GOLDEN_PATH, encoding="utf-8") as f:
+        golden = json.load(f)
+    assert list(results) == list(golden), "金标准用例与文件不一致，需要 --update"
+    for name, expected in golden.items():
+        got = results[name]
+        if name in FLOAT_FORMAT_CASES:
+            assert got["status"] == expected["status"] and json.loads(got["body"]) == json.loads(expected["body"]), name
+        else:
+            assert got == expected, (name, got, expected)
+    print(f"金标准校验通过：{len(golden)} 条请求的状态码一致，响应字节相同（{len(FLOAT_FORMAT_CASES)} 条按解析后的值比较）。")
+
+
+def _route(path: str) -> APIRoute:
+    return next(route for route in app.routes if isinstance(route, APIRoute) and route.path == path)
+
+
+async def _default_body(route: APIRoute, model: BaseModel) -> bytes:
+    """FastAPI 默认路径：按 response_model 重新校验、转成 JSON 兼容对象，再由 JSONResponse 编码。"""
+    content = await serialize_response(field=route.secure_cloned_response_field, response_content=model)
+    return JSONResponse(content).body
+
+
+def _model_arg(annotation: Any) -> Optional[type]:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    for arg in typing.get_args(annotation):
+        found = _model_arg(arg)
+        if found is not None:
+            return found
+    return None
+
+
+def rebuild(cls: type, data: Dict[str, Any], trusted: bool) -> BaseModel:
+    """按 ``model_dump()`` 的结果逐层重建响应，模拟模型层逐个构造对象：构造函数（校验） vs ``model_construct``。"""
+    fields = {}
+    for name, value in data.items():
+        sub = _model_arg(cls.model_fields[name].annotation)
+        if sub is not None and value is not None:
+            value = [rebuild(sub, v, trusted) for v in value] if isinstance(value, list) else rebuild(sub, value, trusted)
+        fields[name] = value
+    return cls.model_construct(**fields) if trusted else cls(**fields)
+
+
+def endpoint_responses(size: int) -> List[Tuple[str, str, BaseModel]]:
+    """(接口, 路由路径, 模型层直接返回的响应)，响应的规模随 ``size`` 增长。"""
+    student = f"ser-{size}"
+    trace = knowledge_tracking.trace(
+        KnowledgeTracingRequest(student_id=student, interactions=_interactions(3 * size, size, size))
+    )
+    diagnosis = cognitive_diagnosis.diagnose(
+        CognitiveDiagnosisRequest(student_id=student, subject="序列化", concept_snapshots=_snapshots(size))
+    )
+    texts = [f"第{k}条：讲得很清晰" if k % 3 else f"第{k}条：太难了，不懂" for k in range(size)]
+    sentiment = emotion_analysis.analyze_sentiment_batch(SentimentBatchRequest(texts=texts))
+    students = [{"student_id": f"{student}-{k}", "mastery": {"外测度": (k % 10) / 10}} for k in range(size)]
+    plans = cohort_planning.plan_batch(PathBatchRequest(students=students))
+    signals = [{"channel": "text", "emotion": ("frustration", "bored", "积极")[k % 3], "intensity": 0.5} for k in range(size)]
+    affect = emotion_analysis.analyze_affective_state(
+        AffectiveAnalysisRequest(student_id=student, current_task="证明", affective_signals=signals)
+    )
+    summary = emotion_analysis.summarize_affect(AffectSummaryRequest(student_id=student, window_seconds=600))
+    step = tutor_step.step(
+        TutorStepRequest(
+            student_id=student,
+            subject="序列化",
+            interactions=_interactions(3 * size, size, size + 1),
+            concept_snapshots=_snapshots(size),
+            current_task="证明",
+        )
+    )
+    return [
+        ("trace", "/track", trace),
+        ("diagnose", "/diagnose", diagnosis),
+        ("sentiment_batch", "/emotion/sentiment/batch", sentiment),
+        ("plan_batch", "/plan/batch", plans),
+        ("affective", "/emotion", affect),
+        ("affect_summary", "/emotion/summary", summary),
+        ("step", "/step", step),
+    ]
+
+
+def check_paths() -> None:
+    count = 0
+    for size in (1, 7, 300):
+        for name, path, model in endpoint_responses(size):
+            route = _route(path)
+            fast = ModelJSONResponse(model).body
+            assert fast == asyncio.run(_default_body(route, model)), (name, size)
+            count += 1
+    print(f"路径对比通过：{count} 个响应经快速路径与默认路径写出的字节相同。")
+
+
+def timed(fn, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--update", action="store_true", help="按当前代码重新生成金标准文件")
+    parser.add_argument("--sizes", default="10,100,1000", help="响应规模列表（技能/概念/文本/学生数）")
+    parser.add_argument("--budget", type=float, default=0.2, help="每个格子的大致计时秒数")
+    args = parser.parse_args()
+
+    with TestClient(app) as client:
+        check_golden(client, args.update)
+    if args.update:
+        return
+    check_paths()
+
+    loop = asyncio.new_event_loop()
+    print(
+        f"{'endpoint':<16} {'size':>5} {'bytes':>8} {'ctor(us)':>9} {'construct(us)':>14}"
+        f" {'default(us)':>12} {'fast(us)':>9} {'speedup':>8}"
+    )
+    for size in (int(n) for n in args.sizes.split(",")):
+        for name, path, model in endpoint_responses(size):
+            route = _route(path)
+            cls = type(model)
+            data = model.model_dump()
+            probe = timed(lambda: loop.run_until_complete(_default_body(route, model)), 3)
+            rounds = max(3, int(args.budget * 1e6 / max(probe, 1.0)))
+            # 构造：逐层用构造函数 vs model_construct
+            validate = timed(lambda: rebuild(cls, data, False), rounds)
+            construct = timed(lambda: rebuild(cls, data, True), rounds)
+            default = timed(lambda: loop.run_until_complete(_default_body(route, model)), rounds)
+            fast = timed(lambda: ModelJSONResponse(model), rounds)
+            nbytes = len(ModelJSONResponse(model).body)
+            print(
+                f"{name:<16} {size:>5} {nbytes:>8} {validate:>9.1f} {construct:>14.1f}"
+                f" {default:>12.1f} {fast:>9.1f} {default / fast:>7.1f}x"
+            )
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""文本情感词表基准：Aho-Corasick 单遍扫描 vs 逐词 ``word in text``。
+
+- 一致性校验：随机词表（含重叠、包含关系、两表共有的词条）与随机文本上，自动机的命中计数
+  与逐词子串判断完全相同；内置词表上 ``_simple_score`` 与原实现逐位相等；
+- 接口校验：/emotion/sentiment/batch 与逐条 /emotion/sentiment 的结果一致；
+- 对比不同词表规模、文本长度下两种方式的吞吐（texts/s），以及 ``count_hits`` 按 ``SCAN_LIMIT`` 选路后的实际吞吐。
+
+运行：python -m benchmarks.sentiment_lexicon --sizes 11,1000,5000,20000 --lengths 50,2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import Dict, Iterable, List, Tuple
+
+from models import emotion_analysis, lexicon as lexicon_module
+from models.lexicon import Lexicon
+
+# 文本与词条共用的小字母表，保证大量部分匹配、失配回退与重叠命中
+_ALPHABET = "我不会懂好难太棒了喜欢清楚明白差糟生气的题目。，"
+
+
+def naive_hits(positive: Iterable[str], negative: Iterable[str], text: str) -> Tuple[int, int]:
+    return sum(word in text for word in positive), sum(word in text for word in negative)
+
+
+def naive_score(text: str) -> Dict[str, float]:
+    """改造前的 ``_simple_score``，作为对照。"""
+    pos_hits, neg_hits = naive_hits(emotion_analysis.POSITIVE_WORDS, emotion_analysis.NEGATIVE_WORDS, text)
+    total = pos_hits + neg_hits
+    if total == 0:
+        return {"负面": 0.2, "中性": 0.6, "正面": 0.2}
+    pos_prob = pos_hits / total
+    neg_prob = neg_hits / total
+    return {
+        "负面": round(0.1 + 0.8 * neg_prob, 3),
+        "中性": 0.1,
+        "正面": round(0.1 + 0.8 * pos_prob, 3),
+    }
+
+
+def ac_hits(lexicon: Lexicon, text: str) -> Tuple[int, int]:
+    """强制走自动机（忽略 SCAN_LIMIT）的命中计数。"""
+    limit = lexicon_module.SCAN_LIMIT
+    lexicon_module.SCAN_LIMIT = -1
+    try:
+        return lexicon.count_hits(text)
+    finally:
+        lexicon_module.SCAN_LIMIT = limit
+
+
+def random_words(rng: random.Random, count: int, max_len: int) -> List[str]:
+    return ["".join(rng.choices(_ALPHABET, k=rng.randint(1, max_len))) for _ in range(count)]
+
+
+def random_text(rng: random.Random, length: int, vocabulary: List[str]) -> str:
+    parts: List[str] = []
+    size = 0
+    while size < length:
+        part = rng.choice(vocabulary) if vocabulary and rng.random() < 0.3 else rng.choice(_ALPHABET)
+        parts.append(part)
+        size += len(part)
+    return "".join(parts)[:length]
+
+
+def check_identity(trials: int, seed: int) -> None:
+    rng = random.Random(seed)
+    for trial in range(trials):
+        positive = random_words(rng, rng.randint(0, 40), rng.randint(1, 6))
+        negative = random_words(rng, rng.randint(0, 40), rng.randint(1, 6)) + rng.sample(positive, len(positive) // 4)
+        lexicon = Lexicon(positive, negative)
+        matcher = lexicon._matcher
+        vocabulary = positive + negative
+        for _ in range(10):
+            text = random_text(rng, rng.randint(0, 200), vocabulary)
+            # 小词表走逐词判断，这里直接校验自动机本身
+            assert matcher.distinct_matches(text) == {i for i, p in enumerate(matcher.patterns) if p in text}, text
+            assert ac_hits(lexicon, text) == naive_hits(set(positive), set(negative), text), (trial, text)
+
+    builtin = sorted(emotion_analysis.POSITIVE_WORDS | emotion_analysis.NEGATIVE_WORDS)
+    for _ in range(trials * 10):
+        text = random_text(rng, rng.randint(0, 120), builtin)
+        assert emotion_analysis._simple_score(text) == naive_score(text), text
+
+
+def check_endpoint() -> None:
+    from fastapi.testclient import TestClient
+
+    from main import app
+
+    client = TestClient(app)
+    texts = ["这题太难了，我不懂", "讲得很清楚，喜欢", "", "今天天气不错", "好难但是明白了"]
+    batch = client.post("/emotion/sentiment/batch", json={"texts": texts}).json()
+    assert len(batch["results"]) == len(texts)
+    for text, result in zip(texts, batch["results"]):
+        single = client.post("/emotion/sentiment", json={"text": text}).json()
+        assert result["probabilities"] == single["probabilities"] and result["label"] == single["label"], text
+    assert batch["model_version"] == single["model_version"]
+
+
+def throughput(fn, texts: List[str]) -> float:
+    start = time.perf_counter()
+    for text in texts:
+        fn(text)
+    elapsed = time.perf_counter() - start
+    return len(texts) / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="11,1000,5000,20000", help="词表词条数（正负各半；11 即内置规模）")
+    parser.add_argument("--lengths", default="50,2000", help="文本长度（字符）")
+    parser.add_argument("--texts", type=int, default=200, help="每组测量的文本数")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    check_identity(trials=200, seed=args.seed)
+    print("一致性校验通过：随机词表/文本上命中计数与逐词子串判断相同，内置词表打分与原实现一致。")
+    check_endpoint()
+    print("接口校验通过：/emotion/sentiment/batch 与逐条 /emotion/sentiment 结果一致。")
+
+    rng = random.Random(args.seed)
+    print(f"{'lexicon':>8} {'text_len':>9} {'build(ms)':>10} {'naive(t/s)':>11} {'ac(t/s)':>10} {'speedup':>8} {'count_hits':>12}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        positive = random_words(rng, size // 2, 4)
+        negative = random_words(rng, size - size // 2, 4)
+        start = time.perf_counter()
+        lexicon = Lexicon(positive, negative)
+        build_ms = (time.perf_counter() - start) * 1e3
+        pos_set, neg_set = set(positive), set(negative)
+        for length in (int(n) for n in args.lengths.split(",")):
+            texts = [random_text(rng, length, positive + negative) for _ in range(args.texts)]
+            naive = throughput(lambda text: naive_hits(pos_set, neg_set, text), texts)
+            ac = throughput(lexicon._matcher.distinct_matches, texts)
+            used = throughput(lexicon.count_hits, texts)
+            print(
+                f"{size:>8} {length:>9} {build_ms:>10.1f} {naive:>11.0f} {ac:>10.0f} {ac / naive:>7.1f}x"
+                f" {used:>12.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
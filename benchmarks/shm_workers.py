@@ -0,0 +1,140 @@
+"""共享内存存储的多进程扩展性基准，并校验跨进程读-改-写不丢更新。
+
+每个 worker 进程独立挂载同一个共享段（与 ``python main.py --workers N`` 的 uvicorn worker 相同），
+混合执行 set_mastery / update_mastery / dump_mastery。
+另校验同一进程内多线程（FastAPI 线程池）首次查询别的进程登记的学生时，本地名字表不会错位。
+
+运行：python -m benchmarks.shm_workers --workers 1 2 4 8 --ops 50000
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing as mp
+import os
+import random
+import sys
+import threading
+import time
+
+from storage.shm import CapacityError, SharedMemoryBackend
+
+
+def _worker(name: str, index: int, ops: int, start_evt, check_rounds: int) -> None:
+    store = SharedMemoryBackend(name)
+    try:
+        start_evt.wait()
+        for i in range(ops):
+            student_id = f"s{index}-{i % 200}"
+            store.set_mastery(student_id, f"c{i % 24}", (i % 100) / 100)
+            if i % 4 == 0:
+                store.dump_mastery(student_id)
+        for _ in range(check_rounds):
+            store.update_mastery("shared", "counter", 1)
+    finally:
+        store.close()
+
+
+def check_threaded_lookup(students: int = 5000, threads: int = 8) -> None:
+    """新挂载的后端本地名字表为空，多个线程同时未命中并扫描表尾时，每个学生仍只读到自己的行。"""
+    name = f"edu-threads-{os.getpid()}"
+    owner = SharedMemoryBackend(name, max_students=students + 10, max_concepts=students + 10)
+    attached = None
+    switch = sys.getswitchinterval()
+    try:
+        for k in range(students):
+            owner.set_mastery(f"s{k}", "c", 0.5)
+            owner.set_mastery(f"s{k}", f"only-{k}", k % 4 / 4)
+        attached = SharedMemoryBackend(name)
+        order = [f"s{k}" for k in range(students)]
+        errors = []
+        barrier = threading.Barrier(threads)
+
+        def work(seed: int) -> None:
+            ids = order[:]
+            random.Random(seed).shuffle(ids)
+            barrier.wait()
+            for student_id in ids:
+                if attached.find_student(student_id) is None:
+                    errors.append((student_id, None))
+
+        sys.setswitchinterval(1e-6)  # 提高线程切换频率，更容易暴露竞态
+        pool = [threading.Thread(target=work, args=(i,)) for i in range(threads)]
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        sys.setswitchinterval(switch)
+        assert not errors, f"{len(errors)} 个已登记学生查不到"
+        assert len(attached._students.names()) == students, f"本地名字表 {len(attached._students.names())} 项"
+        for k in range(students):
+            expected = {"c": 0.5, f"only-{k}": k % 4 / 4}
+            got = attached.dump_mastery(f"s{k}")
+            assert got == expected, (k, got)
+    finally:
+        sys.setswitchinterval(switch)
+        if attached is not None:
+            attached.close()
+        owner.close()
+
+
+def check_capacity() -> None:
+    """URL 参数决定容量，超出时抛 CapacityError 而不是裸 RuntimeError。"""
+    store = SharedMemoryBackend.from_url(f"edu-cap-{os.getpid()}?students=2&concepts=1")
+    try:
+        assert (store.max_students, store.max_concepts) == (2, 1)
+        store.set_mastery("a", "c", 0.5)
+        store.set_mastery("b", "c", 0.5)
+        for student_id, concept in (("x", "c"), ("a", "d")):
+            try:
+                store.set_mastery(student_id, concept, 0.5)
+            except CapacityError:
+                pass
+            else:
+                raise AssertionError(f"超出容量未报错: {student_id}/{concept}")
+    finally:
+        store.close()
+
+
+def run(workers: int, ops: int) -> float:
+    name = f"edu-bench-{os.getpid()}-{workers}"
+    owner = SharedMemoryBackend(name, max_students=workers * 200 + 10, max_concepts=32)
+    check_rounds = 100 // workers
+    ctx = mp.get_context("spawn")
+    start_evt = ctx.Event()
+    procs = [ctx.Process(target=_worker, args=(name, i, ops, start_evt, check_rounds)) for i in range(workers)]
+    try:
+        for p in procs:
+            p.start()
+        time.sleep(0.5)  # 等各进程完成导入与挂载
+        began = time.perf_counter()
+        start_evt.set()
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - began
+        counter = owner.dump_mastery("shared")["counter"]
+        assert counter == workers * check_rounds / 100, f"跨进程丢失更新：{counter}"
+    finally:
+        owner.close()
+    return workers * ops / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--ops", type=int, default=50000)
+    args = parser.parse_args()
+
+    check_threaded_lookup()
+    check_capacity()
+    print("多线程校验通过：并发首次查询时各学生读到的都是自己的掌握度。")
+    print(f"{'workers':>8} {'ops/s':>12} {'speedup':>8}")
+    base = None
+    for count in args.workers:
+        rate = run(count, args.ops)
+        base = base or rate
+        print(f"{count:>8} {rate:>12.0f} {rate / base:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""MCP 冷启动基准：``import mcp_server`` 的导入预算，以及 stdio 下从拉起进程到拿到工具列表、首次调用的耗时。
+
+- 导入预算（``python -X importtime``）：导入 ``mcp_server`` 不得带入 FastAPI、NumPy、路由、模型与存储模块；
+  除 FastMCP 本身以外的导入耗时（``mcp_server`` 的累计时间减去 ``mcp.server.fastmcp``）不超过 ``--budget-ms``，
+  超出即失败；
+- 端到端：按 MCP 协议经 stdio 发 initialize、tools/list、tools/call，对比 lazy（工具缓存有效）、
+  lazy（无缓存，需构建一次应用）与 eager 三种启动方式；各方式的工具列表与首次调用结果一致。
+
+运行：python -m benchmarks.startup_time --runs 5 --budget-ms 80
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("fastapi", "numpy", "main", "models", "routers", "storage", "database", "schemas", "sqlite3")
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+TRACE = {"student_id": "startup", "interactions": [{"skill": "函数", "correct": True}, {"skill": "极限", "correct": False}]}
+
+
+def importtime(module: str) -> Dict[str, int]:
+    """子进程里 ``python -X importtime -c "import <module>"``，返回 {模块名: 累计微秒}。"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative: Dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            cumulative[match.group(4)] = int(match.group(2))
+    return cumulative
+
+
+def check_budget(runs: int, budget_ms: float) -> None:
+    extra: List[float] = []
+    totals: List[float] = []
+    for _ in range(runs):
+        modules = importtime("mcp_server")
+        heavy = sorted({name for name in modules if name.split(".")[0] in HEAVY})
+        assert not heavy, f"导入 mcp_server 带入了重模块: {heavy[:10]}"
+        totals.append(modules["mcp_server"] / 1000)
+        extra.append((modules["mcp_server"] - modules["mcp.server.fastmcp"]) / 1000)
+    best = min(extra)
+    print(f"导入 mcp_server：累计 {min(totals):.0f}ms，其中 FastMCP 以外 {best:.1f}ms（预算 {budget_ms:.0f}ms）")
+    assert best <= budget_ms, f"冷启动导入超出预算：{best:.1f}ms > {budget_ms:.0f}ms"
+
+
+class StdioSession:
+    """按行收发 JSON-RPC 的 MCP stdio 客户端（只够基准用）。"""
+
+    def __init__(self, args: List[str], env: Dict[str, str]) -> None:
+        self.start = time.perf_counter()
+        self.proc = subprocess.Popen(
+            [sys.executable, "mcp_server.py", *args],
+            cwd=ROOT,
+            env=env,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+        )
+        self._next_id = 0
+
+    def request(self, method: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        self._next_id += 1
+        self._send({"jsonrpc": "2.0", "id": self._next_id, "method": method, "params": params or {}})
+        while True:
+            line = self.proc.stdout.readline()
+            if not line:
+                raise RuntimeError(f"MCP 进程提前退出（{method}）")
+            message = json.loads(line)
+            if message.get("id") == self._next_id:
+                if "error" in message:
+                    raise RuntimeError(message["error"])
+                return message["result"]
+
+    def notify(self, method: str) -> None:
+        self._send({"jsonrpc": "2.0", "method": method})
+
+    def _send(self, message: Dict[str, Any]) -> None:
+        self.proc.stdin.write(json.dumps(message, ensure_ascii=False) + "\n")
+        self.proc.stdin.flush()
+
+    def close(self) -> None:
+        self.proc.stdin.close()
+        try:
+            self.proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+
+
+def run_session(startup: str, cache: str) -> Tuple[float, float, float, List[str], Any]:
+    """返回 (initialize, tools/list, 首次 tools/call 的完成时刻毫秒, 工具名, trace 结果)。"""
+    env = {**os.environ, "EDU_MCP_TOOLS": cache, "EDU_STORE": "memory"}
+    session = StdioSession(["--startup", startup, "--no-http"], env)
+    try:
+        session.request(
+            "initialize",
+            {"protocolVersion": "2025-06-18", "capabilities": {}, "clientInfo": {"name": "bench", "version": "0"}},
+        )
+        ready = (time.perf_counter() - session.start) * 1000
+        session.notify("notifications/initialized")
+        tools = [tool["name"] for tool in session.request("tools/list")["tools"]]
+        listed = (time.perf_counter() - session.start) * 1000
+        result = session.request("tools/call", {"name": "trace", "arguments": {"payload": TRACE}})
+        called = (time.perf_counter() - session.start) * 1000
+    finally:
+        session.close()
+    content = result.get("structuredContent") or json.loads(result["content"][0]["text"])
+    return ready, listed, called, tools, content
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5, help="每种方式重复次数（取最小值）")
+    parser.add_argument("--budget-ms", type=float, default=80.0, help="FastMCP 以外的导入耗时上限")
+    args = parser.parse_args()
+
+    check_budget(args.runs, args.budget_ms)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = os.path.join(tmp, "mcp_tools.json")
+        modes = [("lazy (无缓存)", "lazy", True), ("lazy (有缓存)", "lazy", False), ("eager", "eager", False)]
+        print(f"{'startup':<14} {'initialize(ms)':>15} {'tools/list(ms)':>15} {'first call(ms)':>15}")
+        reference = None
+        for label, startup, cold in modes:
+            rows = []
+            for _ in range(args.runs):
+                if cold and os.path.exists(cache):
+                    os.remove(cache)
+                rows.append(run_session(startup, cache))
+            ready, listed, called = (min(row[k] for row in rows) for k in range(3))
+            tools, content = rows[0][3], rows[0][4]
+            assert os.path.exists(cache), "第一次启动后应写出工具缓存"
+            observed = (tools, {key: value for key, value in content.items() if key != "request_id"})
+            assert reference is None or observed == reference, (label, observed, reference)
+            reference = observed
+            print(f"{label:<14} {ready:>15.0f} {listed:>15.0f} {called:>15.0f}")
+        print(f"三种启动方式的工具列表（{len(reference[0])} 个）与首次 trace 结果一致。")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""存储后端写入基准：memory / sqlite 写回批量 / sqlite 同步提交 的吞吐与 p99 延迟。
+
+另校验写回 flusher 在落盘失败（库被其他连接锁住）时存活并在锁释放后补写。
+
+运行：python -m benchmarks.store_backends --writes 20000 --threads 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List
+
+from storage import MemoryBackend, SQLiteBackend, StoreBackend
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def bench(backend: StoreBackend, writes: int, threads: int, students: int) -> Dict[str, float]:
+    per_thread = writes // threads
+    latencies: List[List[float]] = [[] for _ in range(threads)]
+
+    def work(index: int) -> None:
+        out = latencies[index]
+        for i in range(per_thread):
+            student_id = f"s{(index * per_thread + i) % students}"
+            start = time.perf_counter()
+            # 模拟 trace/diagnose：每次请求按概念逐个 set_mastery
+            backend.set_mastery(student_id, f"c{i % 24}", (i % 100) / 100)
+            out.append((time.perf_counter() - start) * 1e6)
+
+    workers = [threading.Thread(target=work, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+    backend.flush()
+    durable = time.perf_counter() - start
+    samples = [x for row in latencies for x in row]
+    return {
+        "ops_per_s": per_thread * threads / elapsed,
+        "durable_ops_per_s": per_thread * threads / durable,
+        "p50_us": _percentile(samples, 0.5),
+        "p99_us": _percentile(samples, 0.99),
+    }
+
+
+def check_flush_retry(tmp: str) -> None:
+    path = os.path.join(tmp, "locked.db")
+    backend = SQLiteBackend(path, flush_interval=0.05)
+    backend._writer.execute("PRAGMA busy_timeout = 50")  # 库被锁时快速失败
+    blocker = sqlite3.connect(path, isolation_level=None)
+    logging.getLogger("storage.sqlite").disabled = True  # 预期中的重试日志
+    try:
+        blocker.execute("BEGIN EXCLUSIVE")
+        backend.set_mastery("locked", "极限", 0.42)
+        time.sleep(0.5)  # flusher 在此期间多次失败并退避
+        assert backend._flusher.is_alive(), "落盘失败后 flusher 线程退出了"
+        blocker.execute("ROLLBACK")
+        deadline = time.perf_counter() + 10
+        query = "SELECT level FROM mastery WHERE student_id = 'locked'"
+        while not blocker.execute(query).fetchall():
+            assert time.perf_counter() < deadline, "锁释放后写入没有落盘"
+            time.sleep(0.05)
+    finally:
+        logging.getLogger("storage.sqlite").disabled = False
+        blocker.close()
+        backend.close()
+    print("落盘重试校验通过：库被锁期间 flusher 退避重试，锁释放后写入落盘。")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--writes", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--sync-writes", type=int, default=2000, help="同步提交太慢，单独限制写入数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        check_flush_retry(tmp)
+        factories: Dict[str, Callable[[], StoreBackend]] = {
+            "memory": MemoryBackend,
+            "sqlite-write-behind": lambda: SQLiteBackend(os.path.join(tmp, "wb.db")),
+            "sqlite-sync": lambda: SQLiteBackend(os.path.join(tmp, "sync.db"), write_behind=False),
+        }
+        print(f"{'backend':<22} {'writes':>7} {'ops/s':>10} {'durable/s':>10} {'p50(us)':>9} {'p99(us)':>9}")
+        for name, factory in factories.items():
+            writes = args.sync_writes if name == "sqlite-sync" else args.writes
+            backend = factory()
+            try:
+                r = bench(backend, writes, args.threads, args.students)
+            finally:
+                backend.close()
+            print(
+                f"{name:<22} {writes:>7} {r['ops_per_s']:>10.0f} {r['durable_ops_per_s']:>10.0f} "
+                f"{r['p50_us']:>9.1f} {r['p99_us']:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
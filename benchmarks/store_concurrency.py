@@ -0,0 +1,97 @@
+"""database 并发压测：多线程读-改-写不丢更新、不重复建学生，并测吞吐随线程数变化。
+
+运行：python -m benchmarks.store_concurrency --threads 1 2 4 8 16 --ops 20000
+校验失败时抛 AssertionError（非零退出），可直接作为回归检查。
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import threading
+import time
+from typing import Callable, List
+
+import database
+from benchmarks import generators
+
+
+def _run_threads(count: int, target: Callable[[int], None]) -> float:
+    barrier = threading.Barrier(count)
+
+    def runner(index: int) -> None:
+        barrier.wait()
+        target(index)
+
+    threads = [threading.Thread(target=runner, args=(i,)) for i in range(count)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start
+
+
+def check_no_lost_updates(threads: int, concepts: int = 50) -> None:
+    """所有线程对同一个学生的同一批概念做 +1，最终值必须等于总增量（不触发 100 的上限）。"""
+    student_id = f"hot-{threads}"
+    reps = 100 // threads
+    names = generators.skill_names(concepts)
+
+    def work(_: int) -> None:
+        for _ in range(reps):
+            for name in names:
+                database.update_mastery(student_id, name, 1)
+
+    _run_threads(threads, work)
+    expected = threads * reps / 100
+    mastery = database.dump_mastery(student_id)
+    lost = {c: v for c, v in mastery.items() if v != expected}
+    assert len(mastery) == concepts and not lost, f"丢失更新: {len(lost)}/{concepts} 个概念不等于 {expected}"
+
+
+def check_single_creation(threads: int, students: int = 500) -> None:
+    """所有线程同时 get_student 同一批新 id，拿到的必须是同一个对象。"""
+    seen: List[List[int]] = [[] for _ in range(threads)]
+
+    def work(index: int) -> None:
+        seen[index] = [id(database.get_student(f"new-{threads}-{i}")) for i in range(students)]
+
+    _run_threads(threads, work)
+    assert all(row == seen[0] for row in seen), "同一 student_id 创建出了多个 Student"
+
+
+def throughput(threads: int, ops: int, shared: bool) -> float:
+    per_thread = max(1, ops // threads)
+    names = generators.skill_names(32)
+
+    def work(index: int) -> None:
+        student_id = "shared" if shared else f"own-{index}"
+        for i in range(per_thread):
+            database.set_mastery(student_id, names[i % 32], (i % 100) / 100)
+            if i % 4 == 0:
+                database.dump_mastery(student_id)
+
+    elapsed = _run_threads(threads, work)
+    return per_thread * threads / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--ops", type=int, default=20000)
+    args = parser.parse_args()
+    sys.setswitchinterval(1e-5)  # 提高线程切换频率，更容易暴露竞态
+
+    print(f"{'threads':>8} {'distinct ops/s':>16} {'shared ops/s':>14}")
+    for count in args.threads:
+        check_no_lost_updates(count)
+        check_single_creation(count)
+        distinct = throughput(count, args.ops, shared=False)
+        shared = throughput(count, args.ops, shared=True)
+        print(f"{count:>8} {distinct:>16.0f} {shared:>14.0f}")
+    print("一致性校验通过：无丢失更新、无重复 Student。")
+
+
+if __name__ == "__main__":
+    main()
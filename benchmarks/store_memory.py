@@ -0,0 +1,125 @@
+"""掌握度内存布局基准（tracemalloc）：旧版 dict[str, KnowledgeState] vs 紧凑 array('B') + 概念驻留。
+
+运行：python -m benchmarks.store_memory --students 100000 --concepts 24
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List
+
+from storage import MemoryBackend
+from storage.interning import CONCEPTS
+
+
+@dataclass
+class _LegacyKnowledgeState:
+    concept: str
+    mastery_level: int = 0
+
+
+@dataclass
+class _LegacyStudent:
+    id: str
+    name: str = ""
+    knowledge_states: Dict[str, _LegacyKnowledgeState] = field(default_factory=dict)
+    emotion_logs: List[object] = field(default_factory=list)
+
+
+def _concept(i: int) -> str:
+    # 每次请求解析 JSON 都会得到新的字符串对象，这里同样每次新建
+    return "".join(("概念", str(i)))
+
+
+def build_legacy(students: int, concepts: int, seed: int) -> Dict[str, _LegacyStudent]:
+    rng = random.Random(seed)
+    store: Dict[str, _LegacyStudent] = {}
+    for s in range(students):
+        student = _LegacyStudent(id=f"stu-{s}")
+        for c in rng.sample(range(concepts * 2), concepts):
+            name = _concept(c)
+            student.knowledge_states[name] = _LegacyKnowledgeState(concept=name, mastery_level=rng.randint(0, 100))
+        store[student.id] = student
+    return store
+
+
+def build_compact(students: int, concepts: int, seed: int) -> MemoryBackend:
+    rng = random.Random(seed)
+    backend = MemoryBackend()
+    for s in range(students):
+        student_id = f"stu-{s}"
+        for c in rng.sample(range(concepts * 2), concepts):
+            backend.set_mastery(student_id, _concept(c), rng.randint(0, 100) / 100)
+    return backend
+
+
+def check_late_concepts(vocabulary: int = 50_000) -> None:
+    """概念表已经很大时，只记录少数大编号概念的学生不应按全局 id 分配整行。"""
+    backend = MemoryBackend()
+    late = [f"late-{k}" for k in range(vocabulary)]
+    for name in late:
+        CONCEPTS.intern(name)
+    backend.set_mastery("sparse", late[-1], 0.9)
+    backend.set_mastery("sparse", late[vocabulary // 2], 0.3)
+    backend.set_mastery("sparse", late[-1], 0.5)
+    student = backend.get_student("sparse")
+    assert sys.getsizeof(student.levels) < 1024, f"稀疏学生占用 {sys.getsizeof(student.levels)} 字节"
+    assert backend.dump_mastery("sparse") == {late[-1]: 0.5, late[vocabulary // 2]: 0.3}
+    assert dict(student.iter_levels()) == {late[-1]: 50, late[vocabulary // 2]: 30}
+
+    # 小编号概念仍走稠密行
+    for k in range(24):
+        backend.set_mastery("dense", _concept(k), k / 100)
+    dense = backend.get_student("dense")
+    assert not isinstance(dense.levels, dict)
+    assert backend.dump_mastery("dense") == {_concept(k): k / 100 for k in range(24)}
+    print(f"大编号概念: 稀疏学生 {sys.getsizeof(student.levels)} 字节 / 全局概念表 {len(CONCEPTS)} 项")
+
+
+def measure(build: Callable[[], object]) -> tuple:
+    tracemalloc.start()
+    start = time.perf_counter()
+    obj = build()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, current, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--students", type=int, default=100_000)
+    parser.add_argument("--concepts", type=int, default=24, help="每个学生记录的概念数")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    legacy, legacy_bytes, _ = measure(lambda: build_legacy(args.students, args.concepts, args.seed))
+    sample = [f"stu-{i}" for i in range(0, args.students, max(1, args.students // 1000))]
+    start = time.perf_counter()
+    for sid in sample:
+        {c: ks.mastery_level / 100 for c, ks in legacy[sid].knowledge_states.items()}
+    legacy_dump = (time.perf_counter() - start) / len(sample) * 1e6
+    del legacy
+
+    compact, compact_bytes, _ = measure(lambda: build_compact(args.students, args.concepts, args.seed))
+    start = time.perf_counter()
+    for sid in sample:
+        compact.dump_mastery(sid)
+    compact_dump = (time.perf_counter() - start) / len(sample) * 1e6
+
+    mib = 1024 * 1024
+    print(f"{args.students} 名学生 × {args.concepts} 个概念")
+    print(f"{'layout':<10} {'MiB':>10} {'bytes/student':>14} {'dump(us)':>10}")
+    print(f"{'legacy':<10} {legacy_bytes / mib:>10.1f} {legacy_bytes / args.students:>14.0f} {legacy_dump:>10.2f}")
+    print(f"{'compact':<10} {compact_bytes / mib:>10.1f} {compact_bytes / args.students:>14.0f} {compact_dump:>10.2f}")
+    print(f"节省 {1 - compact_bytes / legacy_bytes:.0%}")
+    check_late_concepts()
+
+
+if __name__ == "__main__":
+    main()
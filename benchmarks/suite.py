@@ -0,0 +1,348 @@
+"""模型与存储的微基准套件：按输入规模计时，输出 JSON 结果与扩展曲线，并可与基线对比标出回退。
+
+覆盖 ``knowledge_tracking.trace``、``cognitive_diagnosis.diagnose``、``emotion_analysis._simple_score`` /
+``analyze_affective_state``、``path_planning.plan`` 以及 ``database`` 的读写函数；数据由 ``benchmarks.generators``
+按固定种子合成。每个（用例, 规模）重复 ``--repeat`` 轮，每轮循环到不少于 ``--min-time`` 秒，记录单次调用的
+最小值与中位数，并对最小值做 log-log 拟合给出扩展指数（1 ≈ 线性）。
+
+- 结果写入 ``--output``（JSON），曲线写到 ``--plots`` 目录（每个用例一张 SVG，不依赖绘图库）；
+- ``--compare`` 指定基线 JSON（之前某次的 ``--output``）：最小值慢于基线超过 ``--tolerance`` 记为回退，
+  有回退时以状态码 1 退出，可直接用作提交前的门槛；曲线上同时画出基线；
+- 存储用例每个规模使用全新的后端（``--store``，默认 memory，语法同 ``EDU_STORE``）。
+
+运行：python -m benchmarks.suite --output base.json
+      python -m benchmarks.suite --compare base.json --cases trace,plan
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+import database
+from benchmarks import generators
+from models import cognitive_diagnosis, emotion_analysis, knowledge_graph, knowledge_tracking, path_planning
+from schemas import AffectiveAnalysisRequest, CognitiveDiagnosisRequest, KnowledgeTracingRequest, PathRequest
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+@dataclass(frozen=True)
+class Case:
+    name: str
+    axis: str  # 横轴含义
+    sizes: Tuple[int, ...]
+    build: Callable[[int, int], Callable[[], Any]]  # (规模, 种子) -> 被计时的零参函数
+
+
+CASES: List[Case] = []
+
+
+def case(name: str, axis: str, sizes: Sequence[int]) -> Callable:
+    def register(build: Callable[[int, int], Callable[[], Any]]) -> Callable[[int, int], Callable[[], Any]]:
+        CASES.append(Case(name, axis, tuple(sizes), build))
+        return build
+
+    return register
+
+
+# ---- 模型 ----
+
+
+@case("trace", "交互条数", (10, 100, 1_000, 10_000, 100_000))
+def _trace(size: int, seed: int) -> Callable[[], Any]:
+    payload = KnowledgeTracingRequest(
+        student_id="bench", interactions=generators.interactions(size, max(5, size // 20), seed)
+    )
+    return lambda: knowledge_tracking.trace(payload)
+
+
+@case("diagnose", "概念数", (1, 10, 100, 1_000))
+def _diagnose(size: int, seed: int) -> Callable[[], Any]:
+    payload = CognitiveDiagnosisRequest(
+        student_id="bench", subject="数学", concept_snapshots=generators.snapshots(size, seed)
+    )
+    return lambda: cognitive_diagnosis.diagnose(payload)
+
+
+@case("sentiment_score", "文本长度（字）", (10, 100, 1_000, 10_000))
+def _sentiment_score(size: int, seed: int) -> Callable[[], Any]:
+    text = generators.text(size, seed)
+    emotion_analysis.current_lexicon()  # 词表编译不计入
+    return lambda: emotion_analysis._simple_score(text)
+
+
+@case("affective", "信号数", (1, 10, 100, 1_000))
+def _affective(size: int, seed: int) -> Callable[[], Any]:
+    payload = AffectiveAnalysisRequest(
+        student_id="bench", current_task="二次函数", affective_signals=generators.signals(size, seed)
+    )
+    return lambda: emotion_analysis.analyze_affective_state(payload)
+
+
+def _plan(size: int, seed: int, max_recommend: int) -> Callable[[], Any]:
+    adj = generators.curriculum(size, seed=seed)
+    knowledge_graph.set_graph(knowledge_graph.compile_graph(adj))  # 编译不计入，run_case 结束后恢复
+    payload = PathRequest(mastery=generators.mastery(list(adj), seed=seed), max_recommend=max_recommend)
+    return lambda: path_planning.plan(payload)
+
+
+@case("plan", "先修图节点数", (100, 1_000, 10_000, 100_000))
+def _plan_top(size: int, seed: int) -> Callable[[], Any]:
+    return _plan(size, seed, max_recommend=5)
+
+
+@case("plan_full", "先修图节点数", (100, 1_000, 10_000, 100_000))
+def _plan_full(size: int, seed: int) -> Callable[[], Any]:
+    return _plan(size, seed, max_recommend=size)  # 遍历整张图
+
+
+# ---- 存储（database 门面） ----
+
+
+def _populate(size: int, concepts: int, seed: int) -> List[str]:
+    ids = generators.students(size, seed)
+    for student_id in ids:
+        for concept, value in generators.mastery(generators.skill_names(concepts), 1.0, seed).items():
+            database.set_mastery(student_id, concept, value)
+    return ids
+
+
+@case("database.update_mastery", "学生数", (100, 1_000, 10_000, 100_000))
+def _update_mastery(size: int, seed: int) -> Callable[[], Any]:
+    ids = itertools.cycle(_populate(size, 4, seed))
+    return lambda: database.update_mastery(next(ids), "skill-1", 1)
+
+
+@case("database.dump_mastery", "每名学生的概念数", (10, 100, 1_000, 10_000))
+def _dump_mastery(size: int, seed: int) -> Callable[[], Any]:
+    student_id = _populate(1, size, seed)[0]
+    return lambda: database.dump_mastery(student_id)
+
+
+@case("database.log_emotion", "学生数", (100, 1_000, 10_000, 100_000))
+def _log_emotion(size: int, seed: int) -> Callable[[], Any]:
+    ids = itertools.cycle(generators.students(size, seed))
+    return lambda: database.log_emotion(next(ids), "confident", 0.8, "基准")
+
+
+@case("database.emotion_summary", "学生数", (100, 1_000, 10_000, 100_000))
+def _emotion_summary(size: int, seed: int) -> Callable[[], Any]:
+    ids = generators.students(size, seed)
+    for student_id in ids:
+        for emotion in generators.EMOTIONS[:4]:
+            database.log_emotion(student_id, emotion, 0.7)
+    ring = itertools.cycle(ids)
+    return lambda: database.emotion_summary(next(ring), 600.0)
+
+
+# ---- 计时与报告 ----
+
+
+def measure(fn: Callable[[], Any], repeat: int, min_time: float) -> Dict[str, float]:
+    """单次调用耗时（秒）：先把循环次数加到每轮不少于 ``min_time``，再重复 ``repeat`` 轮。"""
+    timer = timeit.Timer(fn)
+    loops = 1
+    while True:
+        elapsed = timer.timeit(loops)
+        if elapsed >= min_time:
+            break
+        loops = max(loops * 2, int(loops * min_time / max(elapsed, 1e-9) * 1.1))
+    samples = [elapsed / loops] + [timer.timeit(loops) / loops for _ in range(repeat - 1)]
+    return {"best": min(samples), "median": statistics.median(samples), "loops": loops}
+
+
+def exponent(points: Dict[str, Dict[str, float]]) -> Optional[float]:
+    """log(耗时) 对 log(规模) 的最小二乘斜率。"""
+    if len(points) < 2:
+        return None
+    xs = [math.log(int(size)) for size in points]
+    ys = [math.log(point["best"]) for point in points.values()]
+    mx, my = statistics.fmean(xs), statistics.fmean(ys)
+    return round(sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / sum((x - mx) ** 2 for x in xs), 3)
+
+
+def run_case(item: Case, sizes: Sequence[int], args: argparse.Namespace) -> Dict[str, Any]:
+    original = knowledge_graph.current_graph()
+    points: Dict[str, Dict[str, float]] = {}
+    try:
+        for size in sizes:
+            database.configure(args.store)
+            fn = item.build(size, args.seed)
+            fn()  # 预热：惰性加载、缓存分配不计入
+            points[str(size)] = measure(fn, args.repeat, args.min_time)
+    finally:
+        knowledge_graph.set_graph(original)
+    return {"axis": item.axis, "points": points, "exponent": exponent(points)}
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[Tuple[str, str, float, str]]:
+    """返回 [(用例, 规模, 当前/基线, 判定)]；判定为 regression / improved / ok。"""
+    rows = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for size, point in current["points"].items():
+            if size not in base["points"]:
+                continue
+            ratio = point["best"] / base["points"][size]["best"]
+            verdict = "regression" if ratio > 1 + tolerance else "improved" if ratio < 1 / (1 + tolerance) else "ok"
+            rows.append((name, size, ratio, verdict))
+    return rows
+
+
+def _format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g}{unit}"
+    return f"{seconds / 1e-9:.3g}ns"
+
+
+def write_plot(path: str, title: str, axis: str, series: List[Tuple[str, List[Tuple[int, float]], bool]]) -> None:
+    """log-log 折线图（SVG）：series 为 [(图例, [(规模, 秒)], 是否虚线)]。"""
+    width, height, left, right, top, bottom = 640, 400, 70, 150, 40, 50
+    xs = [x for _, points, _ in series for x, _ in points]
+    ys = [y for _, points, _ in series for _, y in points]
+    x0, x1 = math.floor(math.log10(min(xs))), math.ceil(math.log10(max(xs)))
+    y0, y1 = math.floor(math.log10(min(ys))), math.ceil(math.log10(max(ys)))
+    x1, y1 = max(x1, x0 + 1), max(y1, y0 + 1)
+
+    def px(x: float) -> float:
+        return left + (math.log10(x) - x0) / (x1 - x0) * (width - left - right)
+
+    def py(y: float) -> float:
+        return height - bottom - (math.log10(y) - y0) / (y1 - y0) * (height - top - bottom)
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" font-family="sans-serif" font-size="12">',
+        '<rect width="100%" height="100%" fill="white"/>',
+        f'<text x="{width / 2}" y="22" text-anchor="middle" font-size="15">{escape(title)}</text>',
+        f'<text x="{(left + width - right) / 2}" y="{height - 12}" text-anchor="middle">{escape(axis)}</text>',
+        f'<text x="16" y="{height / 2}" transform="rotate(-90 16 {height / 2})" text-anchor="middle">单次耗时</text>',
+    ]
+    for d in range(x0, x1 + 1):
+        x = px(10**d)
+        parts.append(f'<line x1="{x}" y1="{top}" x2="{x}" y2="{height - bottom}" stroke="#ddd"/>')
+        parts.append(f'<text x="{x}" y="{height - bottom + 16}" text-anchor="middle">1e{d}</text>')
+    for d in range(y0, y1 + 1):
+        y = py(10**d)
+        parts.append(f'<line x1="{left}" y1="{y}" x2="{width - right}" y2="{y}" stroke="#ddd"/>')
+        parts.append(f'<text x="{left - 6}" y="{y + 4}" text-anchor="end">{_format_time(10**d)}</text>')
+    colors = ("#1f77b4", "#d62728", "#2ca02c", "#9467bd")
+    for index, (label, points, dashed) in enumerate(series):
+        color = colors[index % len(colors)]
+        coords = " ".join(f"{px(x):.1f},{py(y):.1f}" for x, y in points)
+        dash = ' stroke-dasharray="6 4"' if dashed else ""
+        parts.append(f'<polyline points="{coords}" fill="none" stroke="{color}" stroke-width="2"{dash}/>')
+        parts.extend(f'<circle cx="{px(x):.1f}" cy="{py(y):.1f}" r="3" fill="{color}"/>' for x, y in points)
+        ly = top + 16 + index * 18
+        parts.append(f'<line x1="{width - right + 12}" y1="{ly - 4}" x2="{width - right + 36}" y2="{ly - 4}" stroke="{color}" stroke-width="2"{dash}/>')
+        parts.append(f'<text x="{width - right + 42}" y="{ly}">{escape(label)}</text>')
+    parts.append("</svg>")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(parts))
+
+
+def _series(entry: Dict[str, Any]) -> List[Tuple[int, float]]:
+    return sorted((int(size), point["best"]) for size, point in entry["points"].items())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", default="", help="逗号分隔的用例名（前缀匹配），默认全部")
+    parser.add_argument("--max-size", type=int, default=0, help="只跑不超过该规模的点（0 表示不限）")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.05, help="每轮最少计时秒数")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--store", default="memory", help="存储用例使用的后端（EDU_STORE 语法）")
+    parser.add_argument("--output", default=os.path.join(RESULTS_DIR, "suite.json"))
+    parser.add_argument("--plots", default=os.path.join(RESULTS_DIR, "plots"), help="SVG 曲线目录，空字符串不画")
+    parser.add_argument("--compare", default="", help="基线 JSON；有回退时以状态码 1 退出")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="慢于基线超过该比例记为回退")
+    args = parser.parse_args()
+
+    prefixes = [p for p in args.cases.split(",") if p]
+    selected = [c for c in CASES if not prefixes or any(c.name.startswith(p) for p in prefixes)]
+    if not selected:
+        parser.error(f"没有匹配的用例，可选：{', '.join(c.name for c in CASES)}")
+
+    results: Dict[str, Any] = {}
+    print(f"{'case':<26} {'size':>8} {'best':>10} {'median':>10} {'loops':>8}")
+    for item in selected:
+        sizes = [s for s in item.sizes if not args.max_size or s <= args.max_size]
+        entry = results[item.name] = run_case(item, sizes, args)
+        for size, point in entry["points"].items():
+            print(
+                f"{item.name:<26} {size:>8} {_format_time(point['best']):>10} "
+                f"{_format_time(point['median']):>10} {point['loops']:>8}"
+            )
+        print(f"{item.name:<26} 扩展指数 {entry['exponent']}")
+
+    document = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "revision": _git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "store": args.store,
+            "repeat": args.repeat,
+            "min_time": args.min_time,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(document, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入 {args.output}")
+
+    baseline: Dict[str, Any] = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    if args.plots:
+        os.makedirs(args.plots, exist_ok=True)
+        for name, entry in results.items():
+            series = [("当前", _series(entry), False)]
+            if name in baseline:
+                series.append(("基线", _series(baseline[name]), True))
+            write_plot(os.path.join(args.plots, f"{name}.svg"), name, entry["axis"], series)
+        print(f"曲线已写入 {args.plots}/")
+
+    if args.compare:
+        rows = compare(results, baseline, args.tolerance)
+        regressions = [row for row in rows if row[3] == "regression"]
+        print(f"\n对比基线 {args.compare}（容差 {args.tolerance:.0%}）")
+        for name, size, ratio, verdict in rows:
+            if verdict != "ok":
+                print(f"  {verdict:<10} {name:<26} {size:>8} {ratio:.2f}x")
+        print(f"  {len(rows)} 个点，回退 {len(regressions)}，改进 {sum(row[3] == 'improved' for row in rows)}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
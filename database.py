@@ -1,76 +1,98 @@
-"""轻量级内存“数据库”，用于演示模块间数据共享。
+"""轻量级“数据库”门面，用于演示模块间数据共享。
 
-真实部署可替换为 SQLAlchemy/Redis，这里保留相同接口便于平滑升级。
+模块级函数保持不变，实际读写委托给 storage 中的可插拔后端：
+默认纯内存，设置环境变量 EDU_STORE（如 ``sqlite:students.db``）或调用 configure() 可切换。
 """
 
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+import os
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Optional, Union
 
+from storage import AffectSummary, EmotionLog, KnowledgeState, StoreBackend, Student, create_backend
 
-@dataclass
-class KnowledgeState:
-    concept: str
-    mastery_level: int = 0
+__all__ = [
+    "AffectSummary",
+    "EmotionLog",
+    "KnowledgeState",
+    "Student",
+    "close",
+    "configure",
+    "dump_mastery",
+    "emotion_summary",
+    "find_student",
+    "flush",
+    "get_backend",
+    "get_student",
+    "latest_emotion",
+    "log_emotion",
+    "mastery_version",
+    "set_mastery",
+    "stats",
+    "update_mastery",
+]
 
+_BACKEND: StoreBackend = create_backend(os.environ.get("EDU_STORE", "memory"))
 
-@dataclass
-class EmotionLog:
-    emotion: str
-    confidence: float
-    timestamp: datetime = field(default_factory=datetime.utcnow)
-    context: Optional[str] = None
 
+def configure(backend: Union[str, StoreBackend]) -> StoreBackend:
+    """替换当前后端（URL 或实例），旧后端会先 flush 并关闭。"""
+    global _BACKEND
+    new = create_backend(backend) if isinstance(backend, str) else backend
+    old, _BACKEND = _BACKEND, new
+    old.close()
+    return new
 
-@dataclass
-class Student:
-    id: str
-    name: str = ""
-    knowledge_states: Dict[str, KnowledgeState] = field(default_factory=dict)
-    emotion_logs: List[EmotionLog] = field(default_factory=list)
 
+def get_backend() -> StoreBackend:
+    return _BACKEND
 
-_STUDENTS: Dict[str, Student] = {}
+
+def flush() -> None:
+    _BACKEND.flush()
+
+
+def close() -> None:
+    _BACKEND.close()
+
+
+def stats() -> Dict[str, int]:
+    return _BACKEND.stats()
 
 
 def get_student(student_id: str) -> Student:
-    if student_id not in _STUDENTS:
-        _STUDENTS[student_id] = Student(id=student_id)
-    return _STUDENTS[student_id]
+    return _BACKEND.get_student(student_id)
+
+
+def find_student(student_id: str) -> Optional[Student]:
+    """只读查找，未知 id 返回 None 而不会创建学生。"""
+    return _BACKEND.find_student(student_id)
 
 
 def update_mastery(student_id: str, concept: str, delta: int) -> int:
-    student = get_student(student_id)
-    ks = student.knowledge_states.get(concept)
-    if not ks:
-        ks = KnowledgeState(concept=concept, mastery_level=0)
-        student.knowledge_states[concept] = ks
-    ks.mastery_level = max(0, min(100, ks.mastery_level + delta))
-    return ks.mastery_level
+    return _BACKEND.update_mastery(student_id, concept, delta)
 
 
 def set_mastery(student_id: str, concept: str, value: float) -> int:
-    student = get_student(student_id)
-    ks = student.knowledge_states.get(concept)
-    if not ks:
-        ks = KnowledgeState(concept=concept, mastery_level=0)
-        student.knowledge_states[concept] = ks
-    ks.mastery_level = int(max(0, min(100, value * 100)))
-    return ks.mastery_level
+    return _BACKEND.set_mastery(student_id, concept, value)
+
+
+def mastery_version(student_id: str) -> Optional[int]:
+    return _BACKEND.mastery_version(student_id)
 
 
 def latest_emotion(student_id: str) -> Optional[EmotionLog]:
-    student = get_student(student_id)
-    return student.emotion_logs[-1] if student.emotion_logs else None
+    return _BACKEND.latest_emotion(student_id)
 
 
 def log_emotion(student_id: str, emotion: str, confidence: float, context: Optional[str] = None) -> None:
-    student = get_student(student_id)
-    student.emotion_logs.append(EmotionLog(emotion=emotion, confidence=confidence, context=context))
+    _BACKEND.log_emotion(student_id, emotion, confidence, context)
+
+
+def emotion_summary(student_id: str, window_seconds: float, now: Optional[datetime] = None) -> Optional[AffectSummary]:
+    return _BACKEND.emotion_summary(student_id, window_seconds, now)
 
 
 def dump_mastery(student_id: str) -> Dict[str, float]:
-    student = get_student(student_id)
-    return {c: ks.mastery_level / 100 for c, ks in student.knowledge_states.items()}
+    return _BACKEND.dump_mastery(student_id)
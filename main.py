@@ -2,9 +2,13 @@
 
 from __future__ import annotations
 
+from typing import Optional
+
 from fastapi import FastAPI
 
-from routers import cognitive, tracking, emotion, planning
+import database
+from models import batching, knowledge_graph, memo, param_table
+from routers import cognitive, tracking, emotion, planning, step, stats
 
 
 def create_app() -> FastAPI:
@@ -17,13 +21,74 @@ def create_app() -> FastAPI:
     app.include_router(tracking.router, prefix="/track", tags=["knowledge-tracking"])
     app.include_router(emotion.router, prefix="/emotion", tags=["affective"])
     app.include_router(planning.router, prefix="/plan", tags=["planning"])
+    app.include_router(step.router, prefix="/step", tags=["tutor-step"])
+    app.include_router(stats.router, prefix="/stats", tags=["ops"])
+    # 每个 POST 路由都要声明是否可记忆化（models.memo），漏标在启动时报错
+    memo.check_routes(app.routes)
+    # 先修图文件变化时在后台重新编译并替换
+    app.add_event_handler("startup", knowledge_graph.start_watching)
+    app.add_event_handler("shutdown", knowledge_graph.stop_watching)
+    # 离线拟合的模型参数文件（IRT 等）同样按 mtime 热替换
+    app.add_event_handler("startup", param_table.start_watching)
+    app.add_event_handler("shutdown", param_table.stop_watching)
+    # 关闭时先处理完排队中的推理请求，再把写回缓冲区落盘
+    app.add_event_handler("shutdown", batching.shutdown)
+    app.add_event_handler("shutdown", database.flush)
     return app
 
 
 app = create_app()
 
 
-if __name__ == "__main__":
+def serve(
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    workers: int = 1,
+    max_students: Optional[int] = None,
+    max_concepts: Optional[int] = None,
+) -> None:
+    """启动 HTTP 服务；workers > 1 时改用共享内存存储，让各 worker 进程看到同一份状态。
+
+    ``max_students`` / ``max_concepts`` 为自动创建的共享段容量（默认见 ``storage.shm``）；
+    显式设置 ``EDU_STORE=shm:<name>?students=N&concepts=M`` 时以 URL 为准。
+    """
+    import os
+
     import uvicorn
 
-    uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=False)
+    if workers <= 1:
+        uvicorn.run("main:app", host=host, port=port, reload=False)
+        return
+
+    store = os.environ.get("EDU_STORE", "memory")
+    if store == "memory":
+        limits = [f"{key}={value}" for key, value in (("students", max_students), ("concepts", max_concepts)) if value]
+        store = f"shm:edu-{os.getpid()}" + ("?" + "&".join(limits) if limits else "")
+    elif not store.startswith("shm:"):
+        raise SystemExit(f"多 worker 需要共享内存存储（EDU_STORE=shm:<name>），当前为 {store}")
+    elif max_students or max_concepts:
+        raise SystemExit(f"已设置 EDU_STORE={store}，容量请写在 URL 中（?students=N&concepts=M）")
+    os.environ["EDU_STORE"] = store  # worker 进程重新导入 main 时据此挂载同一共享段
+
+    # 父进程先建好共享段并持有到退出，避免 worker 之间抢建/提前删除
+    from storage.shm import SharedMemoryBackend
+
+    segment = SharedMemoryBackend.from_url(store.partition(":")[2])
+    try:
+        uvicorn.run("main:app", host=host, port=port, workers=workers)
+    finally:
+        segment.close()
+        segment.unlink()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="启动 AI 教学智能体 HTTP 服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="大于 1 时自动启用共享内存存储")
+    parser.add_argument("--max-students", type=int, default=None, help="共享内存存储可容纳的学生数")
+    parser.add_argument("--max-concepts", type=int, default=None, help="共享内存存储可容纳的概念数")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers, args.max_students, args.max_concepts)
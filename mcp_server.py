@@ -1,49 +1,196 @@
-"""将 FastAPI 应用一键注册为 MCP 服务的入口脚本。"""
+"""将 FastAPI 应用一键注册为 MCP 服务的入口脚本。
+
+编辑器每次会话都会拉起 ``python mcp_server.py``，冷启动的耗时用户看得见。默认延迟启动（``--startup lazy``）：
+导入本模块只加载 FastMCP 本身，FastAPI、各路由与模型（NumPy、存储后端、先修图、词表……）在第一次调用工具时
+才导入和初始化；工具列表（路由 -> 工具名/说明）读 ``mcp_tools.json``（``EDU_MCP_TOOLS``）里的缓存，按 main.py、
+routers/ 与本文件的内容摘要校验，缺失或过期时才构建一次应用重新生成。``--startup eager`` 在启动时就构建应用。
+"""
 from __future__ import annotations
 
-from typing import Any, Dict, Iterable, List, Optional
+from functools import partial
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Iterable, List, Optional
 
+import argparse
+import asyncio
+import glob
+import hashlib
+import json
+import logging
+import os
 import threading
 
-import uvicorn
-from fastapi import FastAPI
-from fastapi.routing import APIRoute
-from fastapi.testclient import TestClient
 from mcp.server.fastmcp import FastMCP
+from pydantic import BaseModel, Field
+
+if TYPE_CHECKING:
+    from fastapi import FastAPI
+    from fastapi.routing import APIRoute
+    from fastapi.testclient import TestClient
+
+logger = logging.getLogger(__name__)
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+TOOL_CACHE_PATH = os.environ.get("EDU_MCP_TOOLS", os.path.join(ROOT, "mcp_tools.json"))
+# 工具名/说明只取决于路由的装配与声明
+TOOL_SOURCES = ("main.py", "mcp_server.py", "routers/*.py")
 
-from main import app as fastapi_app
+
+class BatchCall(BaseModel):
+    """batch 工具中的一条调用。"""
+
+    tool: str = Field(description="已注册的工具名，如 trace/diagnose/analyze_affective/recommend_path")
+    payload: Dict[str, Any] = Field(default_factory=dict, description="该工具的请求体")
+    depends_on: List[int] = Field(
+        default_factory=list,
+        description="需先完成的条目下标（如先 trace 再 recommend_path），无依赖的条目并发执行",
+    )
 
 
 class FastApiMCP:
     """Registers FastAPI POST routes as MCP tools and exposes stdio runner.
 
     中文：遍历 FastAPI 的 POST 路由，将其注册为 MCP 工具供上层大模型调用。
+
+    dispatch:
+      - "inprocess"（默认）：用路由的 Pydantic 请求体模型校验 payload 后直接调用 endpoint，
+        同步 handler 丢到线程池执行，避免阻塞 MCP 事件循环；
+      - "http"：沿用 TestClient 走一遍完整的 ASGI 请求，作为兜底。
+    无法直连的路由（带依赖、路径/查询参数等）会自动退回 "http"。
+
+    另外注册一个 ``batch`` 工具：一次提交多条 {tool, payload}，无依赖的条目在
+    ``batch_concurrency`` 限制下并发执行，单条失败只影响自身（及依赖它的条目）。
+
+    传 ``app_factory`` 而不是 ``app`` 时应用在第一次用到时才构建；配合 ``tool_cache``，注册工具只需读缓存，
+    各工具的 handler 在第一次调用时才解析到路由（构建应用放在线程里，不阻塞 MCP 事件循环）。
     """
 
+    DISPATCH_MODES = ("inprocess", "http")
+
     def __init__(
         self,
-        app: FastAPI,
+        app: Optional[FastAPI] = None,
         *,
+        app_factory: Optional[Callable[[], FastAPI]] = None,
         name: str,
         description: Optional[str] = None,
         mount_path: str = "/mcp",
+        dispatch: str = "inprocess",
+        batch_tool_name: Optional[str] = "batch",
+        batch_concurrency: int = 4,
+        tool_cache: Optional[str] = None,
     ) -> None:
-        self.app = app
-        self.client = TestClient(app)
+        if (app is None) == (app_factory is None):
+            raise ValueError("app 与 app_factory 必须且只能给一个")
+        if dispatch not in self.DISPATCH_MODES:
+            raise ValueError(f"未知 dispatch 模式: {dispatch}，可选 {self.DISPATCH_MODES}")
+        if batch_concurrency <= 0:
+            raise ValueError("batch_concurrency 必须为正整数")
+        self._app = app
+        self._app_factory = app_factory
+        self._app_lock = threading.Lock()
+        self._on_app_loaded: List[Callable[[FastAPI], None]] = []
+        self.tool_cache = tool_cache
         self.mcp = FastMCP(name, instructions=description)
         self.mount_path = mount_path
+        self.dispatch_mode = dispatch
+        self.batch_tool_name = batch_tool_name
+        self.batch_concurrency = batch_concurrency
+        self._client: Optional[TestClient] = None
         self._registered = False
         self._tools: List[str] = []
+        self._handlers: Dict[str, Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]] = {}
+
+    @property
+    def app(self) -> FastAPI:
+        """FastAPI 应用；以 ``app_factory`` 构造时第一次访问才创建，并依次执行 ``on_app_loaded`` 注册的回调。"""
+        if self._app is None:
+            with self._app_lock:
+                if self._app is None:
+                    # 先发布再执行回调：回调（如挂载 MCP 入口）可能再次访问 self.app
+                    self._app = self._app_factory()  # type: ignore[misc]
+                    for callback in self._on_app_loaded:
+                        callback(self._app)
+        return self._app
+
+    @property
+    def app_loaded(self) -> bool:
+        return self._app is not None
+
+    def on_app_loaded(self, callback: Callable[[FastAPI], None]) -> None:
+        """应用构建后执行 ``callback(app)``；已经构建过则立即执行。"""
+        with self._app_lock:
+            if self._app is None:
+                self._on_app_loaded.append(callback)
+                return
+        callback(self._app)
+
+    @property
+    def client(self) -> TestClient:
+        """兜底的 TestClient，只有真正走 HTTP 分发时才创建。"""
+        if self._client is None:
+            from fastapi.testclient import TestClient
+
+            self._client = TestClient(self.app)
+        return self._client
 
     @property
     def tools(self) -> List[str]:
         return list(self._tools)
 
+    async def call_tool(self, tool_name: str, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """不经过 MCP 协议层，直接调用已注册工具（批量调用、基准测试复用）。"""
+        self.setup_server()
+        handler = self._handlers.get(tool_name)
+        if handler is None:
+            raise KeyError(f"未注册的工具: {tool_name}")
+        return await handler(payload or {})
+
+    async def call_batch(self, calls: List[BatchCall]) -> List[Dict[str, Any]]:
+        """并发执行一批工具调用，结果按输入顺序返回，每条带 ok/result 或 ok/error。"""
+        self.setup_server()
+        semaphore = asyncio.Semaphore(self.batch_concurrency)
+        tasks: List[asyncio.Task] = []
+
+        for index, call in enumerate(calls):
+            bad_deps = [dep for dep in call.depends_on if not 0 <= dep < index]
+            if bad_deps:
+                # 只允许依赖排在前面的条目，天然排除环
+                tasks.append(asyncio.ensure_future(self._batch_error(call, f"非法依赖下标: {bad_deps}")))
+                continue
+            deps = [tasks[dep] for dep in call.depends_on]
+            tasks.append(asyncio.ensure_future(self._run_batch_entry(call, deps, semaphore)))
+
+        return list(await asyncio.gather(*tasks))
+
+    async def _run_batch_entry(
+        self, call: BatchCall, deps: List[asyncio.Task], semaphore: asyncio.Semaphore
+    ) -> Dict[str, Any]:
+        if deps:
+            results = await asyncio.gather(*deps)
+            if not all(result["ok"] for result in results):
+                return await self._batch_error(call, "依赖条目执行失败，已跳过")
+        async with semaphore:
+            try:
+                result = await self.call_tool(call.tool, call.payload)
+            except Exception as exc:  # 单条失败不影响整批
+                return await self._batch_error(call, f"{type(exc).__name__}: {exc}")
+        return {"tool": call.tool, "ok": True, "result": result}
+
+    @staticmethod
+    async def _batch_error(call: BatchCall, message: str) -> Dict[str, Any]:
+        return {"tool": call.tool, "ok": False, "error": message}
+
     def setup_server(self) -> None:
         if self._registered:
             return
-        for route in self._iter_post_routes():
-            self._register_route(route)
+        specs = None if self.app_loaded else self._cached_specs()
+        if specs is None:
+            specs = self.tool_specs()
+            self._write_cache(specs)
+        for spec in specs:
+            self._register_tool(spec)
+        if self.batch_tool_name:
+            self._register_batch_tool(self.batch_tool_name)
         self._registered = True
 
     def mount(self, target_app: Optional[FastAPI] = None, *, path: Optional[str] = None) -> None:
@@ -59,41 +206,190 @@ class FastApiMCP:
         self.mcp.run("stdio")
 
     def _iter_post_routes(self) -> Iterable[APIRoute]:
+        from fastapi.routing import APIRoute
+
         for route in self.app.routes:
             if isinstance(route, APIRoute) and "POST" in route.methods:
                 yield route
 
-    def _register_route(self, route: APIRoute) -> None:
-        path = route.path
-        tool_name = route.name or path.lstrip("/").replace("/", "_")
-        description = route.summary or route.description or f"调用 {path}"
+    def tool_specs(self) -> List[Dict[str, str]]:
+        """每个 POST 路由对应的工具 {name, path, description}（需要构建应用）。"""
+        specs = []
+        for route in self._iter_post_routes():
+            path = route.path
+            specs.append(
+                {
+                    "name": route.name or path.lstrip("/").replace("/", "_"),
+                    "path": path,
+                    "description": route.summary or route.description or f"调用 {path}",
+                }
+            )
+        return specs
+
+    @staticmethod
+    def sources_digest() -> str:
+        """``TOOL_SOURCES`` 的内容摘要，作为工具缓存的版本。"""
+        digest = hashlib.blake2b(digest_size=8)
+        for pattern in TOOL_SOURCES:
+            for path in sorted(glob.glob(os.path.join(ROOT, pattern))):
+                digest.update(os.path.relpath(path, ROOT).encode("utf-8"))
+                with open(path, "rb") as f:
+                    digest.update(f.read())
+        return digest.hexdigest()
 
-        @self.mcp.tool(name=tool_name, description=description)
-        async def call_endpoint(payload: Dict[str, Any], path: str = path) -> Dict[str, Any]:
-            response = self.client.post(path, json=payload or {})
-            response.raise_for_status()
-            return response.json()
+    def _cached_specs(self) -> Optional[List[Dict[str, str]]]:
+        if not self.tool_cache:
+            return None
+        try:
+            with open(self.tool_cache, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != self.sources_digest():
+            return None
+        return data["tools"]
+
+    def _write_cache(self, specs: List[Dict[str, str]]) -> None:
+        if not self.tool_cache:
+            return
+        tmp = f"{self.tool_cache}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": self.sources_digest(), "tools": specs}, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.tool_cache)
+        except OSError as exc:  # 只读目录等：照常服务，下次启动再构建
+            logger.warning("写入 MCP 工具缓存 %s 失败: %s", self.tool_cache, exc)
+
+    def _register_tool(self, spec: Dict[str, str]) -> None:
+        tool_name, path = spec["name"], spec["path"]
+        if self.app_loaded:
+            self._handlers[tool_name] = self._route_handler(path)
+        else:
+            self._handlers[tool_name] = partial(self._resolve_and_call, tool_name, path)
+
+        @self.mcp.tool(name=tool_name, description=spec["description"])
+        async def call_endpoint(payload: Dict[str, Any]) -> Dict[str, Any]:
+            return await self._handlers[tool_name](payload or {})
 
         self._tools.append(tool_name)
         _ = call_endpoint
 
+    def _route_handler(self, path: str) -> Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]:
+        route = next((r for r in self._iter_post_routes() if r.path == path), None)
+        handler = None
+        if route is not None and self.dispatch_mode == "inprocess":
+            handler = self._inprocess_handler(route)
+        if handler is None:
+            handler = partial(self._http_call, path)
+        return handler
+
+    async def _resolve_and_call(self, tool_name: str, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """第一次调用：在线程里构建应用并解析路由，之后直接用解析好的 handler。"""
+        handler = await asyncio.to_thread(self._route_handler, path)
+        self._handlers[tool_name] = handler
+        return await handler(payload)
+
+    def _register_batch_tool(self, tool_name: str) -> None:
+        description = (
+            "批量调用：一次提交多条 {tool, payload}，无依赖的条目并发执行，"
+            f"可用工具：{', '.join(self._tools)}。返回与输入同序的结果列表。"
+        )
+
+        @self.mcp.tool(name=tool_name, description=description)
+        async def call_batch(calls: List[BatchCall]) -> List[Dict[str, Any]]:
+            return await self.call_batch(calls)
+
+        self._tools.append(tool_name)
+        _ = call_batch
+
+    async def _http_call(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        response = self.client.post(path, json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    @staticmethod
+    def _inprocess_handler(
+        route: APIRoute,
+    ) -> Optional[Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]]:
+        """为“单个 Pydantic 请求体”的路由构造直连 handler；不满足条件返回 None。"""
+        dependant = route.dependant
+        if (
+            dependant.path_params
+            or dependant.query_params
+            or dependant.header_params
+            or dependant.cookie_params
+            or dependant.dependencies
+            or len(dependant.body_params) != 1
+        ):
+            return None
+        from fastapi.encoders import jsonable_encoder
+        from starlette.concurrency import run_in_threadpool
+
+        body_field = dependant.body_params[0]
+        body_model = body_field.type_
+        if not (isinstance(body_model, type) and issubclass(body_model, BaseModel)):
+            return None
+
+        endpoint = route.endpoint
+        param_name = body_field.name
+        is_coroutine = asyncio.iscoroutinefunction(endpoint)
+        response_model = route.response_model
+        if not (isinstance(response_model, type) and issubclass(response_model, BaseModel)):
+            response_model = None
+
+        async def call_endpoint(payload: Dict[str, Any]) -> Dict[str, Any]:
+            body = body_model.model_validate(payload)
+            if is_coroutine:
+                result = await endpoint(**{param_name: body})
+            else:
+                result = await run_in_threadpool(endpoint, **{param_name: body})
+            if response_model is not None and not isinstance(result, response_model):
+                result = response_model.model_validate(jsonable_encoder(result))
+            if isinstance(result, BaseModel):
+                return result.model_dump(mode="json")
+            return jsonable_encoder(result)
+
+        return call_endpoint
+
+
+def _load_app() -> FastAPI:
+    from main import app
+
+    return app
+
 
 mcp = FastApiMCP(
-    fastapi_app,
+    app_factory=_load_app,
     name="edu-fastapi-mcp",
     description="将 FastAPI 教育小模型接口导出为 MCP 服务",
+    tool_cache=TOOL_CACHE_PATH,
 )
-mcp.setup_server()
-# 可选挂载，便于同时走 HTTP 查看 /mcp/stream
-mcp.mount(fastapi_app)
 
-def main() -> None:
-    """在子线程启动 HTTP，主线程跑 MCP stdio。"""
 
-    def _run_http() -> None:
-        uvicorn.run("main:app", host="127.0.0.1", port=8000)
+def _serve_http(app: FastAPI) -> None:
+    """把 MCP 的 streaming HTTP 入口挂到应用上（便于同时走 HTTP 查看 /mcp/stream），在子线程启动 HTTP。"""
+    import uvicorn
+
+    mcp.mount(app)
+    threading.Thread(target=uvicorn.run, args=(app,), kwargs={"host": "127.0.0.1", "port": 8000}, daemon=True).start()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """主线程跑 MCP stdio；HTTP 服务在应用构建后（lazy：第一次调用工具时）于子线程启动。"""
+    parser = argparse.ArgumentParser(description="以 MCP（stdio）导出 AI 教学智能体的接口")
+    parser.add_argument(
+        "--startup",
+        choices=("lazy", "eager"),
+        default=os.environ.get("EDU_MCP_STARTUP", "lazy"),
+        help="lazy：按工具缓存启动，第一次调用工具时才导入应用；eager：启动时构建应用",
+    )
+    parser.add_argument("--no-http", action="store_true", help="不启动 HTTP 服务")
+    args = parser.parse_args(argv)
 
-    threading.Thread(target=_run_http, daemon=True).start()
+    if not args.no_http:
+        mcp.on_app_loaded(_serve_http)
+    if args.startup == "eager":
+        _ = mcp.app
     mcp.run_stdio()
 
 
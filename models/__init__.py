@@ -1,8 +1,33 @@
-from . import cognitive_diagnosis, knowledge_tracking, emotion_analysis, path_planning
+from . import (
+    batching,
+    bkt,
+    cognitive_diagnosis,
+    cohort_planning,
+    emotion_analysis,
+    irt,
+    knowledge_graph,
+    knowledge_tracking,
+    lexicon,
+    memo,
+    param_table,
+    path_planning,
+    trace_scan,
+    tutor_step,
+)
 
 __all__ = [
     "cognitive_diagnosis",
+    "cohort_planning",
     "knowledge_tracking",
     "emotion_analysis",
+    "batching",
+    "bkt",
+    "irt",
+    "knowledge_graph",
+    "lexicon",
+    "memo",
+    "param_table",
     "path_planning",
+    "trace_scan",
+    "tutor_step",
 ]
@@ -0,0 +1,247 @@
+"""模型推理调用的动态微批：把并发请求攒成一批交给批量函数，再把结果分发回各请求。
+
+``MicroBatcher(name, batch_fn)``：
+- ``call(item)`` 阻塞等待结果（路由是同步函数，在线程池里等待）；``submit(item)`` 返回 Future；
+- 后台调度线程取到第一条请求后，最多再等 ``max_wait_ms`` 或攒满 ``max_batch`` 条就发出一批；
+  执行池全忙时请求继续排队，下一批自然更大（负载越高批越大，空闲时不额外等待）；
+- 批量函数 ``batch_fn(items) -> results`` 按顺序一一对应，某个结果是异常实例时作为该请求的异常抛出；
+  整批抛异常时逐条重跑，异常只落到出错的请求上（有副作用的批量函数应自行隔离，返回异常实例而不是整批抛出）；
+- ``pool``："inline" 在调度线程里执行（一次一批），"thread" / "process" 交给 N 个线程/进程并行执行多批。
+  进程池只适合无副作用的批量函数（函数与参数需可 pickle，写存储的模型在子进程里写不到主进程）；
+  ``pure=False`` 的批处理器遇到 "process" 会退回线程池。
+- ``max_batch <= 1`` 时不启用：``call`` 直接在调用线程里执行 ``batch_fn([item])``，与不经过批处理完全相同。
+
+全局配置：``EDU_BATCH_MAX``（默认 1，即关闭）、``EDU_BATCH_WAIT_MS``（默认 2）、
+``EDU_BATCH_POOL``（``inline`` / ``thread:N`` / ``process:N``，默认 inline）。
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+Req = TypeVar("Req")
+Resp = TypeVar("Resp")
+
+MAX_BATCH = int(os.environ.get("EDU_BATCH_MAX", "1"))
+MAX_WAIT_MS = float(os.environ.get("EDU_BATCH_WAIT_MS", "2"))
+POOL = os.environ.get("EDU_BATCH_POOL", "inline")
+POOLS = ("inline", "thread", "process")
+
+
+def parse_pool(spec: str) -> Tuple[str, int]:
+    """``inline`` / ``thread:N`` / ``process:N`` -> (种类, 并行数)。"""
+    kind, _, count = spec.partition(":")
+    if kind not in POOLS:
+        raise ValueError(f"未知的批处理执行池: {spec}")
+    workers = int(count) if count else (1 if kind == "inline" else os.cpu_count() or 1)
+    if workers <= 0 or (kind == "inline" and workers != 1):
+        raise ValueError(f"批处理执行池并行数不合法: {spec}")
+    return kind, workers
+
+
+class MicroBatcher(Generic[Req, Resp]):
+    def __init__(
+        self,
+        name: str,
+        batch_fn: Callable[[List[Req]], Sequence[Resp]],
+        *,
+        max_batch: int = MAX_BATCH,
+        max_wait_ms: float = MAX_WAIT_MS,
+        pool: str = POOL,
+        pure: bool = True,
+    ) -> None:
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms 不能为负")
+        kind, workers = parse_pool(pool)
+        if kind == "process" and not pure:
+            logger.warning("批处理器 %s 有副作用，不能在子进程里执行，改用线程池", name)
+            kind = "thread"
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000.0
+        self.pool = kind
+        self.workers = workers
+        self._queue: Deque[Tuple[Req, Future, float]] = deque()
+        self._cond = threading.Condition()
+        self._slots = threading.Semaphore(workers)
+        self._executor: Optional[Executor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._calls = 0
+        self._batches = 0
+        self._largest = 0
+        self._errors = 0
+        self._wait_total = 0.0
+        _BATCHERS.append(self)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_batch > 1
+
+    def call(self, item: Req) -> Resp:
+        if not self.enabled:
+            with self._cond:
+                self._calls += 1
+                self._batches += 1
+                self._largest = max(self._largest, 1)
+            result = self.batch_fn([item])[0]
+            if isinstance(result, BaseException):
+                with self._cond:
+                    self._errors += 1
+                raise result
+            return result
+        return self.submit(item).result()
+
+    def submit(self, item: Req) -> "Future[Resp]":
+        future: "Future[Resp]" = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"批处理器 {self.name} 已关闭")
+            if self._thread is None:
+                self._start()
+            self._queue.append((item, future, time.monotonic()))
+            self._calls += 1
+            self._cond.notify()
+        return future
+
+    def _start(self) -> None:
+        if self.pool == "thread":
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix=f"batch-{self.name}")
+        elif self.pool == "process":
+            self._executor = ProcessPoolExecutor(self.workers)
+        self._thread = threading.Thread(target=self._dispatch_loop, name=f"batcher-{self.name}", daemon=True)
+        self._thread.start()
+
+    def _next_batch(self) -> List[Tuple[Req, Future, float]]:
+        """等到有请求，再等到攒满或首条请求等满 ``max_wait``；关闭且队列为空时返回空列表。"""
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            if not self._queue:
+                return []
+            deadline = self._queue[0][2] + self.max_wait
+            while len(self._queue) < self.max_batch and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            count = min(len(self._queue), self.max_batch)
+            batch = [self._queue.popleft() for _ in range(count)]
+            now = time.monotonic()
+            self._batches += 1
+            self._largest = max(self._largest, count)
+            self._wait_total += sum(now - enqueued for _, _, enqueued in batch)
+            return batch
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            self._slots.acquire()  # 先等执行池有空位，期间到达的请求都并进下一批
+            batch = self._next_batch()
+            if not batch:
+                self._slots.release()
+                return
+            items = [item for item, _, _ in batch]
+            futures = [future for _, future, _ in batch]
+            if self._executor is None:
+                try:
+                    self._scatter(futures, items, self.batch_fn(items), None)
+                except BaseException as exc:  # noqa: BLE001 - 异常要交给等待中的请求
+                    self._scatter(futures, items, None, exc)
+                finally:
+                    self._slots.release()
+            else:
+                done = self._executor.submit(self.batch_fn, items)
+                done.add_done_callback(lambda f, fs=futures, it=items: self._on_done(f, fs, it))
+
+    def _on_done(self, done: Future, futures: List[Future], items: List[Req]) -> None:
+        try:
+            exc = done.exception()
+            self._scatter(futures, items, None if exc else done.result(), exc)
+        finally:
+            self._slots.release()
+
+    def _scatter(
+        self, futures: List[Future], items: List[Req], results: Optional[Sequence[Resp]], exc: Optional[BaseException]
+    ) -> None:
+        if exc is None and results is not None and len(results) != len(futures):
+            exc = RuntimeError(f"批处理器 {self.name} 的批量函数返回了 {len(results)} 个结果，期望 {len(futures)} 个")
+        if exc is None:
+            for future, result in zip(futures, results):
+                if isinstance(result, BaseException):
+                    with self._cond:
+                        self._errors += 1
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+            return
+        if len(futures) == 1:
+            with self._cond:
+                self._errors += 1
+            futures[0].set_exception(exc)
+            return
+        # 整批失败：逐条重跑，把异常只交给出错的请求（在当前线程里执行，进程池的批量函数同样可在本进程调用）
+        for future, item in zip(futures, items):
+            try:
+                result = self.batch_fn([item])[0]
+            except BaseException as single:  # noqa: BLE001
+                result = single
+            if isinstance(result, BaseException):
+                with self._cond:
+                    self._errors += 1
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def close(self) -> None:
+        """处理完已排队的请求后停止调度线程与执行池（关闭期间的新请求报错）；之后再提交会重新启动。"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        with self._cond:
+            self._thread = None
+            self._executor = None
+            self._closed = False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            batches = self._batches
+            queued = self._calls - len(self._queue)
+            return {
+                "enabled": self.enabled,
+                "pool": f"{self.pool}:{self.workers}",
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "calls": self._calls,
+                "batches": batches,
+                "avg_batch": round(queued / batches, 2) if batches else 0.0,
+                "largest_batch": self._largest,
+                "avg_queue_ms": round(self._wait_total / queued * 1000.0, 3) if queued and self.enabled else 0.0,
+                "queued": len(self._queue),
+                "errors": self._errors,
+            }
+
+
+_BATCHERS: List[MicroBatcher] = []
+
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    return {batcher.name: batcher.stats() for batcher in _BATCHERS}
+
+
+def shutdown() -> None:
+    for batcher in list(_BATCHERS):
+        batcher.close()
@@ -0,0 +1,271 @@
+"""知识追踪的 BKT 参数批量拟合，以及 ``knowledge_tracking`` 加载的逐技能参数表。
+
+离线拟合（``fit`` / ``python -m models.calibrate bkt``）：
+- 交互日志（学生、技能、对错，按文件顺序或 ``seq`` 排序）按技能分组，每个学生在该技能上的作答构成一条序列；
+- 每个技能拟合标准 BKT（初始掌握 L0、学会 T、猜对 G、失误 S，不含遗忘）：Baum-Welch EM，
+  前向-后向按时间步循环、在同一批学生上向量化；学生按序列长度排序后分批补齐，补齐浪费有界；
+- 各技能互不依赖，用进程池分片并行，结果写成参数表（``EDU_BKT_PARAMS``，默认 bkt_params.json）。
+
+参数表怎样用于 ``trace``：规则追踪的单步更新是仿射的（答对 ``p + (1-p)·学习率``，答错 ``p·保持率``），
+``models.trace_scan`` 的批量回放依赖这一点。BKT 的“后验 + 学会”更新是分式映射，这里把它在 [0, 1] 上
+按最小二乘投影成最接近的学习率/保持率写入参数表；L0 作为该技能没有先验时的起点。
+没有参数的技能仍用全局常数。
+"""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from models.param_table import ParamFile, parse_bool, read_rows
+
+BKT_PARAMS_PATH = os.environ.get("EDU_BKT_PARAMS", "bkt_params.json")
+BATCH_STUDENTS = 4096
+
+# 猜对/失误上限：超过后“未掌握却常答对”与“掌握了却常答错”无法区分（BKT 的可识别性问题）
+_MAX_GUESS = 0.3
+_MAX_SLIP = 0.3
+_EPS = 1e-4
+
+
+@dataclass
+class SkillFit:
+    skill: str
+    init: float
+    learn: float
+    guess: float
+    slip: float
+    students: int
+    interactions: int
+    iterations: int
+    log_likelihood: float
+
+
+def _batches(student: np.ndarray, correct: np.ndarray) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """按学生切成序列（输入已按学生分组、组内保持时间顺序），长度相近的学生补齐成 (学生, 时间) 矩阵。"""
+    starts = np.flatnonzero(np.r_[True, student[1:] != student[:-1]])
+    lengths = np.diff(np.r_[starts, len(student)])
+    order = np.argsort(-lengths, kind="stable")
+    batches = []
+    for lo in range(0, len(order), BATCH_STUDENTS):
+        chosen = order[lo : lo + BATCH_STUDENTS]
+        width = int(lengths[chosen[0]])
+        obs = np.zeros((len(chosen), width), dtype=np.float64)
+        mask = np.arange(width) < lengths[chosen][:, None]
+        rows = np.repeat(np.arange(len(chosen)), lengths[chosen])
+        cols = np.concatenate([np.arange(n) for n in lengths[chosen]])
+        obs[rows, cols] = correct[np.concatenate([np.arange(s, s + n) for s, n in zip(starts[chosen], lengths[chosen])])]
+        batches.append((obs, mask))
+    return batches
+
+
+def _e_step(
+    obs: np.ndarray, mask: np.ndarray, init: float, learn: float, guess: float, slip: float
+) -> Tuple[np.ndarray, float]:
+    """一批序列的前向-后向；返回期望统计量与对数似然。
+
+    统计量依次为：首步已掌握的期望数、学生数、未掌握→已掌握的期望转移数、可转移的未掌握期望数、
+    未掌握时答对的期望数、未掌握期望数、已掌握时答错的期望数、已掌握期望数。
+    """
+    batch, steps = obs.shape
+    # 发射概率：列 0 未掌握，列 1 已掌握
+    emit_u = np.where(obs > 0, guess, 1.0 - guess)
+    emit_k = np.where(obs > 0, 1.0 - slip, slip)
+    alpha_u = np.empty((batch, steps))
+    alpha_k = np.empty((batch, steps))
+    scale = np.ones((batch, steps))
+    prev_u = np.full(batch, 1.0 - init)
+    prev_k = np.full(batch, init)
+    for t in range(steps):
+        if t:
+            pred_u = prev_u * (1.0 - learn)
+            pred_k = prev_k + prev_u * learn
+        else:
+            pred_u, pred_k = prev_u, prev_k
+        a_u, a_k = pred_u * emit_u[:, t], pred_k * emit_k[:, t]
+        c = a_u + a_k
+        valid = mask[:, t]
+        scale[:, t] = np.where(valid, c, 1.0)
+        prev_u = np.where(valid, a_u / c, prev_u)
+        prev_k = np.where(valid, a_k / c, prev_k)
+        alpha_u[:, t], alpha_k[:, t] = prev_u, prev_k
+
+    beta_u = np.ones(batch)
+    beta_k = np.ones(batch)
+    transitions = 0.0
+    from_unknown = 0.0
+    guess_num = guess_den = slip_num = slip_den = 0.0
+    for t in range(steps - 1, -1, -1):
+        valid = mask[:, t]
+        gamma_u = alpha_u[:, t] * beta_u
+        gamma_k = alpha_k[:, t] * beta_k
+        total = gamma_u + gamma_k
+        gamma_u, gamma_k = np.where(valid, gamma_u / total, 0.0), np.where(valid, gamma_k / total, 0.0)
+        right = obs[:, t]
+        guess_num += float(gamma_u @ right)
+        guess_den += float(gamma_u.sum())
+        slip_num += float(gamma_k @ (1.0 - right))
+        slip_den += float(gamma_k.sum())
+        if t == 0:
+            first_known = float(gamma_k.sum())
+            break
+        # 由 t 推到 t-1：未掌握→已掌握的转移与 β（t 为补齐位置时 β 保持为 1）
+        w_u = emit_u[:, t] * beta_u / scale[:, t]
+        w_k = emit_k[:, t] * beta_k / scale[:, t]
+        prev_u, prev_k = alpha_u[:, t - 1], alpha_k[:, t - 1]
+        xi = np.where(valid, prev_u * learn * w_k, 0.0)
+        stay_u = np.where(valid, prev_u * (1.0 - learn) * w_u, 0.0)
+        transitions += float(xi.sum())
+        from_unknown += float(xi.sum() + stay_u.sum())
+        beta_u = np.where(valid, (1.0 - learn) * w_u + learn * w_k, 1.0)
+        beta_k = np.where(valid, w_k, 1.0)
+    else:  # steps == 0
+        first_known = 0.0
+    log_likelihood = float(np.log(scale).sum())
+    stats = np.array(
+        [first_known, batch, transitions, from_unknown, guess_num, guess_den, slip_num, slip_den], dtype=np.float64
+    )
+    return stats, log_likelihood
+
+
+def fit_skill(
+    student: np.ndarray, correct: np.ndarray, *, max_iter: int = 100, tol: float = 1e-5
+) -> Tuple[Tuple[float, float, float, float], int, float]:
+    """单个技能的 EM；``student`` 需已分组（同一学生的作答相邻、按时间顺序）。返回 ((L0, T, G, S), 迭代次数, 对数似然)。"""
+    batches = _batches(student, correct.astype(np.float64))
+    init, learn, guess, slip = 0.4, 0.15, 0.2, 0.1
+    previous = -np.inf
+    log_likelihood = previous
+    iterations = 0
+    for iterations in range(1, max_iter + 1):
+        stats = np.zeros(8)
+        log_likelihood = 0.0
+        for obs, mask in batches:
+            part, ll = _e_step(obs, mask, init, learn, guess, slip)
+            stats += part
+            log_likelihood += ll
+        first_known, students, transitions, from_unknown, guess_num, guess_den, slip_num, slip_den = stats
+        init = float(np.clip(first_known / students, _EPS, 1 - _EPS))
+        learn = float(np.clip(transitions / from_unknown, _EPS, 1 - _EPS)) if from_unknown > 0 else learn
+        guess = float(np.clip(guess_num / guess_den, _EPS, _MAX_GUESS)) if guess_den > 0 else guess
+        slip = float(np.clip(slip_num / slip_den, _EPS, _MAX_SLIP)) if slip_den > 0 else slip
+        if log_likelihood - previous <= tol * abs(log_likelihood):
+            break
+        previous = log_likelihood
+    return (init, learn, guess, slip), iterations, log_likelihood
+
+
+def tracer_rates(learn: float, guess: float, slip: float, points: int = 201) -> Tuple[float, float]:
+    """把 BKT 的单步更新在 [0, 1] 上最小二乘投影成规则追踪的 (学习率, 保持率)。"""
+    p = np.linspace(0.0, 1.0, points)
+    post_right = p * (1 - slip) / (p * (1 - slip) + (1 - p) * guess)
+    post_wrong = p * slip / (p * slip + (1 - p) * (1 - guess))
+    after_right = post_right + (1 - post_right) * learn
+    after_wrong = post_wrong + (1 - post_wrong) * learn
+    learning_rate = float(((1 - p) * (after_right - p)).sum() / ((1 - p) ** 2).sum())
+    forgetting = float((p * after_wrong).sum() / (p**2).sum())
+    return float(np.clip(learning_rate, 0.0, 1.0)), float(np.clip(forgetting, 0.0, 1.0))
+
+
+def _fit_job(job: Tuple[Any, ...]) -> SkillFit:
+    skill, student, correct, max_iter, tol = job
+    (init, learn, guess, slip), iterations, log_likelihood = fit_skill(student, correct, max_iter=max_iter, tol=tol)
+    students = int(np.count_nonzero(np.r_[True, student[1:] != student[:-1]])) if len(student) else 0
+    return SkillFit(skill, init, learn, guess, slip, students, len(correct), iterations, log_likelihood)
+
+
+def fit(
+    students: Sequence[str],
+    skills: Sequence[str],
+    correct: Sequence[bool],
+    *,
+    workers: Optional[int] = None,
+    max_iter: int = 100,
+    tol: float = 1e-5,
+) -> Dict[str, Any]:
+    """按技能分片并行拟合，返回可直接写成参数表的 dict。输入按时间顺序排列（同一学生的先后即作答先后）。"""
+    skill_names, skill_codes = np.unique(np.asarray(skills, dtype=object).astype(str), return_inverse=True)
+    _, student_codes = np.unique(np.asarray(students, dtype=object).astype(str), return_inverse=True)
+    correct_arr = np.asarray(correct, dtype=bool)
+    # 先按技能、再按学生分组，稳定排序保持同一学生在同一技能上的时间顺序
+    order = np.lexsort((student_codes, skill_codes))
+    bounds = np.searchsorted(skill_codes[order], np.arange(len(skill_names) + 1))
+    jobs = []
+    for k, skill in enumerate(skill_names):
+        rows = order[bounds[k] : bounds[k + 1]]
+        jobs.append((str(skill), student_codes[rows], correct_arr[rows], max_iter, tol))
+    jobs.sort(key=lambda job: -len(job[2]))  # 大技能先提交，进程池尾部更均衡
+
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(jobs) <= 1:
+        fits = [_fit_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            fits = list(pool.map(_fit_job, jobs))
+
+    table: Dict[str, Any] = {}
+    for item in sorted(fits, key=lambda f: f.skill):
+        learning_rate, forgetting = tracer_rates(item.learn, item.guess, item.slip)
+        table[item.skill] = [
+            round(v, 4) for v in (item.init, learning_rate, forgetting, item.learn, item.guess, item.slip)
+        ] + [item.students, item.interactions]
+    return {"columns": list(COLUMNS), "skills": table}
+
+
+# 参数表每个技能一行：前三列供 trace 使用，其后为 BKT 原始参数与拟合数据量
+COLUMNS = ("init", "learning_rate", "forgetting", "learn", "guess", "slip", "students", "interactions")
+
+
+def read_interactions(path: str) -> Tuple[List[str], List[str], List[bool]]:
+    """读取交互日志：CSV（表头 student_id,skill,correct[,seq]）或 JSONL（同名字段）。有 seq 时按它排序。"""
+    rows_out: List[Tuple[int, int, str, str, bool]] = []
+    for position, row in enumerate(read_rows(path)):
+        seq = row.get("seq")
+        rows_out.append(
+            (
+                int(seq) if seq not in (None, "") else position,
+                position,
+                str(row["student_id"]),
+                str(row["skill"]),
+                parse_bool(row["correct"]),
+            )
+        )
+    rows_out.sort()
+    return [r[2] for r in rows_out], [r[3] for r in rows_out], [r[4] for r in rows_out]
+
+
+class BKTTable:
+    """技能 -> (L0, 学习率, 保持率)。"""
+
+    __slots__ = ("version", "skills")
+
+    def __init__(self, version: str, skills: Dict[str, Tuple[float, float, float]]) -> None:
+        self.version = version
+        self.skills = skills
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any], version: str) -> "BKTTable":
+        columns = list(data.get("columns", COLUMNS))
+        idx = [columns.index(name) for name in ("init", "learning_rate", "forgetting")]
+        skills: Dict[str, Tuple[float, float, float]] = {}
+        for skill, row in data["skills"].items():
+            init, learning_rate, forgetting = (float(row[i]) for i in idx)
+            if not (0.0 <= init <= 1.0 and 0.0 <= learning_rate <= 1.0 and 0.0 <= forgetting <= 1.0):
+                raise ValueError(f"技能 {skill} 的参数越界: {row}")
+            skills[skill] = (init, learning_rate, forgetting)
+        return cls(version, skills)
+
+    @property
+    def model_version(self) -> str:
+        return f"bkt+{self.version}"
+
+
+BKT_PARAMS: ParamFile[BKTTable] = ParamFile("BKT", BKT_PARAMS_PATH, BKTTable.from_json)
+
+
+def current_table() -> Optional[BKTTable]:
+    return BKT_PARAMS.current()
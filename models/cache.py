@@ -0,0 +1,136 @@
+"""进程内有界缓存，供规划等纯计算结果复用。
+
+``LRUCache`` 线程安全，超出 ``maxsize`` 时淘汰最久未用的条目；命中/未命中/淘汰计数通过 ``stats()`` 导出。
+``TTLCache`` 在此之上加过期时间与按估算字节数的内存上限（纯接口的响应记忆化，见 ``models.memo``）。
+缓存的值应当是不可变的（tuple、frozen 对象等），调用方拿到后不要修改。
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class LRUCache:
+    def __init__(self, maxsize: int) -> None:
+        if maxsize <= 0:
+            raise ValueError("maxsize 必须为正整数")
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self._misses += 1
+                return None
+            self._data.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class TTLCache:
+    """带过期时间与内存上限的 LRU：条目超过 ``ttl`` 秒视为不存在；条数超过 ``maxsize`` 或估算字节数
+    超过 ``max_bytes`` 时淘汰最久未用的条目。``put`` 由调用方给出条目的估算字节数。"""
+
+    def __init__(self, maxsize: int, max_bytes: int, ttl: float, clock: Callable[[], float] = time.monotonic) -> None:
+        if maxsize <= 0 or max_bytes <= 0 or ttl <= 0:
+            raise ValueError("maxsize、max_bytes 与 ttl 必须为正数")
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, Tuple[Any, float, int]]" = OrderedDict()  # 值、过期时刻、字节数
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            if entry[1] <= self._clock():
+                del self._data[key]
+                self._bytes -= entry[2]
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._data.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, nbytes: int) -> None:
+        with self._lock:
+            if nbytes > self.max_bytes:
+                return
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._data[key] = (value, self._clock() + self.ttl, nbytes)
+            self._bytes += nbytes
+            while len(self._data) > self.maxsize or self._bytes > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self._bytes -= evicted[2]
+                self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            }
@@ -1,10 +1,18 @@
-"""认知诊断模块（规则版占位），可平滑替换为 IRT/CDM。"""
+"""认知诊断模块：规则版（答对数/次数）与 IRT 版（models.irt）。
+
+有已校准参数的概念用 IRT 估计掌握度（``mode="trained"``，``model_version`` 带参数文件版本），
+其余概念仍按规则计算；请求 ``method="rule"`` 时全部走规则。
+
+路由经 ``DIAGNOSE_BATCHER``（``models.batching``）调用 ``diagnose_batch``；规则/IRT 在线估计仍逐个请求计算，
+换成可批量推理的模型时只需替换 ``diagnose_batch``。
+"""
 
 from __future__ import annotations
 
 from statistics import mean
-from typing import List
+from typing import List, Sequence, Union
 
+from models import batching, irt
 from schemas import (
     CognitiveDiagnosisRequest,
     CognitiveDiagnosisResponse,
@@ -35,9 +43,25 @@ def diagnose(payload: CognitiveDiagnosisRequest) -> CognitiveDiagnosisResponse:
     concepts: List[ConceptDiagnosis] = []
     strengths: List[str] = []
     risks: List[str] = []
+    estimates: List[float] = []
+    table = irt.current_table() if payload.method == "auto" else None
+    used_irt = False
 
     for snapshot in payload.concept_snapshots:
-        mastery = round(snapshot.mastery, 3)
+        concept_model = table.concepts.get(snapshot.concept_name) if table is not None else None
+        ability = None
+        if concept_model is not None:
+            ability = table.estimate(
+                concept_model,
+                snapshot.attempts,
+                snapshot.correct,
+                [(response.item_id, response.correct) for response in snapshot.item_responses],
+            )
+            estimates.append(ability.mastery)
+            used_irt = True
+        else:
+            estimates.append(snapshot.mastery)
+        mastery = round(estimates[-1], 3)
         level = _level_from_mastery(mastery)
         if level == "稳定掌握":
             strengths.append(snapshot.concept_name)
@@ -52,12 +76,13 @@ def diagnose(payload: CognitiveDiagnosisRequest) -> CognitiveDiagnosisResponse:
                 level=level,
                 misconceptions=snapshot.misconceptions,
                 recommendation=_recommendation(snapshot, mastery),
+                method="irt" if ability is not None else "rule",
+                ability=round(ability.theta, 3) if ability is not None else None,
+                ability_se=round(ability.se, 3) if ability is not None else None,
             )
         )
 
-    overall_mastery = round(
-        mean([concept.mastery for concept in payload.concept_snapshots]) if payload.concept_snapshots else 0.0, 3
-    )
+    overall_mastery = round(mean(estimates) if estimates else 0.0, 3)
     behavior_note = ""
     if payload.recent_behaviors:
         behavior_note = f"行为观察：{'、'.join(payload.recent_behaviors)}。"
@@ -78,5 +103,20 @@ def diagnose(payload: CognitiveDiagnosisRequest) -> CognitiveDiagnosisResponse:
         risks=risks,
         concepts=concepts,
         summary=summary,
-        model_version="rule-0.1",
+        mode="trained" if used_irt else "rule",
+        model_version=table.model_version if used_irt else "rule-0.1",
     )
+
+
+def diagnose_batch(payloads: Sequence[CognitiveDiagnosisRequest]) -> List[Union[CognitiveDiagnosisResponse, Exception]]:
+    """批量入口：逐个诊断，每个请求单独隔离异常（出错的位置返回异常实例）。"""
+    results: List[Union[CognitiveDiagnosisResponse, Exception]] = []
+    for payload in payloads:
+        try:
+            results.append(diagnose(payload))
+        except Exception as exc:
+            results.append(exc)
+    return results
+
+
+DIAGNOSE_BATCHER = batching.MicroBatcher("diagnose", diagnose_batch, pure=False)
@@ -0,0 +1,140 @@
+"""全班批量路径规划：一次请求为整个班级生成与 ``path_planning.plan`` 逐个调用完全相同的推荐。
+
+做法：
+- 按编译时算好的拓扑分层逐层推进，每层把仍在规划的学生在本层概念上的掌握度取成
+  ``学生 × 本层概念`` 的 NumPy 矩阵（即全班掌握度矩阵按层取列），一次性计算风险优先级、缺口与阈值掩码并排序；
+- 单人规划里“下一层的入队顺序”取决于本层的处理顺序：下一层节点在其最后一个被处理的本层前驱
+  处理时入队，同一前驱按邻接表顺序。这里用 ``前驱处理位次 × K + 邻接表下标`` 的分段最大值
+  还原该顺序，作为稳定排序的最后一个键，所以同分节点的次序也与单人版一致；
+- 推荐满额的学生随即退出，其余学生继续下一层。
+
+只为实际走到的层取掌握度：推荐通常在前几层就凑满，不必为整张图构造矩阵，内存也只与单层宽度成正比。
+"""
+
+from __future__ import annotations
+
+from itertools import repeat
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+import database
+from models.cache import LRUCache
+from models.knowledge_graph import CompiledGraph, graph_for
+from models.path_planning import MODEL_VERSION
+from schemas import CohortPlan, PathBatchRequest, PathBatchResponse
+
+# 每层的 (节点, 概念名, 来自上一层的边: 前驱层内下标/邻接表下标/分段起点)，按图版本缓存
+_LAYER_INDEX = LRUCache(8)
+
+
+class _LayerIndex:
+    __slots__ = ("nodes", "names", "edges", "radix")
+
+    def __init__(
+        self,
+        nodes: List[np.ndarray],
+        names: List[Tuple[str, ...]],
+        edges: List[Tuple[np.ndarray, np.ndarray, np.ndarray]],
+        radix: int,
+    ) -> None:
+        self.nodes = nodes
+        self.names = names
+        self.edges = edges
+        self.radix = radix
+
+
+def _layer_index(graph: CompiledGraph) -> _LayerIndex:
+    cached = _LAYER_INDEX.get(graph.version)
+    if cached is not None:
+        return cached
+    n = len(graph)
+    offsets = np.asarray(graph.offsets, dtype=np.int64)
+    targets = np.asarray(graph.targets, dtype=np.int64)
+    depth = np.asarray(graph.depth, dtype=np.int64)
+    outdegree = np.diff(offsets)
+    src = np.repeat(np.arange(n, dtype=np.int64), outdegree)
+    adj = np.arange(len(targets), dtype=np.int64) - offsets[src]
+
+    nodes = [np.asarray(layer, dtype=np.int64) for layer in graph.layers]
+    local = np.empty(n, dtype=np.int64)
+    for layer in nodes:
+        local[layer] = np.arange(len(layer))
+
+    # 只有来自紧邻上一层的边决定入队顺序，更早层的前驱早已处理完
+    keep = depth[targets] == depth[src] + 1
+    src, dst, adj = src[keep], targets[keep], adj[keep]
+    order = np.lexsort((adj, local[src], local[dst], depth[dst]))
+    src, dst, adj = src[order], dst[order], adj[order]
+    bounds = np.searchsorted(depth[dst], np.arange(1, len(nodes) + 1))
+
+    edges = []
+    for k in range(1, len(nodes)):
+        lo, hi = bounds[k - 1], bounds[k]
+        dst_local = local[dst[lo:hi]]
+        starts = np.flatnonzero(np.r_[True, dst_local[1:] != dst_local[:-1]])
+        edges.append((local[src[lo:hi]], adj[lo:hi], starts))
+    names = [tuple(graph.names[node] for node in layer) for layer in graph.layers]
+    index = _LayerIndex(nodes, names, edges, int(outdegree.max(initial=0)) + 1)
+    _LAYER_INDEX.put(graph.version, index)
+    return index
+
+
+def recommend_cohort(
+    graph: CompiledGraph, masteries: Sequence[Dict[str, float]], threshold: float, max_recommend: int
+) -> List[List[str]]:
+    """对每份掌握度返回与 ``path_planning._recommend`` 相同的推荐列表。"""
+    names = graph.names
+    layers = _layer_index(graph)
+    results: List[List[str]] = [[] for _ in masteries]
+    counts = np.zeros(len(masteries), dtype=np.int64)
+    active = np.arange(len(masteries))
+    position = None  # 上一层每个节点在各学生处理顺序中的位次
+
+    for k, nodes in enumerate(layers.nodes):
+        if not active.size:
+            break
+        layer_names = layers.names[k]
+        m = np.array(
+            [list(map(masteries[s].get, layer_names, repeat(0.0))) for s in active], dtype=np.float64
+        ).reshape(len(active), len(nodes))
+        if k == 0:
+            queued = np.broadcast_to(np.arange(len(nodes)), m.shape)
+        else:
+            pred, adj, starts = layers.edges[k - 1]
+            queued = np.maximum.reduceat(position[:, pred] * layers.radix + adj, starts, axis=1)
+        gap = 1.0 - m
+        priority = np.where(m < 0.65, 3, np.where(m < 0.85, 2, 1))
+        # 与单人版 sort(key=(-priority, -gap)) 相同，入队顺序作为稳定排序的兜底键
+        order = np.lexsort((queued, -gap, -priority), axis=-1)
+
+        wanted = np.take_along_axis(m, order, axis=1) < threshold
+        need = (max_recommend - counts[active])[:, None]
+        taken = wanted & (np.cumsum(wanted, axis=1) <= need)
+        for row in np.flatnonzero(taken.any(axis=1)):
+            results[active[row]].extend(names[node] for node in nodes[order[row][taken[row]]])
+        counts[active] += taken.sum(axis=1)
+
+        still = counts[active] < max_recommend
+        position = np.empty_like(order)
+        np.put_along_axis(position, order, np.arange(len(nodes)), axis=1)
+        active, position = active[still], position[still]
+    return results
+
+
+def plan_batch(payload: PathBatchRequest) -> PathBatchResponse:
+    graph = graph_for(payload.subject)  # 未知学科抛 UnknownSubjectError
+    # 与 plan 相同：优先用请求里给的掌握度，其次按 student_id 从“数据库”里取
+    masteries = [
+        student.mastery or (database.dump_mastery(student.student_id) if student.student_id else {})
+        for student in payload.students
+    ]
+    paths = recommend_cohort(graph, masteries, payload.threshold, payload.max_recommend)
+    return PathBatchResponse(
+        request_id=payload.request_id,
+        plans=[
+            CohortPlan(student_id=student.student_id, recommended_path=path)
+            for student, path in zip(payload.students, paths)
+        ],
+        model_version=f"{MODEL_VERSION}+{graph.version}",
+    )
@@ -1,19 +1,80 @@
-"""情绪分析模块（规则占位，可换真实模型）。"""
+"""情绪分析模块（规则占位，可换真实模型）。
+
+文本情感按词表打分：词表编译成 Aho-Corasick 自动机（models.lexicon），单遍扫描即可统计命中词条。
+``EDU_LEXICON_DIR`` 目录下若有 ``positive.txt`` / ``negative.txt``，第一次打分时替换对应的内置词表；
+也可调用 ``load_lexicon`` 在运行中整体替换。
+
+``/emotion/sentiment`` 经 ``SENTIMENT_BATCHER``（``models.batching``）调用 ``analyze_sentiment_many``。
+它没有副作用，可以放进进程池；子进程使用目录里的词表，运行中 ``load_lexicon`` 的替换只作用于本进程。
+"""
 
 from __future__ import annotations
 
-from typing import Dict
+import os
+import threading
+from typing import Dict, List, Optional
 
 import database
-from schemas import AffectiveAnalysisRequest, AffectiveAnalysisResponse, AffectiveState, SentimentRequest, SentimentResponse
+from models import batching
+from models.lexicon import Lexicon, read_words
+from schemas import (
+    AffectiveAnalysisRequest,
+    AffectiveAnalysisResponse,
+    AffectiveState,
+    AffectSummaryRequest,
+    AffectSummaryResponse,
+    EmotionLogSchema,
+    SentimentBatchRequest,
+    SentimentBatchResponse,
+    SentimentRequest,
+    SentimentResponse,
+    SentimentScore,
+)
 
 POSITIVE_WORDS = {"好", "满意", "喜欢", "清晰", "有趣", "赞", "棒"}
 NEGATIVE_WORDS = {"差", "糟", "难", "晦涩", "失望", "生气", "不满", "不会", "不懂", "好难", "不知道"}
+LEXICON_DIR = os.environ.get("EDU_LEXICON_DIR", "lexicons")
+_LEXICON_VERSION = 0
+
+
+def load_lexicon(positive_path: Optional[str] = None, negative_path: Optional[str] = None) -> Lexicon:
+    """从词表文件编译并替换当前词表；未给出的一侧沿用内置词表。"""
+    global _LEXICON, _LEXICON_VERSION
+    positive = read_words(positive_path) if positive_path else POSITIVE_WORDS
+    negative = read_words(negative_path) if negative_path else NEGATIVE_WORDS
+    _LEXICON = Lexicon(positive, negative)
+    _LEXICON_VERSION += 1
+    return _LEXICON
+
+
+def lexicon_version() -> int:
+    """每次替换词表加一；记忆化的情感结果以它区分新旧词表。"""
+    current_lexicon()
+    return _LEXICON_VERSION
+
+
+def _default_lexicon() -> Lexicon:
+    paths = [os.path.join(LEXICON_DIR, name) for name in ("positive.txt", "negative.txt")]
+    return load_lexicon(*(path if os.path.exists(path) else None for path in paths))
+
+
+# 默认词表在第一次打分时才读取编译（导入本模块不读文件）
+_LEXICON: Optional[Lexicon] = None
+_LEXICON_LOCK = threading.Lock()
+
+
+def current_lexicon() -> Lexicon:
+    lexicon = _LEXICON
+    if lexicon is None:
+        with _LEXICON_LOCK:
+            if _LEXICON is None:
+                _default_lexicon()
+            lexicon = _LEXICON
+    return lexicon  # type: ignore[return-value]
 
 
 def _simple_score(text: str) -> Dict[str, float]:
-    pos_hits = sum(word in text for word in POSITIVE_WORDS)
-    neg_hits = sum(word in text for word in NEGATIVE_WORDS)
+    pos_hits, neg_hits = current_lexicon().count_hits(text)
     total = pos_hits + neg_hits
     if total == 0:
         return {"负面": 0.2, "中性": 0.6, "正面": 0.2}
@@ -37,6 +98,22 @@ def analyze_sentiment(payload: SentimentRequest) -> SentimentResponse:
     )
 
 
+def analyze_sentiment_many(payloads: List[SentimentRequest]) -> List[SentimentResponse]:
+    """批量入口（``SENTIMENT_BATCHER`` 使用），结果与逐个 ``analyze_sentiment`` 相同。"""
+    return [analyze_sentiment(payload) for payload in payloads]
+
+
+SENTIMENT_BATCHER = batching.MicroBatcher("sentiment", analyze_sentiment_many)
+
+
+def analyze_sentiment_batch(payload: SentimentBatchRequest) -> SentimentBatchResponse:
+    results: List[SentimentScore] = []
+    for text in payload.texts:
+        prob_dict = _simple_score(text)
+        results.append(SentimentScore(probabilities=prob_dict, label=max(prob_dict.items(), key=lambda x: x[1])[0]))
+    return SentimentBatchResponse(request_id=payload.request_id, results=results, model_version="rule-0.1")
+
+
 def analyze_affective_state(payload: AffectiveAnalysisRequest) -> AffectiveAnalysisResponse:
     weights: Dict[str, float] = {}
     for sig in payload.affective_signals:
@@ -84,3 +161,29 @@ def analyze_affective_state(payload: AffectiveAnalysisRequest) -> AffectiveAnaly
         nudges=nudges,
         model_version="rule-0.1",
     )
+
+
+def summarize_affect(payload: AffectSummaryRequest) -> AffectSummaryResponse:
+    """基于已记录情绪的窗口汇总，只读，不会为未知学生建档。"""
+    summary = database.emotion_summary(payload.student_id, payload.window_seconds)
+    latest = database.latest_emotion(payload.student_id)
+    if summary is None:
+        return AffectSummaryResponse(
+            request_id=payload.request_id,
+            student_id=payload.student_id,
+            window_seconds=payload.window_seconds,
+            method="empty",
+            events=0.0,
+            model_version="ring-0.1",
+        )
+    return AffectSummaryResponse(
+        request_id=payload.request_id,
+        student_id=payload.student_id,
+        window_seconds=summary.window_seconds,
+        method=summary.method,
+        events=round(summary.events, 3),
+        weights={emotion: round(share, 3) for emotion, share in summary.weights.items()},
+        dominant_emotion=summary.dominant_emotion,
+        latest=EmotionLogSchema.model_validate(latest, from_attributes=True) if latest is not None else None,
+        model_version="ring-0.1",
+    )
@@ -0,0 +1,503 @@
+"""先修知识图：加载、编译与热更新。
+
+JSON 配置（``{"概念": ["后继概念", ...]}``）在加载时一次性编译成不可变的 ``CompiledGraph``：
+- 概念名映射为整数 id（按配置中的声明顺序），邻接表存为 CSR 数组（``offsets`` / ``targets``）；
+- 预先算好入度与拓扑分层，编译时校验环、未声明的后继节点与格式错误；
+- ``version`` 取配置内容的哈希，多 worker 读同一文件得到相同版本。
+
+图文件由后台线程按 mtime 轮询（``start_watching``），变化后在线程里重新编译，
+成功才整体替换当前图（一次引用赋值，读者要么拿到旧图要么拿到新图）；
+编译失败只记日志，继续使用旧图。请求路径只调用 ``current_graph()`` / ``graph_for()``。
+
+多学科：``GraphRegistry`` 按学科/课程 id 从目录（``EDU_GRAPH_DIR``，每门课一个 ``<subject>.json``）
+按需加载并编译，常驻图按 LRU 淘汰以控制在内存预算（``EDU_GRAPH_BUDGET_MB``）内，
+冷门课程留在磁盘上，启动耗时与课程目录大小无关。监视线程同样会重新编译已常驻且文件有变化的学科图。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 测度论与泛函分析知识点先修图（默认配置）
+DEFAULT_ADJ: Dict[str, List[str]] = {
+    # 测度论基础部分
+    "集合论基础": ["外测度", "可测集"],
+    "外测度": ["可测集", "测度"],
+    "可测集": ["测度", "可测函数"],
+    "测度": ["可测函数", "Lebesgue积分"],
+    "可测函数": ["Lebesgue积分"],
+    "Lebesgue积分": ["乘积测度", "Fubini定理", "Lp空间"],
+    "乘积测度": ["Fubini定理"],
+    "Fubini定理": [],
+    "Lp空间": ["泛函分析基础"],
+    # 泛函分析部分
+    "度量空间": ["赋范空间", "Banach空间"],
+    "赋范空间": ["Banach空间", "Hilbert空间"],
+    "Banach空间": ["线性算子", "对偶空间"],
+    "Hilbert空间": ["线性算子", "对偶空间"],
+    "线性算子": ["紧算子", "谱理论"],
+    "对偶空间": ["弱拓扑"],
+    "弱拓扑": [],
+    "紧算子": ["谱理论"],
+    "谱理论": [],
+    "泛函分析基础": ["度量空间"],
+}
+
+GRAPH_PATH = os.environ.get("EDU_GRAPH", "knowledge_graph.json")
+GRAPH_DIR = os.environ.get("EDU_GRAPH_DIR", "knowledge_graphs")
+GRAPH_BUDGET_MB = float(os.environ.get("EDU_GRAPH_BUDGET_MB", "64"))
+POLL_INTERVAL = 2.0
+
+
+class GraphError(ValueError):
+    """先修图配置不合法（格式错误、未声明的节点或存在环）。"""
+
+
+class UnknownSubjectError(KeyError):
+    """注册表目录中没有该学科的先修图。"""
+
+
+class CompiledGraph:
+    """编译后的只读先修图，构造后不再修改，可在线程间随意共享。"""
+
+    __slots__ = ("version", "names", "index", "offsets", "targets", "indegree", "layers", "depth")
+
+    def __init__(
+        self,
+        version: str,
+        names: Tuple[str, ...],
+        offsets: array,
+        targets: array,
+        indegree: array,
+        layers: Tuple[Tuple[int, ...], ...],
+        depth: array,
+    ) -> None:
+        self.version = version
+        self.names = names
+        self.index: Dict[str, int] = {name: i for i, name in enumerate(names)}
+        self.offsets = offsets
+        self.targets = targets
+        self.indegree = indegree
+        self.layers = layers
+        self.depth = depth
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets)
+
+    @property
+    def roots(self) -> Tuple[int, ...]:
+        return self.layers[0] if self.layers else ()
+
+    def successors(self, node: int) -> array:
+        return self.targets[self.offsets[node] : self.offsets[node + 1]]
+
+    def estimate_bytes(self) -> int:
+        """常驻内存的粗略估计（数组缓冲 + 名字字符串 + 索引字典），供注册表做预算。"""
+        arrays = self.offsets, self.targets, self.indegree, self.depth
+        total = sum(a.itemsize * len(a) for a in arrays)
+        total += sum(sys.getsizeof(name) for name in self.names) + sys.getsizeof(self.names)
+        total += sys.getsizeof(self.index) + sum(sys.getsizeof(layer) for layer in self.layers)
+        return total
+
+    def adjacency(self) -> Dict[str, List[str]]:
+        """还原为 ``{概念: [后继]}``，与编译输入一致。"""
+        names = self.names
+        return {names[i]: [names[t] for t in self.successors(i)] for i in range(len(names))}
+
+    def __repr__(self) -> str:
+        return f"CompiledGraph(version={self.version!r}, nodes={len(self)}, edges={self.edge_count})"
+
+
+def graph_version(adj: Dict[str, Sequence[str]]) -> str:
+    # 邻接表顺序会影响同分节点的推荐次序，所以按原顺序序列化
+    raw = json.dumps(adj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return "g" + hashlib.sha1(raw).hexdigest()[:10]
+
+
+def compile_graph(adj: Dict[str, Sequence[str]], version: Optional[str] = None) -> CompiledGraph:
+    """校验并编译先修图；不合法时抛出 GraphError。"""
+    if not isinstance(adj, dict):
+        raise GraphError("先修图应为 {概念: [后继概念, ...]} 形式的 JSON 对象")
+    names = tuple(adj)
+    index = {name: i for i, name in enumerate(names)}
+
+    offsets = array("l", [0])
+    targets = array("l")
+    unknown: List[str] = []
+    for name in names:
+        successors = adj[name]
+        if not isinstance(name, str) or isinstance(successors, (str, bytes)) or not isinstance(successors, (list, tuple)):
+            raise GraphError(f"概念 {name!r} 的后继应为字符串列表")
+        for nxt in successors:
+            target = index.get(nxt)
+            if target is None:
+                unknown.append(f"{name} -> {nxt}")
+                continue
+            targets.append(target)
+        offsets.append(len(targets))
+    if unknown:
+        raise GraphError(f"后继节点未声明: {', '.join(unknown[:10])}" + (" ..." if len(unknown) > 10 else ""))
+
+    n = len(names)
+    indegree = array("l", [0]) * n
+    for target in targets:
+        indegree[target] += 1
+
+    # Kahn 分层：layer k 为最长先修链长度为 k 的节点，层内按声明顺序
+    remaining = array("l", indegree)
+    depth = array("l", [0]) * n
+    layer = [i for i in range(n) if not indegree[i]]
+    layers: List[Tuple[int, ...]] = []
+    seen = 0
+    while layer:
+        layers.append(tuple(layer))
+        seen += len(layer)
+        following = []
+        for node in layer:
+            for target in targets[offsets[node] : offsets[node + 1]]:
+                remaining[target] -= 1
+                if not remaining[target]:
+                    depth[target] = len(layers)
+                    following.append(target)
+        layer = sorted(following)
+    if seen != n:
+        cyclic = [names[i] for i in range(n) if remaining[i]]
+        raise GraphError(f"先修图存在环，涉及: {', '.join(cyclic[:10])}" + (" ..." if len(cyclic) > 10 else ""))
+
+    return CompiledGraph(
+        version=version or graph_version(adj),
+        names=names,
+        offsets=offsets,
+        targets=targets,
+        indegree=indegree,
+        layers=tuple(layers),
+        depth=depth,
+    )
+
+
+def load_adj(path: Optional[str] = None) -> Dict[str, List[str]]:
+    """
+    优先从外部 JSON 配置加载先修图，文件不存在时回退到 DEFAULT_ADJ。
+
+    JSON 文件示例（knowledge_graph.json）:
+    {
+        "集合论基础": ["外测度", "可测集"],
+        "外测度": ["可测集", "测度"],
+        "...": ["..."]
+    }
+    """
+    cfg_path = Path(path or GRAPH_PATH)
+    if cfg_path.exists():
+        try:
+            with cfg_path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+            # 确保 value 全部是 list
+            return {k: list(v) for k, v in data.items()}
+        except Exception:
+            # 若解析失败，退回默认配置，避免整个服务挂掉
+            return DEFAULT_ADJ
+    return DEFAULT_ADJ
+
+
+def _file_stamp(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _initial_graph() -> CompiledGraph:
+    try:
+        return compile_graph(load_adj())
+    except GraphError as exc:
+        logger.warning("先修图 %s 不合法，使用默认配置: %s", GRAPH_PATH, exc)
+        return compile_graph(DEFAULT_ADJ)
+
+
+# 默认先修图在第一次用到时才加载编译（导入本模块不读文件）
+_STAMP: Optional[Tuple[int, int]] = None
+_GRAPH: Optional[CompiledGraph] = None
+_init_lock = threading.Lock()
+
+
+def current_graph() -> CompiledGraph:
+    global _GRAPH, _STAMP
+    graph = _GRAPH
+    if graph is None:
+        with _init_lock:
+            if _GRAPH is None:
+                _STAMP = _file_stamp(GRAPH_PATH)  # 先记 mtime 再读文件，读取期间的改动会在下一轮轮询被发现
+                _GRAPH = _initial_graph()
+            graph = _GRAPH
+    return graph
+
+
+def set_graph(graph: CompiledGraph) -> CompiledGraph:
+    """直接替换当前图（测试/基准用），返回旧图。"""
+    global _GRAPH
+    old = current_graph()
+    _GRAPH = graph
+    return old
+
+
+# ---- 热更新 ----
+
+_watch_lock = threading.Lock()
+_watcher: Optional[threading.Thread] = None
+_stop = threading.Event()
+
+
+def reload_if_changed(path: Optional[str] = None) -> bool:
+    """文件 mtime/大小变化时重新编译并替换当前图；返回是否发生了替换。"""
+    global _STAMP
+    path = path or GRAPH_PATH
+    current = current_graph()
+    with _watch_lock:
+        stamp = _file_stamp(path)
+        if stamp is None or stamp == _STAMP:
+            return False
+        _STAMP = stamp  # 无论成败都记下，坏文件不会每轮重试
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                adj = json.load(f)
+            graph = compile_graph(adj)
+        except (OSError, ValueError) as exc:  # json.JSONDecodeError 与 GraphError 都是 ValueError
+            logger.warning("先修图 %s 重新加载失败，继续使用版本 %s: %s", path, current.version, exc)
+            return False
+        if graph.version == current.version:
+            return False
+        set_graph(graph)
+        logger.info("先修图已更新: %s -> %s（%d 个节点）", current.version, graph.version, len(graph))
+        return True
+
+
+def _watch_loop(path: Optional[str], interval: float) -> None:
+    while not _stop.wait(interval):
+        try:
+            reload_if_changed(path)
+            REGISTRY.refresh()
+        except Exception:  # 监视线程不能因意外错误退出
+            logger.exception("先修图监视线程出错")
+
+
+def start_watching(path: Optional[str] = None, interval: float = POLL_INTERVAL) -> None:
+    global _watcher
+    if _watcher is not None and _watcher.is_alive():
+        return
+    _stop.clear()
+    _watcher = threading.Thread(target=_watch_loop, args=(path, interval), name="graph-watcher", daemon=True)
+    _watcher.start()
+
+
+def stop_watching() -> None:
+    global _watcher
+    _stop.set()
+    if _watcher is not None:
+        _watcher.join()
+        _watcher = None
+
+
+
+# ---- 多学科图注册表 ----
+
+_SUBJECT_RE = re.compile(r"^[\w\-.]+$")
+
+
+class _Resident:
+    __slots__ = ("graph", "nbytes", "stamp", "load_ms")
+
+    def __init__(self, graph: CompiledGraph, nbytes: int, stamp: Optional[Tuple[int, int]], load_ms: float) -> None:
+        self.graph = graph
+        self.nbytes = nbytes
+        self.stamp = stamp
+        self.load_ms = load_ms
+
+
+class _Loading:
+    """某个学科正在进行的加载：同一学科的请求共用一把锁，最后一个离开的请求删除它。"""
+
+    __slots__ = ("lock", "waiters")
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.waiters = 0
+
+
+class GraphRegistry:
+    """学科 id -> 编译后的先修图；按需加载，超出内存预算时淘汰最久未用的学科。
+
+    加载锁只在加载进行期间存在，探测不存在的学科或学科被淘汰后不会留下任何条目。
+    """
+
+    def __init__(self, directory: str, *, memory_budget: int = 64 * 1024 * 1024) -> None:
+        if memory_budget <= 0:
+            raise ValueError("memory_budget 必须为正整数")
+        self.directory = directory
+        self.memory_budget = memory_budget
+        self._resident: "OrderedDict[str, _Resident]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: Dict[str, _Loading] = {}
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._reloads = 0
+        self._load_ms_total = 0.0
+
+    def _path(self, subject: str) -> str:
+        if not _SUBJECT_RE.match(subject) or subject.startswith("."):
+            raise UnknownSubjectError(subject)
+        return os.path.join(self.directory, subject + ".json")
+
+    def subjects(self) -> List[str]:
+        """目录中可用的学科（不加载）。"""
+        try:
+            entries = os.listdir(self.directory)
+        except OSError:
+            return []
+        return sorted(name[:-5] for name in entries if name.endswith(".json"))
+
+    def get(self, subject: str) -> CompiledGraph:
+        entry = self._resident.get(subject)
+        if entry is not None:
+            with self._lock:
+                self._hits += 1
+                if subject in self._resident:
+                    self._resident.move_to_end(subject)
+            return entry.graph
+        path = self._path(subject)
+        with self._lock:
+            loading = self._loading.get(subject)
+            if loading is None:
+                loading = self._loading[subject] = _Loading()
+            loading.waiters += 1
+        try:
+            with loading.lock:  # 同一学科只编译一次，其他请求等它完成
+                entry = self._resident.get(subject)
+                if entry is not None:
+                    return entry.graph
+                with self._lock:
+                    self._misses += 1
+                entry = self._load(subject, path)
+                self._install(subject, entry)
+            return entry.graph
+        finally:
+            with self._lock:
+                loading.waiters -= 1
+                if not loading.waiters:
+                    del self._loading[subject]
+
+    def _load(self, subject: str, path: str) -> _Resident:
+        stamp = _file_stamp(path)
+        if stamp is None:
+            raise UnknownSubjectError(subject)
+        start = time.perf_counter()
+        with open(path, "r", encoding="utf-8") as f:
+            adj = json.load(f)
+        graph = compile_graph(adj)
+        load_ms = (time.perf_counter() - start) * 1e3
+        logger.info("已加载学科先修图 %s（%d 个节点，%.1f ms）", subject, len(graph), load_ms)
+        return _Resident(graph, graph.estimate_bytes(), stamp, load_ms)
+
+    def _install(self, subject: str, entry: _Resident) -> None:
+        with self._lock:
+            self._resident[subject] = entry
+            self._resident.move_to_end(subject)
+            self._load_ms_total += entry.load_ms
+            # 至少保留刚装入的这一张，单张超预算也照常服务
+            while len(self._resident) > 1 and self.resident_bytes > self.memory_budget:
+                self._resident.popitem(last=False)
+                self._evictions += 1
+
+    @property
+    def resident_bytes(self) -> int:
+        return sum(entry.nbytes for entry in list(self._resident.values()))
+
+    def refresh(self) -> int:
+        """重新编译文件已变化的常驻学科图；返回替换的数量。文件被删除的学科直接移出。"""
+        replaced = 0
+        for subject, entry in list(self._resident.items()):
+            path = self._path(subject)
+            stamp = _file_stamp(path)
+            if stamp == entry.stamp:
+                continue
+            if stamp is None:
+                with self._lock:
+                    self._resident.pop(subject, None)
+                continue
+            try:
+                fresh = self._load(subject, path)
+            except (OSError, ValueError) as exc:
+                logger.warning("学科先修图 %s 重新加载失败，继续使用版本 %s: %s", subject, entry.graph.version, exc)
+                entry.stamp = stamp
+                continue
+            with self._lock:
+                if subject in self._resident:
+                    self._resident[subject] = fresh
+                    self._reloads += 1
+                    replaced += 1
+        return replaced
+
+    def clear(self) -> None:
+        with self._lock:
+            self._resident.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            resident = {
+                subject: {
+                    "version": entry.graph.version,
+                    "nodes": len(entry.graph),
+                    "edges": entry.graph.edge_count,
+                    "bytes": entry.nbytes,
+                    "load_ms": round(entry.load_ms, 2),
+                }
+                for subject, entry in self._resident.items()
+            }
+            return {
+                "directory": self.directory,
+                "catalog": len(self.subjects()),
+                "resident": resident,
+                "resident_bytes": sum(item["bytes"] for item in resident.values()),
+                "memory_budget": self.memory_budget,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "reloads": self._reloads,
+                "load_ms_total": round(self._load_ms_total, 2),
+            }
+
+
+REGISTRY = GraphRegistry(GRAPH_DIR, memory_budget=int(GRAPH_BUDGET_MB * 1024 * 1024))
+
+
+def graph_for(subject: Optional[str] = None) -> CompiledGraph:
+    """未指定学科时返回默认先修图；否则从注册表取（可能触发加载），不存在抛 UnknownSubjectError。"""
+    if not subject:
+        return current_graph()
+    return REGISTRY.get(subject)
+
+
+def stats() -> Dict[str, Any]:
+    default = current_graph()
+    return {
+        "default": {"version": default.version, "nodes": len(default), "edges": default.edge_count},
+        "subjects": REGISTRY.stats(),
+    }
@@ -1,18 +1,42 @@
-"""知识追踪模块（规则版占位），可替换为 DKVMN/AKT。"""
+"""知识追踪模块（规则版占位），可替换为 DKVMN/AKT。
+
+交互条数达到 ``VECTOR_MIN_INTERACTIONS``（环境变量 ``EDU_TRACE_VECTOR_MIN``）时改用
+``models.trace_scan`` 的批量回放，结果与逐条回放在浮点舍入范围内一致。
+
+``incremental=True`` 的请求从服务端保存的追踪状态（``storage.tracing``）继续：客户端只发送
+``seq`` 大于上次响应 ``cursor`` 的新交互，重复与迟到的事件由 ``TraceLog`` 去重/回退重放。
+
+有 BKT 参数表（``models.bkt``，离线拟合、热加载）时，表中技能用各自的学习率/保持率与初始掌握度，
+响应标注 ``mode="trained"`` 与参数版本；其余技能仍用全局常数。
+
+路由经 ``TRACE_BATCHER``（``models.batching``）调用 ``trace_batch``：同一批里非增量请求的交互合在一起回放，
+总条数达到 ``VECTOR_MIN_INTERACTIONS`` 时走一次批量归约，每个请求自身很短也能用上向量化。
+"""
 
 from __future__ import annotations
 
+import os
 from collections import defaultdict
-from typing import Dict, List
+from operator import attrgetter
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
 
 import database
+from models import batching, bkt, trace_scan
 from schemas import KnowledgeTracingRequest, KnowledgeTracingResponse, SkillInteraction, SkillProgress
+from storage.tracing import TraceStore
+
+LEARNING_RATE = 0.3
+FORGETTING = 0.4
+VECTOR_MIN_INTERACTIONS = int(os.environ.get("EDU_TRACE_VECTOR_MIN", "512"))
+TRACE_STORE = TraceStore(int(os.environ.get("EDU_TRACE_STUDENTS", "10000")))
 
 
-def _update_probability(prob: float, interaction: SkillInteraction) -> float:
+def _update_probability(
+    prob: float, interaction: SkillInteraction, learning_rate: float = LEARNING_RATE, forgetting: float = FORGETTING
+) -> float:
     prob = max(min(prob, 0.999), 0.001)
-    learning_rate = 0.3
-    forgetting = 0.4
 
     if interaction.correct:
         prob = prob + (1 - prob) * learning_rate
@@ -28,19 +52,115 @@ def _update_probability(prob: float, interaction: SkillInteraction) -> float:
     return max(min(prob, 1.0), 0.0)
 
 
-def trace(payload: KnowledgeTracingRequest) -> KnowledgeTracingResponse:
-    prob_map: Dict[str, float] = defaultdict(lambda: 0.5)
-    prob_map.update(payload.prior_mastery)
-    history: Dict[str, List[bool]] = defaultdict(list)
+def _fitted_rates() -> Dict[str, Tuple[float, float, float]]:
+    table = bkt.current_table()
+    return table.skills if table is not None else {}
 
-    for interaction in payload.interactions:
+
+def _replay_scalar(prob_map: Dict[str, float], interactions: Sequence[SkillInteraction]) -> Dict[str, List[bool]]:
+    history: Dict[str, List[bool]] = defaultdict(list)
+    fitted = _fitted_rates()
+    for interaction in interactions:
         prev = prob_map[interaction.skill]
-        updated = _update_probability(prev, interaction)
+        rates = fitted.get(interaction.skill)
+        if rates is None:
+            updated = _update_probability(prev, interaction)
+        else:
+            updated = _update_probability(prev, interaction, rates[1], rates[2])
         prob_map[interaction.skill] = updated
         history[interaction.skill].append(interaction.correct)
+    return history
+
+
+def _replay_vectorized(
+    prob_map: Dict[str, float], interactions: Sequence[SkillInteraction]
+) -> Dict[str, List[bool]]:
+    """与 ``_replay_scalar`` 相同的效果；返回的历史只保留每个技能最近两次对错（判断趋势够用）。"""
+    return _replay_many([(prob_map, interactions)])[0]
+
+
+def _replay_many(
+    jobs: Sequence[Tuple[Dict[str, float], Sequence[SkillInteraction]]]
+) -> List[Dict[str, List[bool]]]:
+    """多组（先验, 交互）一起批量回放：每组的每个技能是一段，所有段在同一次分段归约里完成。"""
+    names: List[List[str]] = []
+    seg_parts: List[np.ndarray] = []
+    base = 0
+    for _, interactions in jobs:
+        skills = list(map(attrgetter("skill"), interactions))
+        codes = {name: base + code for code, name in enumerate(dict.fromkeys(skills))}
+        seg_parts.append(np.fromiter(map(codes.__getitem__, skills), dtype=np.int64, count=len(skills)))
+        names.append(list(codes))  # 编码即首次出现的顺序，与逐条回放往 prob_map 里插入新技能的顺序相同
+        base += len(codes)
+    flat = [interaction for _, interactions in jobs for interaction in interactions]
+    n = len(flat)
+    skill = np.concatenate(seg_parts) if seg_parts else np.empty(0, dtype=np.int64)
+    correct = np.fromiter(map(attrgetter("correct"), flat), dtype=bool, count=n)
+    confidence = np.fromiter(
+        (np.nan if c is None else c for c in map(attrgetter("confidence"), flat)), dtype=np.float64, count=n
+    )
+    spent = map(attrgetter("time_spent_seconds"), flat)
+    slow = np.fromiter(((t or 0) > 120 for t in spent), dtype=bool, count=n)
+
+    order = np.argsort(skill, kind="stable")  # 按技能分组，组内保持时间顺序
+    skill, correct = skill[order], correct[order]
+    all_names = [name for group in names for name in group]
+    fitted = _fitted_rates()
+    if fitted.keys() & set(all_names):
+        rates = np.array([fitted.get(name, (0.5, LEARNING_RATE, FORGETTING))[1:] for name in all_names])
+        learning_rate, forgetting = rates[skill, 0], rates[skill, 1]
+    else:
+        learning_rate, forgetting = LEARNING_RATE, FORGETTING
+    maps = trace_scan.step_maps(correct, confidence[order], slow[order], learning_rate, forgetting)
+    _, composed = trace_scan.reduce_segments(skill, maps)
+
+    prior = np.array(
+        [prob_map[name] for (prob_map, _), group in zip(jobs, names) for name in group], dtype=np.float64
+    )
+    final = trace_scan.apply_maps(prior, composed)
+
+    ends = np.flatnonzero(np.r_[skill[1:] != skill[:-1], True])
+    starts = np.r_[0, ends[:-1] + 1]
+    histories: List[Dict[str, List[bool]]] = []
+    code = 0
+    for (prob_map, _), group in zip(jobs, names):
+        history: Dict[str, List[bool]] = {}
+        for name in group:
+            prob_map[name] = float(final[code])
+            history[name] = correct[max(starts[code], ends[code] - 1) : ends[code] + 1].tolist()
+            code += 1
+        histories.append(history)
+    return histories
+
+
+def _replay(prob_map: Dict[str, float], interactions: Sequence[SkillInteraction]) -> Dict[str, List[bool]]:
+    if len(interactions) >= VECTOR_MIN_INTERACTIONS:
+        return _replay_vectorized(prob_map, interactions)
+    return _replay_scalar(prob_map, interactions)
 
+
+def _fitted_priors(table: Optional[bkt.BKTTable], interactions: Sequence[SkillInteraction]) -> Dict[str, float]:
+    """本次交互涉及、参数表里有初始掌握度的技能（按首次出现顺序）。"""
+    if table is None:
+        return {}
+    return {
+        skill: table.skills[skill][0]
+        for skill in dict.fromkeys(map(attrgetter("skill"), interactions))
+        if skill in table.skills
+    }
+
+
+def _model_tag(table: Optional[bkt.BKTTable], skills) -> Tuple[str, str]:
+    if table is not None and any(skill in table.skills for skill in skills):
+        return "trained", table.model_version
+    return "rule", "rule-0.1"
+
+
+def _skill_progress(
+    student_id: str, probabilities: Dict[str, float], history: Dict[str, List[bool]]
+) -> List[SkillProgress]:
     skills: List[SkillProgress] = []
-    for skill, probability in prob_map.items():
+    for skill, probability in probabilities.items():
         recent = history.get(skill, [])
         if len(recent) >= 2 and recent[-2:] == [True, True]:
             trend = "上升"
@@ -56,7 +176,7 @@ def trace(payload: KnowledgeTracingRequest) -> KnowledgeTracingResponse:
         else:
             action = "回到基础例题，配合讲解反馈。"
 
-        database.set_mastery(payload.student_id, skill, probability)
+        database.set_mastery(student_id, skill, probability)
         skills.append(
             SkillProgress(
                 skill=skill,
@@ -65,13 +185,105 @@ def trace(payload: KnowledgeTracingRequest) -> KnowledgeTracingResponse:
                 next_action=action,
             )
         )
+    return skills
+
+
+def _trace_incremental(payload: KnowledgeTracingRequest) -> KnowledgeTracingResponse:
+    """从服务端保存的追踪状态继续，只应用本次新到的交互；返回受本次交互影响的技能。"""
+    log = TRACE_STORE.get(payload.student_id, lambda: database.dump_mastery(payload.student_id))
+    log.seed(payload.prior_mastery)  # 数据库里已有的掌握度优先，请求里的先验只补充新技能
+    table = bkt.current_table()
+    log.seed(_fitted_priors(table, payload.interactions))
+    touched, duplicates = log.apply(payload.interactions, _replay)
+    with log.lock:
+        probabilities = {skill: log.value(skill) for skill in touched}
+        history = {skill: list(log.recent.get(skill, ())) for skill in touched}
+        cursor = log.cursor
+    skills = _skill_progress(payload.student_id, probabilities, history)
+    mode, model_version = _model_tag(table, touched)
+    return KnowledgeTracingResponse(
+        request_id=payload.request_id,
+        student_id=payload.student_id,
+        skills=skills,
+        recommended_sequence=[item.skill for item in sorted(skills, key=lambda s: s.probability_mastery)],
+        cursor=cursor if cursor >= 0 else None,
+        duplicates=duplicates,
+        mode=mode,
+        model_version=model_version,
+    )
+
+
+def _initial_probabilities(payload: KnowledgeTracingRequest, table: Optional[bkt.BKTTable]) -> Dict[str, float]:
+    prob_map: Dict[str, float] = defaultdict(lambda: 0.5)
+    prob_map.update(payload.prior_mastery)
+    fitted = _fitted_priors(table, payload.interactions)
+    if fitted:
+        # 新技能按首次出现顺序插入（与逐条回放插入的顺序相同），有拟合值的用拟合的初始掌握度
+        for skill in dict.fromkeys(map(attrgetter("skill"), payload.interactions)):
+            if skill not in prob_map:
+                prob_map[skill] = fitted.get(skill, 0.5)
+    return prob_map
+
+
+def _trace_response(
+    payload: KnowledgeTracingRequest,
+    prob_map: Dict[str, float],
+    history: Dict[str, List[bool]],
+    table: Optional[bkt.BKTTable],
+) -> KnowledgeTracingResponse:
+    skills = _skill_progress(payload.student_id, prob_map, history)
 
     recommended_sequence = [item.skill for item in sorted(skills, key=lambda s: s.probability_mastery)]
+    mode, model_version = _model_tag(table, prob_map)
 
     return KnowledgeTracingResponse(
         request_id=payload.request_id,
         student_id=payload.student_id,
         skills=skills,
         recommended_sequence=recommended_sequence,
-        model_version="rule-0.1",
+        mode=mode,
+        model_version=model_version,
     )
+
+
+def trace(payload: KnowledgeTracingRequest) -> KnowledgeTracingResponse:
+    if payload.incremental:
+        return _trace_incremental(payload)
+    table = bkt.current_table()
+    prob_map = _initial_probabilities(payload, table)
+    history = _replay(prob_map, payload.interactions)
+    return _trace_response(payload, prob_map, history, table)
+
+
+def trace_batch(payloads: Sequence[KnowledgeTracingRequest]) -> List[Union[KnowledgeTracingResponse, Exception]]:
+    """``models.batching`` 的批量入口：非增量请求的交互合在一起回放（总条数够多时走一次批量归约），
+    增量请求逐个从各自的追踪状态继续。每个请求单独隔离异常，出错的位置返回异常实例。"""
+    table = bkt.current_table()
+    results: List[Union[KnowledgeTracingResponse, Exception, None]] = [None] * len(payloads)
+    pending: List[int] = []
+    jobs: List[Tuple[Dict[str, float], Sequence[SkillInteraction]]] = []
+    for index, payload in enumerate(payloads):
+        try:
+            if payload.incremental:
+                results[index] = _trace_incremental(payload)
+            else:
+                jobs.append((_initial_probabilities(payload, table), payload.interactions))
+                pending.append(index)
+        except Exception as exc:
+            results[index] = exc
+    histories: Optional[List[Dict[str, List[bool]]]] = None
+    if sum(len(interactions) for _, interactions in jobs) >= VECTOR_MIN_INTERACTIONS:
+        try:
+            histories = _replay_many(jobs)
+        except Exception:  # 批量回放出错时退回逐个回放，把异常落到具体请求上
+            histories = None
+    for k, (index, (prob_map, interactions)) in enumerate(zip(pending, jobs)):
+        try:
+            history = histories[k] if histories is not None else _replay_scalar(prob_map, interactions)
+            results[index] = _trace_response(payloads[index], prob_map, history, table)
+        except Exception as exc:
+            results[index] = exc
+    return results  # type: ignore[return-value]
+
+
+TRACE_BATCHER = batching.MicroBatcher("trace", trace_batch, pure=False)
@@ -0,0 +1,168 @@
+"""纯接口的响应记忆化：同样的请求（忽略 ``request_id``）直接返回上次的响应。
+
+每个 POST 路由都要声明自己是哪一类，``check_routes`` 在装配应用时检查，漏标的路由直接报错：
+- ``@pure(name, version=..., when=...)``：响应只取决于请求体（以及 ``version`` 返回的外部状态版本，如先修图版本、
+  词表版本）。键是“接口名 + 版本 + 校验后请求体的规范形式”（去掉 ``request_id``，与字典键顺序无关）；
+  ``when`` 返回 False 的请求不走缓存。
+  命中时复制缓存的响应并换上本次的 ``request_id``；
+- ``@impure``：会读写 ``database`` 等可变状态，不记忆化。
+
+外部状态换版本（先修图热更新、替换词表）后旧条目不会再被查到，等 TTL 或 LRU 淘汰。
+缓存由 ``EDU_MEMO_ENTRIES``（默认 10000 条）、``EDU_MEMO_MB``（默认 32）与 ``EDU_MEMO_TTL``（默认 300 秒）限制，
+``EDU_MEMO_ENTRIES=0`` 关闭记忆化。
+"""
+
+from __future__ import annotations
+
+import functools
+import inspect
+import os
+import threading
+import typing
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional
+
+from pydantic import BaseModel
+
+from models.cache import TTLCache
+
+MEMO_ENTRIES = int(os.environ.get("EDU_MEMO_ENTRIES", "10000"))
+MEMO_BYTES = int(float(os.environ.get("EDU_MEMO_MB", "32")) * 1024 * 1024)
+MEMO_TTL = float(os.environ.get("EDU_MEMO_TTL", "300"))
+ENTRY_OVERHEAD = 256  # 元组与 OrderedDict 节点的大致开销；键按请求体的 JSON 长度估算
+
+MEMO_CACHE: Optional[TTLCache] = TTLCache(MEMO_ENTRIES, MEMO_BYTES, MEMO_TTL) if MEMO_ENTRIES > 0 else None
+
+PURE = "pure"
+IMPURE = "impure"
+
+
+def _frozen(value: Any) -> Hashable:
+    """把请求体转成可哈希的规范形式：字典 -> frozenset（与键顺序无关），列表 -> tuple，嵌套模型按字段展开。
+
+    缓存只在本进程内，键直接用这个结构：字典查找按它的哈希定位、按完整内容比较，不会因摘要碰撞串结果；
+    全是标量的字典/列表一次在 C 层完成，不逐项递归。
+    """
+    if isinstance(value, BaseModel):
+        value = value.__dict__
+    if isinstance(value, dict):
+        try:
+            return frozenset(value.items())
+        except TypeError:
+            return frozenset((k, _frozen(v)) for k, v in value.items())
+    if isinstance(value, list):
+        frozen = tuple(value)
+        try:
+            hash(frozen)
+            return frozen
+        except TypeError:
+            return tuple(_frozen(v) for v in value)
+    return value
+
+
+def request_key(payload: BaseModel) -> Hashable:
+    """校验后请求体（去掉 ``request_id``）的规范键，与字段顺序、字典键顺序无关。"""
+    fields = dict(payload.__dict__)
+    fields.pop("request_id", None)
+    return _frozen(fields)
+
+
+class _EndpointStats:
+    __slots__ = ("hits", "misses", "bypassed")
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+
+_STATS: Dict[str, _EndpointStats] = {}
+_STATS_LOCK = threading.Lock()
+
+
+def _count(name: str, field: str) -> None:
+    with _STATS_LOCK:
+        stats = _STATS[name]
+        setattr(stats, field, getattr(stats, field) + 1)
+
+
+def pure(
+    name: str,
+    *,
+    version: Optional[Callable[[Any], Hashable]] = None,
+    when: Optional[Callable[[Any], bool]] = None,
+) -> Callable[[Callable], Callable]:
+    """声明路由是纯函数并记忆化响应。被装饰的函数只接收一个 Pydantic 请求体参数，返回 ``BaseResponse`` 子类。
+
+    ``version(payload)`` 抛异常（如未知学科）时本次不走缓存，由路由自己处理。
+    """
+
+    def decorate(fn: Callable) -> Callable:
+        _STATS.setdefault(name, _EndpointStats())
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            # FastAPI 与 MCP 的进程内调用都按参数名传入请求体
+            payload: BaseModel = args[0] if args else next(iter(kwargs.values()))
+            cache = MEMO_CACHE
+            if cache is None or (when is not None and not when(payload)):
+                _count(name, "bypassed")
+                return fn(*args, **kwargs)
+            try:
+                key = (name, version(payload) if version is not None else None, request_key(payload))
+                hash(key)
+            except Exception:
+                _count(name, "bypassed")
+                return fn(*args, **kwargs)
+            cached = cache.get(key)
+            if cached is not None:
+                _count(name, "hits")
+                return cached.model_copy(update={"request_id": payload.request_id})
+            _count(name, "misses")
+            response = fn(*args, **kwargs)
+            stored = response.model_copy(update={"request_id": None})
+            nbytes = len(stored.model_dump_json()) + len(payload.model_dump_json()) + ENTRY_OVERHEAD
+            cache.put(key, stored, nbytes)
+            return response
+
+        # 路由模块用了 ``from __future__ import annotations``：FastAPI 会在本模块的全局命名空间里解析字符串注解，
+        # 这里先按原函数解析好，签名里直接放类型
+        hints = typing.get_type_hints(fn)
+        signature = inspect.signature(fn)
+        wrapper.__signature__ = signature.replace(  # type: ignore[attr-defined]
+            parameters=[p.replace(annotation=hints.get(p.name, p.annotation)) for p in signature.parameters.values()],
+            return_annotation=hints.get("return", signature.return_annotation),
+        )
+        wrapper.__memo__ = PURE  # type: ignore[attr-defined]
+        return wrapper
+
+    return decorate
+
+
+def impure(fn: Callable) -> Callable:
+    """声明路由会读写可变状态（``database`` 等），不记忆化。"""
+    fn.__memo__ = IMPURE  # type: ignore[attr-defined]
+    return fn
+
+
+def check_routes(routes: Iterable[Any]) -> None:
+    """所有 POST 路由都必须用 ``pure`` 或 ``impure`` 声明过，否则抛 RuntimeError。"""
+    missing: List[str] = [
+        route.path
+        for route in routes
+        if "POST" in getattr(route, "methods", ()) and getattr(route.endpoint, "__memo__", None) not in (PURE, IMPURE)
+    ]
+    if missing:
+        raise RuntimeError(f"以下 POST 路由未声明 @pure / @impure: {', '.join(missing)}")
+
+
+def clear() -> None:
+    if MEMO_CACHE is not None:
+        MEMO_CACHE.clear()
+
+
+def stats() -> Dict[str, Any]:
+    with _STATS_LOCK:
+        endpoints = {
+            name: {"hits": s.hits, "misses": s.misses, "bypassed": s.bypassed} for name, s in sorted(_STATS.items())
+        }
+    return {"enabled": MEMO_CACHE is not None, "cache": MEMO_CACHE.stats() if MEMO_CACHE is not None else None, "endpoints": endpoints}
@@ -0,0 +1,155 @@
+"""离线拟合得到的模型参数表（JSON 文件）的加载与热替换。
+
+``ParamFile`` 包装一个参数文件与把 JSON 解析结果转成查询对象的 ``loader``：
+- 首次 ``current()`` 时加载，文件不存在返回 None（调用方回退到规则实现）；
+- ``version`` 取文件内容的哈希（``p`` + 10 位十六进制），多 worker 读同一文件得到相同版本；
+- 后台线程（``start_watching``）按 mtime 轮询所有已创建的参数文件，变化后重新加载并整体替换，
+  加载失败只记日志，继续使用旧参数。与先修图的热更新方式相同。
+
+离线拟合任务共用的输入输出：``read_rows`` 逐行读取 CSV / JSONL 日志，``write_params`` 原子写出参数文件。
+"""
+
+from __future__ import annotations
+
+import csv
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Generic, Iterator, List, Optional, Tuple, TypeVar
+
+from models.knowledge_graph import POLL_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_UNLOADED = object()
+
+
+def _file_stamp(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def content_version(raw: bytes) -> str:
+    return "p" + hashlib.sha1(raw).hexdigest()[:10]
+
+
+def read_rows(path: str) -> Iterator[Dict[str, Any]]:
+    """逐行读取日志：``.jsonl`` 每行一个对象（跳过空行），其他按带表头的 CSV。"""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+def parse_bool(value: Any) -> bool:
+    """CSV 里的对错是字符串（1/true/t/yes 为真），JSONL 里是布尔或数字。"""
+    return value.strip().lower() in ("1", "true", "t", "yes") if isinstance(value, str) else bool(value)
+
+
+def write_params(params: Dict[str, Any], path: str) -> None:
+    """先写临时文件再原子替换，监视线程不会读到半个文件。"""
+    tmp = f"{path}.tmp-{os.getpid()}"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(params, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class ParamFile(Generic[T]):
+    """参数文件的当前内容；``loader(data, version)`` 把 JSON 转成只读查询对象，格式错误时抛 ValueError。"""
+
+    def __init__(self, name: str, path: str, loader: Callable[[Dict[str, Any], str], T]) -> None:
+        self.name = name
+        self.path = path
+        self.loader = loader
+        self._value: Any = _UNLOADED
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+        self.reloads = 0
+        _WATCHED.append(self)
+
+    def current(self) -> Optional[T]:
+        value = self._value
+        if value is _UNLOADED:
+            self.reload_if_changed()
+            value = self._value
+        return None if value is _UNLOADED else value
+
+    def set(self, value: Optional[T]) -> Optional[T]:
+        """直接替换当前参数（测试/基准或拟合任务在进程内热替换用），返回旧值。"""
+        with self._lock:
+            old = self._value
+            self._value = value
+        return None if old is _UNLOADED else old
+
+    def reload_if_changed(self) -> bool:
+        """文件 mtime/大小变化时重新加载并替换；返回是否发生了替换。"""
+        with self._lock:
+            stamp = _file_stamp(self.path)
+            if stamp == self._stamp and self._value is not _UNLOADED:
+                return False
+            self._stamp = stamp  # 无论成败都记下，坏文件不会每轮重试
+            if stamp is None:
+                if self._value is _UNLOADED:
+                    self._value = None
+                return False
+            try:
+                with open(self.path, "rb") as f:
+                    raw = f.read()
+                value = self.loader(json.loads(raw), content_version(raw))
+            except (OSError, ValueError, KeyError, TypeError) as exc:
+                logger.warning("%s 参数文件 %s 加载失败，继续使用旧参数: %s", self.name, self.path, exc)
+                if self._value is _UNLOADED:
+                    self._value = None
+                return False
+            self._value = value
+            self.reloads += 1
+            logger.info("%s 参数已更新: %s", self.name, getattr(value, "version", "?"))
+            return True
+
+
+_WATCHED: List[ParamFile] = []
+_watcher: Optional[threading.Thread] = None
+_stop = threading.Event()
+
+
+def _watch_loop(interval: float) -> None:
+    while not _stop.wait(interval):
+        for param_file in list(_WATCHED):
+            try:
+                param_file.reload_if_changed()
+            except Exception:  # 监视线程不能因意外错误退出
+                logger.exception("%s 参数监视出错", param_file.name)
+
+
+def start_watching(interval: float = POLL_INTERVAL) -> None:
+    global _watcher
+    if _watcher is not None and _watcher.is_alive():
+        return
+    _stop.clear()
+    _watcher = threading.Thread(target=_watch_loop, args=(interval,), name="param-watcher", daemon=True)
+    _watcher.start()
+
+
+def stop_watching() -> None:
+    global _watcher
+    _stop.set()
+    if _watcher is not None:
+        _watcher.join()
+        _watcher = None
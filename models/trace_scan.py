@@ -0,0 +1,76 @@
+"""知识追踪的批量回放：把长交互序列按技能分组，用 NumPy 一次算出每个技能的最终掌握概率。
+
+``knowledge_tracking._update_probability`` 的每一步都是“钳位 → 仿射 → 钳位”：
+
+    p' = clip(a · clip(p, 0.001, 0.999) + b, 0, 1)
+
+其中 a、b 只由该次交互（对错、自信度、是否超时）决定，且 a ≥ 0。形如
+``p ↦ clip(a·p + b, lo, hi)`` 的映射在复合下封闭（a ≥ 0 时内层钳位可以移到外层），
+所以同一技能的整段序列可以复合成一个映射，再作用到先验上。复合满足结合律，
+这里按“相邻两步两两合并”的方式在所有技能上同时做分段归约，总工作量 O(n)，轮数 O(log n)。
+
+结果与逐条回放只差浮点舍入（约 1e-12 量级）。
+"""
+
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+
+Maps = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+def step_maps(
+    correct: np.ndarray,
+    confidence: np.ndarray,
+    slow: np.ndarray,
+    learning_rate: np.ndarray | float,
+    forgetting: np.ndarray | float,
+) -> Maps:
+    """每次交互对应的映射 (a, b, lo, hi)；``confidence`` 用 NaN 表示未提供。"""
+    learning_rate = np.broadcast_to(np.asarray(learning_rate, dtype=np.float64), correct.shape)
+    forgetting = np.broadcast_to(np.asarray(forgetting, dtype=np.float64), correct.shape)
+    a = np.where(correct, 1.0 - learning_rate, forgetting)
+    b = np.where(correct, learning_rate, 0.0)
+    has_conf = ~np.isnan(confidence)
+    a = np.where(has_conf, 0.7 * a, a)
+    b = np.where(has_conf, 0.7 * b + 0.3 * np.nan_to_num(confidence), b)
+    b = b - 0.05 * slow
+    # 输入先钳到 [0.001, 0.999]，输出再钳到 [0, 1]；a ≥ 0 时等价于对 a·p + b 钳到下面的区间
+    lo = np.clip(a * 0.001 + b, 0.0, 1.0)
+    hi = np.clip(a * 0.999 + b, 0.0, 1.0)
+    return a, b, lo, hi
+
+
+def reduce_segments(segments: np.ndarray, maps: Maps) -> Tuple[np.ndarray, Maps]:
+    """按时间顺序复合每段（``segments`` 非降序、段内保持原顺序）的映射。
+
+    返回 (段号, 复合后的映射)，每段一个元素。
+    """
+    seg = segments
+    a, b, lo, hi = (np.array(m, dtype=np.float64) for m in maps)
+    offset = 0
+    while seg.size > 1 and (seg[1:] == seg[:-1]).any():
+        # 奇偶两种配对轮流使用，长度为 2 且起点对不齐的段下一轮也能合并
+        first = np.arange(offset, seg.size - 1, 2)
+        first = first[seg[first] == seg[first + 1]]
+        offset ^= 1
+        if not first.size:
+            continue
+        second = first + 1
+        ga, gb, glo, ghi = a[second], b[second], lo[second], hi[second]
+        # 先 first 后 second：g(f(p)) = clip(ga·(af·p + bf) + gb, clip(ga·lof + gb, g区间), clip(ga·hif + gb, g区间))
+        lo[first] = np.clip(ga * lo[first] + gb, glo, ghi)
+        hi[first] = np.clip(ga * hi[first] + gb, glo, ghi)
+        b[first] = ga * b[first] + gb
+        a[first] = ga * a[first]
+        keep = np.ones(seg.size, dtype=bool)
+        keep[second] = False
+        seg, a, b, lo, hi = seg[keep], a[keep], b[keep], lo[keep], hi[keep]
+    return seg, (a, b, lo, hi)
+
+
+def apply_maps(prior: np.ndarray, maps: Maps) -> np.ndarray:
+    a, b, lo, hi = maps
+    return np.minimum(np.maximum(a * prior + b, lo), hi)
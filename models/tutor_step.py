@@ -0,0 +1,92 @@
+"""一步式教学：在服务端串起知识追踪、认知诊断、情感分析与路径规划。
+
+子请求由已校验的 TutorStepRequest 字段直接构造（model_construct），不再重复校验；
+规划阶段不回传 mastery，而是让 path_planning 通过 student_id 读取刚写入的内存状态。
+``subject`` 在图目录中有对应先修图时，诊断与规划用同一门课程；只作为诊断标签（没有图文件）时规划仍用默认先修图，
+响应里规划的 model_version 带有实际所用先修图的版本。
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+from models import cognitive_diagnosis, emotion_analysis, knowledge_tracking, path_planning
+from models.knowledge_graph import UnknownSubjectError, graph_for
+from schemas import (
+    AffectiveAnalysisRequest,
+    CognitiveDiagnosisRequest,
+    KnowledgeTracingRequest,
+    PathRequest,
+    TutorStepRequest,
+    TutorStepResponse,
+)
+
+
+def _plan_subject(subject: Optional[str]) -> Optional[str]:
+    if not subject:
+        return None
+    try:
+        graph_for(subject)  # 在写入任何状态之前加载，规划时命中注册表
+    except UnknownSubjectError:
+        return None
+    return subject
+
+
+def step(payload: TutorStepRequest) -> TutorStepResponse:
+    plan_subject = _plan_subject(payload.subject)
+    tracing = None
+    if payload.interactions or payload.prior_mastery:
+        tracing = knowledge_tracking.trace(
+            KnowledgeTracingRequest.model_construct(
+                request_id=payload.request_id,
+                student_id=payload.student_id,
+                interactions=payload.interactions,
+                prior_mastery=payload.prior_mastery,
+            )
+        )
+
+    diagnosis = None
+    if payload.concept_snapshots:
+        diagnosis = cognitive_diagnosis.diagnose(
+            CognitiveDiagnosisRequest.model_construct(
+                request_id=payload.request_id,
+                student_id=payload.student_id,
+                subject=payload.subject or "",
+                concept_snapshots=payload.concept_snapshots,
+                recent_behaviors=None,
+            )
+        )
+
+    affect = None
+    if payload.current_task is not None:
+        affect = emotion_analysis.analyze_affective_state(
+            AffectiveAnalysisRequest.model_construct(
+                request_id=payload.request_id,
+                student_id=payload.student_id,
+                current_task=payload.current_task,
+                affective_signals=payload.affective_signals,
+                recent_performance=payload.recent_performance,
+            )
+        )
+
+    # mastery 留空：plan 会用 student_id 从“数据库”读取上面刚更新的掌握度
+    plan = path_planning.plan(
+        PathRequest.model_construct(
+            request_id=payload.request_id,
+            student_id=payload.student_id,
+            mastery={},
+            subject=plan_subject,
+            threshold=payload.threshold,
+            max_recommend=payload.max_recommend,
+        )
+    )
+
+    return TutorStepResponse(
+        request_id=payload.request_id,
+        student_id=payload.student_id,
+        tracing=tracing,
+        diagnosis=diagnosis,
+        affect=affect,
+        plan=plan,
+        model_version="step-0.1",
+    )
@@ -1,3 +1,3 @@
-from . import cognitive, tracking, emotion, planning
+from . import cognitive, tracking, emotion, planning, step, stats
 
-__all__ = ["cognitive", "tracking", "emotion", "planning"]
+__all__ = ["cognitive", "tracking", "emotion", "planning", "step", "stats"]
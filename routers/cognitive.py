@@ -4,10 +4,13 @@ from fastapi import APIRouter
 
 from schemas import CognitiveDiagnosisRequest, CognitiveDiagnosisResponse
 from models import cognitive_diagnosis
+from models.memo import impure
+from routers.responses import ModelRoute
 
-router = APIRouter()
+router = APIRouter(route_class=ModelRoute)
 
 
 @router.post("", response_model=CognitiveDiagnosisResponse, summary="认知诊断")
+@impure
 def diagnose(payload: CognitiveDiagnosisRequest) -> CognitiveDiagnosisResponse:
-    return cognitive_diagnosis.diagnose(payload)
+    return cognitive_diagnosis.DIAGNOSE_BATCHER.call(payload)
@@ -2,17 +2,42 @@ from __future__ import annotations
 
 from fastapi import APIRouter
 
-from schemas import AffectiveAnalysisRequest, AffectiveAnalysisResponse, SentimentRequest, SentimentResponse
+from schemas import (
+    AffectiveAnalysisRequest,
+    AffectiveAnalysisResponse,
+    AffectSummaryRequest,
+    AffectSummaryResponse,
+    SentimentBatchRequest,
+    SentimentBatchResponse,
+    SentimentRequest,
+    SentimentResponse,
+)
 from models import emotion_analysis
+from models.memo import impure, pure
+from routers.responses import ModelRoute
 
-router = APIRouter()
+router = APIRouter(route_class=ModelRoute)
 
 
 @router.post("", response_model=AffectiveAnalysisResponse, summary="情感状态识别")
+@impure
 def analyze_affective(payload: AffectiveAnalysisRequest) -> AffectiveAnalysisResponse:
     return emotion_analysis.analyze_affective_state(payload)
 
 
 @router.post("/sentiment", response_model=SentimentResponse, summary="情感分类")
+@pure("sentiment", version=lambda payload: emotion_analysis.lexicon_version())
 def analyze_sentiment(payload: SentimentRequest) -> SentimentResponse:
-    return emotion_analysis.analyze_sentiment(payload)
+    return emotion_analysis.SENTIMENT_BATCHER.call(payload)
+
+
+@router.post("/sentiment/batch", response_model=SentimentBatchResponse, summary="批量文本情感分类")
+@pure("sentiment_batch", version=lambda payload: emotion_analysis.lexicon_version())
+def analyze_sentiment_batch(payload: SentimentBatchRequest) -> SentimentBatchResponse:
+    return emotion_analysis.analyze_sentiment_batch(payload)
+
+
+@router.post("/summary", response_model=AffectSummaryResponse, summary="时间窗口情绪汇总")
+@impure
+def summarize_affect(payload: AffectSummaryRequest) -> AffectSummaryResponse:
+    return emotion_analysis.summarize_affect(payload)
@@ -1,13 +1,38 @@
 from __future__ import annotations
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 
-from schemas import PathRequest, PathResponse
-from models import path_planning
+from schemas import PathBatchRequest, PathBatchResponse, PathRequest, PathResponse
+from models import cohort_planning, path_planning
+from models.knowledge_graph import UnknownSubjectError, graph_for
+from models.memo import pure
+from routers.responses import ModelRoute
 
-router = APIRouter()
+router = APIRouter(route_class=ModelRoute)
 
 
 @router.post("", response_model=PathResponse, summary="学习路径规划")
+# 请求里给了掌握度（此时忽略 student_id）或没有 student_id 时，结果只取决于请求与先修图
+@pure(
+    "plan",
+    version=lambda payload: graph_for(payload.subject).version,
+    when=lambda payload: bool(payload.mastery) or not payload.student_id,
+)
 def recommend_path(payload: PathRequest) -> PathResponse:
-    return path_planning.plan(payload)
+    try:
+        return path_planning.plan(payload)
+    except UnknownSubjectError:
+        raise HTTPException(status_code=404, detail=f"未找到学科 {payload.subject} 的先修图")
+
+
+@router.post("/batch", response_model=PathBatchResponse, summary="全班批量路径规划")
+@pure(
+    "plan_batch",
+    version=lambda payload: graph_for(payload.subject).version,
+    when=lambda payload: all(student.mastery or not student.student_id for student in payload.students),
+)
+def recommend_paths(payload: PathBatchRequest) -> PathBatchResponse:
+    try:
+        return cohort_planning.plan_batch(payload)
+    except UnknownSubjectError:
+        raise HTTPException(status_code=404, detail=f"未找到学科 {payload.subject} 的先修图")
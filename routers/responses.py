@@ -0,0 +1,96 @@
+"""路由的响应快速路径：模型层返回的响应对象不再经 FastAPI 重新校验，直接由 pydantic-core 序列化成 JSON。
+
+FastAPI 默认对返回值做三遍工作：按 ``response_model`` 重新校验（同步路由还要切到线程池）、转成 JSON 兼容的
+Python 对象、再由 ``json.dumps`` 编码。模型层用构造函数建响应时已经按字段校验过一次（嵌套的模型实例不会再校验；
+pydantic-core 的校验构造比纯 Python 的 ``model_construct`` 还快，所以模型层照常用构造函数），结果是可信的。
+``ModelRoute`` 在端点返回值的类型恰好是 ``response_model`` 时把它包成 ``ModelJSONResponse``，一次写出字节：
+- 输出与默认路径逐字节相同（见 ``benchmarks/response_serialization.py`` 的金标准），唯一的差别是绝对值小于 1e-4 的
+  非零浮点数写成小数而不是指数（``0.00001`` / ``1e-05``，解析后数值相同）；模型层算出的数值都已保留 3 位小数，
+  只有原样回显的请求字段可能遇到；
+- 返回值是其他类型（子类、字典等）或路由配置了 include/exclude 等选项时仍走默认路径；
+- ``route.endpoint`` 保持原函数，MCP 进程内直连与 ``models.memo`` 看到的仍是返回模型对象的端点。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import functools
+from typing import Any, Callable, Mapping, Optional, Type
+
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+from starlette.background import BackgroundTask
+from starlette.responses import JSONResponse, Response
+
+
+class ModelJSONResponse(Response):
+    """把 Pydantic 模型直接序列化为 JSON 字节；``model`` 保留原对象。"""
+
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        model: BaseModel,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        background: Optional[BackgroundTask] = None,
+    ) -> None:
+        self.model = model
+        super().__init__(model, status_code, headers, None, background)
+
+    def render(self, content: Any) -> bytes:
+        return content.__pydantic_serializer__.to_json(content, by_alias=True)
+
+
+def _fast_endpoint(endpoint: Callable[..., Any], response_model: Type[BaseModel], status_code: int) -> Callable[..., Any]:
+    # 只认类型完全相同的返回值：子类可能带有 response_model 会过滤掉的字段
+    if asyncio.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def call_async(*args: Any, **kwargs: Any) -> Any:
+            result = await endpoint(*args, **kwargs)
+            return ModelJSONResponse(result, status_code) if type(result) is response_model else result
+
+        return call_async
+
+    @functools.wraps(endpoint)
+    def call(*args: Any, **kwargs: Any) -> Any:
+        result = endpoint(*args, **kwargs)
+        return ModelJSONResponse(result, status_code) if type(result) is response_model else result
+
+    return call
+
+
+class ModelRoute(APIRoute):
+    """``APIRouter(route_class=ModelRoute)``：返回 ``response_model`` 实例的路由跳过重新校验，直接写出 JSON。"""
+
+    @property
+    def fast_path(self) -> bool:
+        model = self.response_model
+        return (
+            isinstance(model, type)
+            and issubclass(model, BaseModel)
+            and isinstance(self.response_class, DefaultPlaceholder)
+            and self.response_class.value is JSONResponse
+            and self.response_model_include is None
+            and self.response_model_exclude is None
+            and self.response_model_by_alias
+            and not self.response_model_exclude_unset
+            and not self.response_model_exclude_defaults
+            and not self.response_model_exclude_none
+        )
+
+    def get_route_handler(self) -> Callable:
+        if not self.fast_path:
+            return super().get_route_handler()
+        # 请求体解析、依赖注入仍按原端点生成的 dependant 处理，只替换实际调用的函数
+        dependant = self.dependant
+        self.dependant = dataclasses.replace(
+            dependant, call=_fast_endpoint(dependant.call, self.response_model, self.status_code or 200)
+        )
+        try:
+            return super().get_route_handler()
+        finally:
+            self.dependant = dependant
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from fastapi import APIRouter
+
+import database
+from models import batching, knowledge_graph, knowledge_tracking, memo, path_planning
+
+router = APIRouter()
+
+
+@router.get("/store", summary="存储缓存统计（命中/未命中/淘汰）")
+def store_stats() -> Dict[str, int]:
+    return database.stats()
+
+
+@router.get("/graphs", summary="先修图注册表统计（常驻学科/加载耗时/淘汰）")
+def graph_stats() -> Dict[str, Any]:
+    return knowledge_graph.stats()
+
+
+@router.get("/cache", summary="结果缓存统计（命中率/淘汰）")
+def cache_stats() -> Dict[str, Any]:
+    return {
+        "plan": path_planning.PLAN_CACHE.stats(),
+        "trace": knowledge_tracking.TRACE_STORE.stats(),
+        "memo": memo.stats(),
+    }
+
+
+@router.get("/batch", summary="推理微批统计（批次数/平均批大小/排队时间）")
+def batch_stats() -> Dict[str, Any]:
+    return batching.stats()
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, HTTPException
+
+from schemas import TutorStepRequest, TutorStepResponse
+from models import tutor_step
+from models.knowledge_graph import UnknownSubjectError
+from models.memo import impure
+from routers.responses import ModelRoute
+
+router = APIRouter(route_class=ModelRoute)
+
+
+@router.post("", response_model=TutorStepResponse, summary="一步式教学：追踪+诊断+情感+规划")
+@impure
+def step(payload: TutorStepRequest) -> TutorStepResponse:
+    try:
+        return tutor_step.step(payload)
+    except UnknownSubjectError:
+        raise HTTPException(status_code=404, detail=f"未找到学科 {payload.subject} 的先修图")
@@ -4,10 +4,13 @@ from fastapi import APIRouter
 
 from schemas import KnowledgeTracingRequest, KnowledgeTracingResponse
 from models import knowledge_tracking
+from models.memo import impure
+from routers.responses import ModelRoute
 
-router = APIRouter()
+router = APIRouter(route_class=ModelRoute)
 
 
 @router.post("", response_model=KnowledgeTracingResponse, summary="知识追踪")
+@impure
 def trace(payload: KnowledgeTracingRequest) -> KnowledgeTracingResponse:
-    return knowledge_tracking.trace(payload)
+    return knowledge_tracking.TRACE_BATCHER.call(payload)
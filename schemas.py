@@ -51,11 +51,19 @@ class StudentSchema(BaseModel):
 # ---- 认知诊断 ----
 
 
+class ItemResponse(BaseModel):
+    item_id: str
+    correct: bool
+
+
 class ConceptSnapshot(BaseModel):
     concept_name: str
     attempts: int = Field(gt=0)
     correct: int = Field(ge=0)
     misconceptions: List[str] = []
+    item_responses: List[ItemResponse] = Field(
+        default_factory=list, description="逐题作答，IRT 模式下优先于 attempts/correct"
+    )
 
     @property
     def mastery(self) -> float:
@@ -67,6 +75,11 @@ class CognitiveDiagnosisRequest(BaseRequest):
     subject: str
     concept_snapshots: List[ConceptSnapshot]
     recent_behaviors: Optional[List[str]] = None
+    method: str = Field(
+        default="auto",
+        pattern="^(auto|rule)$",
+        description="auto：已校准 IRT 参数的概念用 IRT 估计，其余用规则；rule：全部用 答对数/次数",
+    )
 
 
 class ConceptDiagnosis(BaseModel):
@@ -75,6 +88,9 @@ class ConceptDiagnosis(BaseModel):
     level: str
     misconceptions: List[str]
     recommendation: str
+    method: str = Field(default="rule", description="该概念掌握度的来源：rule/irt")
+    ability: Optional[float] = Field(default=None, description="IRT 能力后验均值 θ")
+    ability_se: Optional[float] = Field(default=None, description="θ 的后验标准差")
 
 
 class CognitiveDiagnosisResponse(BaseResponse):
@@ -95,12 +111,17 @@ class SkillInteraction(BaseModel):
     correct: bool
     time_spent_seconds: Optional[int] = None
     confidence: Optional[float] = Field(default=None, ge=0.0, le=1.0)
+    seq: Optional[int] = Field(default=None, ge=0, description="学生内单调的事件编号，增量追踪用于排序与去重")
 
 
 class KnowledgeTracingRequest(BaseRequest):
     student_id: str
     interactions: List[SkillInteraction]
     prior_mastery: Dict[str, float] = Field(default_factory=dict)
+    incremental: bool = Field(
+        default=False,
+        description="从服务端保存的追踪状态继续，只需发送 seq 大于上次 cursor 的新交互",
+    )
 
 
 class SkillProgress(BaseModel):
@@ -114,6 +135,8 @@ class KnowledgeTracingResponse(BaseResponse):
     student_id: str
     skills: List[SkillProgress]
     recommended_sequence: List[str]
+    cursor: Optional[int] = Field(default=None, description="增量模式下已应用的最大事件编号")
+    duplicates: int = Field(default=0, description="增量模式下因重复（或早于保留窗口）而忽略的事件数")
 
 
 # ---- 情感 ----
@@ -155,15 +178,91 @@ class SentimentResponse(BaseResponse):
     label: str
 
 
+class SentimentBatchRequest(BaseRequest):
+    texts: List[str] = Field(max_length=10000, description="待打分的文本，结果按相同顺序返回")
+
+
+class SentimentScore(BaseModel):
+    probabilities: Dict[str, float]
+    label: str
+
+
+class SentimentBatchResponse(BaseResponse):
+    results: List[SentimentScore]
+
+
+class AffectSummaryRequest(BaseRequest):
+    student_id: str
+    window_seconds: float = Field(
+        default=600.0, gt=0, description="统计窗口（秒）；60/600/3600 走指数衰减累加器，其他值精确扫描最近记录"
+    )
+
+
+class AffectSummaryResponse(BaseResponse):
+    student_id: str
+    window_seconds: float
+    method: str = Field(description="decayed：指数时间衰减；exact：窗口内精确统计；empty：无记录")
+    events: float = Field(description="窗口内（衰减加权后）的情绪记录数")
+    weights: Dict[str, float] = Field(default_factory=dict, description="各情绪按置信度加权的占比")
+    dominant_emotion: Optional[str] = None
+    latest: Optional[EmotionLogSchema] = None
+
+
 # ---- 路径规划 ----
 
 
 class PathRequest(BaseRequest):
     student_id: Optional[str] = None
     mastery: Dict[str, float]
+    subject: Optional[str] = Field(default=None, description="学科/课程 id，对应图目录中的 <subject>.json；为空用默认先修图")
     threshold: float = Field(default=0.7, ge=0.0, le=1.0)
     max_recommend: int = Field(default=5, gt=0)
 
 
 class PathResponse(BaseResponse):
     recommended_path: List[str]
+
+
+class CohortStudent(BaseModel):
+    student_id: Optional[str] = None
+    mastery: Dict[str, float] = Field(default_factory=dict, description="为空则按 student_id 读取已记录的掌握度")
+
+
+class PathBatchRequest(BaseRequest):
+    students: List[CohortStudent] = Field(max_length=1000, description="全班学生，结果按相同顺序返回")
+    subject: Optional[str] = Field(default=None, description="学科/课程 id，为空用默认先修图")
+    threshold: float = Field(default=0.7, ge=0.0, le=1.0)
+    max_recommend: int = Field(default=5, gt=0)
+
+
+class CohortPlan(BaseModel):
+    student_id: Optional[str] = None
+    recommended_path: List[str]
+
+
+class PathBatchResponse(BaseResponse):
+    plans: List[CohortPlan]
+
+
+# ---- 一步式教学（追踪 + 诊断 + 情感 + 规划） ----
+
+
+class TutorStepRequest(BaseRequest):
+    student_id: str
+    interactions: List[SkillInteraction] = Field(default_factory=list, description="本轮作答记录，为空则跳过知识追踪")
+    prior_mastery: Dict[str, float] = Field(default_factory=dict)
+    subject: Optional[str] = Field(default=None, description="认知诊断所属学科；图目录中有同名先修图时规划也用它，否则用默认先修图")
+    concept_snapshots: List[ConceptSnapshot] = Field(default_factory=list, description="为空则跳过认知诊断")
+    current_task: Optional[str] = Field(default=None, description="为空则跳过情感分析")
+    affective_signals: List[AffectiveSignal] = Field(default_factory=list)
+    recent_performance: Optional[str] = None
+    threshold: float = Field(default=0.7, ge=0.0, le=1.0)
+    max_recommend: int = Field(default=5, gt=0)
+
+
+class TutorStepResponse(BaseResponse):
+    student_id: str
+    tracing: Optional[KnowledgeTracingResponse] = None
+    diagnosis: Optional[CognitiveDiagnosisResponse] = None
+    affect: Optional[AffectiveAnalysisResponse] = None
+    plan: PathResponse
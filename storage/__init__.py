@@ -0,0 +1,80 @@
+"""database 的可插拔存储后端。
+
+通过 URL 选择后端（也可用环境变量 EDU_STORE 配置）：
+- ``memory[?capacity=N&spill=<path>]``：纯内存（默认），重启即丢；设置 capacity 后按 LRU 淘汰到溢出文件；
+- ``sqlite:<path>[?capacity=N]``：SQLite WAL 持久化 + 写回批量落盘，如 ``sqlite:students.db``；
+- ``journal:<dir>``：内存 + 快照/追加日志，重启后秒级恢复；
+- ``shm:<name>[?students=N&concepts=M&emotions=K]``：共享内存掌握度矩阵，供多 worker 进程共享（仅类 Unix）；
+  容量在创建时固定，超出时抛 ``storage.shm.CapacityError``。
+
+memory / sqlite / journal 另接受 ``emotions=N``（每个学生内存中保留的情绪条数）与 ``context=0``（内存中不保留 context 文本）。
+"""
+
+from __future__ import annotations
+
+from urllib.parse import parse_qs
+
+from storage.base import CONCEPTS, ConceptTable, EmotionLog, KnowledgeState, StoreBackend, Student
+from storage.emotions import DEFAULT_CAPACITY, AffectSummary, EmotionHistory
+from storage.journal import JournaledBackend
+from storage.memory import MemoryBackend
+from storage.sqlite import SQLiteBackend
+from storage.tracing import TraceLog, TraceStore
+
+
+def create_backend(url: str) -> StoreBackend:
+    scheme, _, rest = url.partition(":")
+    if "?" in scheme:  # 如 memory?capacity=1000，没有冒号部分
+        scheme, _, query = url.partition("?")
+        rest = "?" + query
+    path, _, query = rest.partition("?")
+    params = {k: v[-1] for k, v in parse_qs(query).items()}
+    capacity = int(params["capacity"]) if "capacity" in params else None
+    emotion_context = params.get("context", "1") not in ("0", "false")
+    if scheme == "memory":
+        return MemoryBackend(
+            capacity=capacity,
+            spill_path=params.get("spill"),
+            emotion_capacity=int(params.get("emotions", DEFAULT_CAPACITY)),
+            emotion_context=emotion_context,
+        )
+    if scheme == "sqlite":
+        if not path:
+            raise ValueError("sqlite 后端需要文件路径，如 sqlite:students.db")
+        return SQLiteBackend(
+            path,
+            capacity=capacity,
+            emotion_cache_size=int(params.get("emotions", 50)),
+            emotion_context=emotion_context,
+        )
+    if scheme == "journal":
+        if not path:
+            raise ValueError("journal 后端需要目录，如 journal:data/store")
+        return JournaledBackend(
+            path,
+            emotion_capacity=int(params.get("emotions", DEFAULT_CAPACITY)),
+            emotion_context=emotion_context,
+        )
+    if scheme == "shm":
+        from storage.shm import SharedMemoryBackend  # 依赖 fcntl，按需导入
+
+        return SharedMemoryBackend.from_url(rest)
+    raise ValueError(f"未知存储后端: {url}")
+
+
+__all__ = [
+    "AffectSummary",
+    "CONCEPTS",
+    "ConceptTable",
+    "EmotionHistory",
+    "EmotionLog",
+    "JournaledBackend",
+    "KnowledgeState",
+    "MemoryBackend",
+    "SQLiteBackend",
+    "StoreBackend",
+    "Student",
+    "TraceLog",
+    "TraceStore",
+    "create_backend",
+]
@@ -0,0 +1,189 @@
+"""存储后端的数据实体与抽象接口。
+
+掌握度采用紧凑布局：概念名在进程级的 ``CONCEPTS`` 表（storage.interning）中驻留为整数 id，
+每个学生只保存一个 ``array('B')``，下标为概念 id，值为 ``mastery_level + 1``（0 表示未记录）。
+相比每个概念一个 KnowledgeState 对象，十万级学生时内存占用低一个数量级。
+概念 id 是进程级的，稠密行长度取决于该学生用到的最大 id 而不是记录条数：当行需要扩展到超过
+``max(DENSE_MIN, DENSE_FACTOR * 记录条数)`` 字节时（如只记录了少数编号很大的概念），改存稀疏的
+``{概念 id: level + 1}`` 字典，单个学生的内存因此只与自己的记录条数成正比。
+``CONCEPTS`` 表本身只增不减，每个出现过的概念名常驻一份（名字字符串 + 字典项），为所有学生共享。
+情绪历史是定长环形缓冲 ``EmotionHistory``（storage.emotions）。
+"""
+
+from __future__ import annotations
+
+import itertools
+import threading
+from abc import ABC, abstractmethod
+from array import array
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from storage.emotions import AffectSummary, EmotionHistory, EmotionLog
+from storage.interning import CONCEPTS, ConceptTable
+
+# 预先算好 level+1 -> mastery 浮点值，dump 时查表即可
+_LEVEL_TO_MASTERY: Tuple[float, ...] = (0.0,) + tuple(level / 100 for level in range(101))
+
+# 稠密行允许的空洞：行长不超过 max(DENSE_MIN, DENSE_FACTOR * 记录条数)，否则转为稀疏字典
+DENSE_MIN = 64
+DENSE_FACTOR = 4
+
+# 掌握度版本号取自进程级单调序列：新建/重新装载的学生也拿新号，淘汰再装载后不会与旧号重复
+_MASTERY_VERSIONS = itertools.count(1)
+
+
+@dataclass(frozen=True, slots=True)
+class KnowledgeState:
+    concept: str
+    mastery_level: int = 0
+
+
+class Student:
+    """单个学生的状态。写入需持有 ``lock``；读取用 ``mastery_snapshot`` 拿一致快照。
+
+    ``evicted`` 由后端在把学生移出缓存时（持有 ``lock``）置位，写者拿到锁后发现已置位需重新获取。
+    ``version`` 在每次掌握度写入后更新（``bump_version``），用于判断基于掌握度的缓存是否过期。
+    """
+
+    __slots__ = ("id", "name", "levels", "emotion_logs", "lock", "evicted", "version")
+
+    def __init__(
+        self,
+        id: str,
+        name: str = "",
+        levels: Union[array, Dict[int, int], None] = None,
+        emotion_logs: Iterable[EmotionLog] = (),
+        emotion_history: Optional[EmotionHistory] = None,
+    ) -> None:
+        self.id = id
+        self.name = name
+        self.levels = levels if levels is not None else array("B")
+        self.emotion_logs = emotion_history if emotion_history is not None else EmotionHistory(emotion_logs)
+        self.lock = threading.Lock()
+        self.evicted = False
+        self.version = next(_MASTERY_VERSIONS)
+
+    @classmethod
+    def from_levels(cls, student_id: str, levels: Dict[str, int], **kwargs) -> "Student":
+        student = cls(student_id, **kwargs)
+        for concept, level in levels.items():
+            student.set_level(CONCEPTS.intern(concept), level)
+        return student
+
+    def get_level(self, concept_id: int) -> Optional[int]:
+        levels = self.levels
+        if isinstance(levels, dict):
+            stored = levels.get(concept_id)
+            return stored - 1 if stored else None
+        if concept_id < len(levels) and levels[concept_id]:
+            return levels[concept_id] - 1
+        return None
+
+    def set_level(self, concept_id: int, level: int) -> None:
+        levels = self.levels
+        if isinstance(levels, dict):
+            levels[concept_id] = level + 1
+            return
+        if concept_id >= len(levels):
+            entries = len(levels) - levels.count(0) + 1
+            if concept_id + 1 > max(DENSE_MIN, DENSE_FACTOR * entries):
+                sparse = {i: stored for i, stored in enumerate(levels) if stored}
+                sparse[concept_id] = level + 1
+                self.levels = sparse  # 引用替换是原子的，无锁读者看到旧行或新字典
+                return
+            levels.extend(bytes(concept_id + 1 - len(levels)))
+        levels[concept_id] = level + 1
+
+    def bump_version(self) -> None:
+        """写入掌握度之后、持有 ``lock`` 时调用。"""
+        self.version = next(_MASTERY_VERSIONS)
+
+    def mastery_snapshot(self) -> Dict[int, int]:
+        """{概念 id: level + 1} 的一致快照。
+
+        整行 ``tobytes`` / 整表 ``copy`` 都是持有 GIL 的单次 C 调用，与并发的单项写入相比总是一致的。
+        """
+        levels = self.levels
+        if isinstance(levels, dict):
+            return levels.copy()
+        return {i: stored for i, stored in enumerate(levels.tobytes()) if stored}
+
+    def iter_levels(self) -> Iterator[Tuple[str, int]]:
+        names = CONCEPTS.names
+        for concept_id, stored in self.mastery_snapshot().items():
+            yield names[concept_id], stored - 1
+
+    def dump_mastery(self) -> Dict[str, float]:
+        names = CONCEPTS.names
+        table = _LEVEL_TO_MASTERY
+        levels = self.levels
+        if isinstance(levels, dict):
+            return {names[i]: table[v] for i, v in levels.copy().items()}
+        row = levels.tobytes()
+        return {names[i]: table[v] for i, v in enumerate(row) if v}
+
+    @property
+    def knowledge_states(self) -> Dict[str, KnowledgeState]:
+        """兼容旧接口的只读视图（按需构造）。"""
+        return {c: KnowledgeState(concept=c, mastery_level=level) for c, level in self.iter_levels()}
+
+    def __repr__(self) -> str:
+        return f"Student(id={self.id!r}, name={self.name!r}, mastery={dict(self.iter_levels())!r})"
+
+
+class StoreBackend(ABC):
+    """database 模块级函数背后的存储接口，新增后端实现这些方法即可。"""
+
+    @abstractmethod
+    def get_student(self, student_id: str) -> Student:
+        """取学生，不存在则创建（写路径使用）。"""
+
+    def find_student(self, student_id: str) -> Optional[Student]:
+        """只读查找：不存在返回 None，不会为未知 id 创建学生。"""
+        return self.get_student(student_id)
+
+    @abstractmethod
+    def update_mastery(self, student_id: str, concept: str, delta: int) -> int: ...
+
+    @abstractmethod
+    def set_mastery(self, student_id: str, concept: str, value: float) -> int: ...
+
+    def mastery_version(self, student_id: str) -> Optional[int]:
+        """掌握度版本号，每次 set_mastery / update_mastery 后都会变化；未知学生返回 None。
+
+        先取版本再 dump_mastery、之后版本仍相同，即可认为快照与该版本对应。
+        """
+        student = self.find_student(student_id)
+        return student.version if student is not None else None
+
+    @abstractmethod
+    def latest_emotion(self, student_id: str) -> Optional[EmotionLog]: ...
+
+    @abstractmethod
+    def log_emotion(self, student_id: str, emotion: str, confidence: float, context: Optional[str] = None) -> None: ...
+
+    @abstractmethod
+    def dump_mastery(self, student_id: str) -> Dict[str, float]: ...
+
+    def emotion_summary(
+        self, student_id: str, window_seconds: float, now: Optional[datetime] = None
+    ) -> Optional[AffectSummary]:
+        """最近 ``window_seconds`` 秒的情绪汇总；未知学生返回 None。"""
+        student = self.find_student(student_id)
+        if student is None:
+            return None
+        with student.lock:
+            return student.emotion_logs.summary(window_seconds, now)
+
+    def stats(self) -> Dict[str, int]:
+        """缓存命中/未命中/淘汰等计数，供 /stats/store 暴露。"""
+        return {}
+
+    def flush(self) -> None:
+        """把尚未落盘的写入同步写出；纯内存后端无事可做。"""
+
+    def close(self) -> None:
+        """释放资源（连接、后台线程等），关闭前会先 flush。"""
+        self.flush()
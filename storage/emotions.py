@@ -0,0 +1,216 @@
+"""定长列式情绪历史（环形缓冲）与指数时间衰减的情绪累加器。
+
+每个学生一个 ``EmotionHistory``：
+- 时间戳（微秒）、情绪槽位、置信度分列存放在 ``array`` 中，容量固定，写满后覆盖最旧的记录；
+- 情绪名是客户端给的自由文本，每个学生只在自己的小表里给情绪名分配槽位（不用进程级驻留表），
+  槽位数不超过 ``max(capacity, MIN_EMOTION_SLOTS)``：表满时回收一个已不在环形缓冲中、长窗口累计权重最小的情绪，
+  它在衰减累加器里的残余权重随之丢弃。单个学生的内存与每次追加的开销因此与全局出现过多少种情绪名无关；
+- context 文本可选保存（``keep_context``），关闭后只保留数值列；
+- 对 ``DECAY_WINDOWS`` 中的每个时间窗口 τ 维护按 exp(-Δt/τ) 衰减的情绪权重与事件数，
+  追加一条记录只更新这几个累加器，查询“最近 τ 秒的主导情绪”是 O(1)；
+  其他窗口退化为在环形缓冲内精确扫描（最多 capacity 条）。
+
+写入需持有学生锁；``latest()`` 可无锁读取，汇总与遍历应在学生锁内进行以得到一致结果。
+"""
+
+from __future__ import annotations
+
+import math
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional
+
+DECAY_WINDOWS = (60.0, 600.0, 3600.0)
+DEFAULT_CAPACITY = 64
+MIN_EMOTION_SLOTS = 16
+
+_EPOCH = datetime(1970, 1, 1)
+_STRIDE = 2 * len(DECAY_WINDOWS)  # 每种情绪: 每个窗口 (权重, 事件数)
+
+
+def _micros(ts: datetime) -> int:
+    return (ts - _EPOCH) // timedelta(microseconds=1)
+
+
+@dataclass(slots=True)
+class EmotionLog:
+    emotion: str
+    confidence: float
+    timestamp: datetime = field(default_factory=datetime.utcnow)
+    context: Optional[str] = None
+
+
+@dataclass(slots=True)
+class AffectSummary:
+    window_seconds: float
+    method: str  # "decayed" | "exact"
+    events: float
+    weights: Dict[str, float]
+    dominant_emotion: Optional[str]
+
+
+class EmotionHistory:
+    __slots__ = (
+        "capacity",
+        "keep_context",
+        "_ts",
+        "_emotion",
+        "_confidence",
+        "_context",
+        "_head",
+        "_size",
+        "_names",
+        "_slots",
+        "_max_slots",
+        "_acc",
+        "_acc_ref",
+    )
+
+    def __init__(self, logs: Iterable[EmotionLog] = (), *, capacity: int = DEFAULT_CAPACITY, keep_context: bool = True):
+        if capacity <= 0:
+            raise ValueError("capacity 必须为正整数")
+        self.capacity = capacity
+        self.keep_context = keep_context
+        self._ts = array("q", bytes(8 * capacity))
+        self._emotion = array("I", bytes(4 * capacity))  # 本学生情绪表中的槽位
+        self._confidence = array("d", bytes(8 * capacity))
+        self._context: Optional[List[Optional[str]]] = [None] * capacity if keep_context else None
+        self._head = 0  # 下一条写入的位置
+        self._size = 0
+        self._names: List[str] = []  # 槽位 -> 情绪名
+        self._slots: Dict[str, int] = {}  # 情绪名 -> 槽位
+        self._max_slots = max(capacity, MIN_EMOTION_SLOTS)
+        self._acc = array("d")  # 槽位 * _STRIDE + 2 * 窗口 -> (权重, 事件数)
+        self._acc_ref = 0  # 累加器对齐到的时间（微秒）
+        for log in logs:
+            self.append(log)
+
+    # ---- 写入 ----
+
+    def append(self, log: EmotionLog) -> None:
+        slot = self._head
+        eid = self._slots.get(log.emotion)
+        if eid is None:
+            eid = self._new_emotion(log.emotion, overwriting=slot)
+        t = _micros(log.timestamp)
+        self._ts[slot] = t
+        self._emotion[slot] = eid
+        self._confidence[slot] = log.confidence
+        if self._context is not None:
+            self._context[slot] = log.context
+        # 先写数据再推进游标，无锁读 latest() 不会读到半条记录
+        self._size = min(self._size + 1, self.capacity)
+        self._head = (slot + 1) % self.capacity
+        self._accumulate(eid, log.confidence, t)
+
+    def _new_emotion(self, name: str, overwriting: int) -> int:
+        """给新情绪名分配槽位；表满时回收一个不再被环形缓冲引用的槽位（``overwriting`` 即将被覆盖）。"""
+        if len(self._names) < self._max_slots:
+            eid = len(self._names)
+            self._names.append(name)
+            self._acc.extend(bytes(8 * _STRIDE))
+        else:
+            referenced = set()
+            start = (self._head - self._size) % self.capacity
+            for i in range(self._size):
+                pos = (start + i) % self.capacity
+                if pos != overwriting:
+                    referenced.add(self._emotion[pos])
+            # 槽位数不少于容量，且即将被覆盖的记录不算引用，总有可回收的槽位
+            longest = 2 * (len(DECAY_WINDOWS) - 1)
+            eid = min(
+                (e for e in range(len(self._names)) if e not in referenced),
+                key=lambda e: self._acc[e * _STRIDE + longest],
+            )
+            del self._slots[self._names[eid]]
+            self._names[eid] = name
+            for i in range(eid * _STRIDE, (eid + 1) * _STRIDE):
+                self._acc[i] = 0.0
+        self._slots[name] = eid
+        return eid
+
+    def _accumulate(self, eid: int, confidence: float, t: int) -> None:
+        acc = self._acc
+        dt = (t - self._acc_ref) / 1e6
+        if dt > 0:
+            # 整体衰减到新时间点，情绪种类数有限，与历史长度无关
+            for w, window in enumerate(DECAY_WINDOWS):
+                factor = math.exp(-dt / window)
+                for base in range(2 * w, len(acc), _STRIDE):
+                    acc[base] *= factor
+                    acc[base + 1] *= factor
+            self._acc_ref = t
+            dt = 0.0
+        for w, window in enumerate(DECAY_WINDOWS):
+            # 乱序的旧事件按其相对参考时间的年龄先行衰减
+            factor = math.exp(dt / window)
+            base = eid * _STRIDE + 2 * w
+            acc[base] += confidence * factor
+            acc[base + 1] += factor
+
+    # ---- 读取 ----
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _log_at(self, slot: int) -> EmotionLog:
+        return EmotionLog(
+            emotion=self._names[self._emotion[slot]],
+            confidence=self._confidence[slot],
+            timestamp=_EPOCH + timedelta(microseconds=self._ts[slot]),
+            context=self._context[slot] if self._context is not None else None,
+        )
+
+    def latest(self) -> Optional[EmotionLog]:
+        if not self._size:
+            return None
+        return self._log_at((self._head - 1) % self.capacity)
+
+    def __iter__(self) -> Iterator[EmotionLog]:
+        """从旧到新遍历当前保留的记录。"""
+        start = (self._head - self._size) % self.capacity
+        for i in range(self._size):
+            yield self._log_at((start + i) % self.capacity)
+
+    def __getitem__(self, index: int) -> EmotionLog:
+        if not -self._size <= index < self._size:
+            raise IndexError("情绪历史下标越界")
+        return self._log_at((self._head - self._size + index % self._size) % self.capacity)
+
+    def summary(self, window_seconds: float, now: Optional[datetime] = None) -> AffectSummary:
+        now_us = _micros(now or datetime.utcnow())
+        if window_seconds in DECAY_WINDOWS:
+            w = DECAY_WINDOWS.index(window_seconds)
+            factor = math.exp(-max(0, now_us - self._acc_ref) / 1e6 / window_seconds)
+            weights: Dict[str, float] = {}
+            events = 0.0
+            for eid in range(len(self._acc) // _STRIDE):
+                base = eid * _STRIDE + 2 * w
+                if self._acc[base + 1]:
+                    weights[self._names[eid]] = self._acc[base] * factor
+                    events += self._acc[base + 1] * factor
+            method = "decayed"
+        else:
+            cutoff = now_us - int(window_seconds * 1e6)
+            weights = {}
+            events = 0.0
+            start = (self._head - self._size) % self.capacity
+            for i in range(self._size):
+                slot = (start + i) % self.capacity
+                if cutoff <= self._ts[slot] <= now_us:
+                    name = self._names[self._emotion[slot]]
+                    weights[name] = weights.get(name, 0.0) + self._confidence[slot]
+                    events += 1
+            method = "exact"
+
+        total = sum(weights.values())
+        shares = {name: weight / total for name, weight in weights.items()} if total > 0 else {}
+        dominant = max(shares.items(), key=lambda item: item[1])[0] if shares else None
+        return AffectSummary(
+            window_seconds=window_seconds,
+            method=method,
+            events=events,
+            weights=shares,
+            dominant_emotion=dominant,
+        )
@@ -0,0 +1,46 @@
+"""进程级字符串驻留表：把概念名映射为紧凑的整数 id。"""
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, List, Optional
+
+
+class ConceptTable:
+    """进程级概念驻留表：概念名 <-> 整数 id，只增不减。"""
+
+    __slots__ = ("_ids", "_names", "_lock")
+
+    def __init__(self) -> None:
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._lock = threading.Lock()
+
+    def intern(self, concept: str) -> int:
+        concept_id = self._ids.get(concept)
+        if concept_id is not None:
+            return concept_id
+        with self._lock:
+            concept_id = self._ids.get(concept)
+            if concept_id is None:
+                concept_id = len(self._names)
+                self._names.append(concept)
+                self._ids[concept] = concept_id
+            return concept_id
+
+    def lookup(self, concept: str) -> Optional[int]:
+        return self._ids.get(concept)
+
+    def name(self, concept_id: int) -> str:
+        return self._names[concept_id]
+
+    @property
+    def names(self) -> List[str]:
+        """只追加的名字列表，按 id 下标访问；调用方不要修改。"""
+        return self._names
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+
+CONCEPTS = ConceptTable()
@@ -0,0 +1,535 @@
+"""内存存储 + 快照 + 追加日志，用于秒级热重启。
+
+目录结构：
+- ``snapshot.bin``：全量二进制快照，启动时 mmap 打开，只校验头部；学生记录在首次访问时才解码；
+- ``log-<gen>.bin``：快照之后的变更日志，每条记录带长度与 CRC，启动时按代次顺序重放。
+
+写入（set_mastery / update_mastery / log_emotion）在学生锁内追加一条日志记录到内存缓冲，
+后台线程每 ``fsync_interval`` 秒把缓冲批量写入并 fsync（group commit），崩溃最多丢失一个间隔。
+update_mastery 记录的是写后的绝对值，重放是幂等的。
+
+快照（``snapshot()``，日志超过 ``snapshot_bytes`` 时由独立线程自动触发，写快照期间 group commit 照常进行）：
+1. 先轮转到新一代日志；
+2. 逐个在学生锁内拷贝常驻学生的状态，同时记下该学生在新日志中的偏移 ``replay_from``，
+   重放新日志时跳过该偏移之前的记录，因此快照与日志之间不会重复也不会遗漏；
+3. 未解码过的学生直接从旧快照拷贝原始记录；新快照写临时文件后原子替换，再删除旧日志。
+
+日志尾部截断或损坏时，重放在最后一条完整记录处停止并截掉坏尾巴；快照损坏则拒绝启动。
+字符串（学生 id、概念名、情绪名）以 U32 长度前缀编码；旧版 U16 前缀的快照（版本 1）与日志记录（类型 1/2）仍可读取，
+下一次快照时改写为当前格式。
+不支持与 ``capacity``（LRU 淘汰）同时使用。
+"""
+
+from __future__ import annotations
+
+import atexit
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+import zlib
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from storage.base import CONCEPTS, EmotionLog, Student
+from storage.emotions import DEFAULT_CAPACITY, EmotionHistory
+from storage.memory import MemoryBackend
+
+logger = logging.getLogger(__name__)
+
+_SNAP_MAGIC = b"EDUSNAP1"
+_SNAP_VERSION = 2  # 版本 1 的字符串长度前缀为 U16
+# magic, version, generation, n_concepts, n_students, concepts_off, index_off, records_off, file_size
+_SNAP_HEADER = struct.Struct("<8sIQIQQQQQ")
+_SNAP_HEADER_SIZE = 72  # 头部 + 4 字节 CRC，留有余量
+_INDEX_ENTRY = struct.Struct("<QQ")  # student_id 哈希, 记录偏移
+_FRAME = struct.Struct("<II")  # 负载长度, CRC32
+_U8 = struct.Struct("<B")
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+_I32 = struct.Struct("<i")
+_U64 = struct.Struct("<Q")
+_EMOTION_NUMS = struct.Struct("<dq")  # 置信度, 时间戳(微秒)
+
+_REC_MASTERY = 3
+_REC_EMOTION = 4
+# 旧版记录：字符串长度前缀为 U16，只在重放时读取
+_REC_MASTERY_V1 = 1
+_REC_EMOTION_V1 = 2
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _hash_id(student_id: str) -> int:
+    return int.from_bytes(hashlib.blake2b(student_id.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _pack_str(text: str) -> bytes:
+    data = text.encode("utf-8")
+    return _U32.pack(len(data)) + data
+
+
+def _unpack_str(buf, offset: int, prefix: struct.Struct = _U32) -> Tuple[str, int]:
+    (length,) = prefix.unpack_from(buf, offset)
+    start = offset + prefix.size
+    return bytes(buf[start : start + length]).decode("utf-8"), start + length
+
+
+def _frame(payload: bytes) -> bytes:
+    return _FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def _pack_emotion(log: EmotionLog) -> bytes:
+    micros = (log.timestamp - _EPOCH) // timedelta(microseconds=1)
+    if log.context is None:
+        context = _I32.pack(-1)
+    else:
+        data = log.context.encode("utf-8")
+        context = _I32.pack(len(data)) + data
+    return _pack_str(log.emotion) + _EMOTION_NUMS.pack(log.confidence, micros) + context
+
+
+def _unpack_emotion(buf, offset: int, prefix: struct.Struct = _U32) -> Tuple[EmotionLog, int]:
+    emotion, offset = _unpack_str(buf, offset, prefix)
+    confidence, micros = _EMOTION_NUMS.unpack_from(buf, offset)
+    offset += _EMOTION_NUMS.size
+    (length,) = _I32.unpack_from(buf, offset)
+    offset += _I32.size
+    context = None
+    if length >= 0:
+        context = bytes(buf[offset : offset + length]).decode("utf-8")
+        offset += length
+    log = EmotionLog(emotion=emotion, confidence=confidence, timestamp=_EPOCH + timedelta(microseconds=micros), context=context)
+    return log, offset
+
+
+class CorruptSnapshotError(RuntimeError):
+    pass
+
+
+class _Snapshot:
+    """只读 mmap 快照：头部与概念表在打开时解析，学生记录按需二分查找并解码。"""
+
+    def __init__(self, path: str) -> None:
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < _SNAP_HEADER_SIZE:
+            self._file.close()
+            raise CorruptSnapshotError(f"{path} 过短，可能被截断")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        fields = _SNAP_HEADER.unpack_from(self._mm, 0)
+        (crc,) = _U32.unpack_from(self._mm, _SNAP_HEADER.size)
+        if fields[0] != _SNAP_MAGIC or zlib.crc32(self._mm[: _SNAP_HEADER.size]) != crc:
+            self.close()
+            raise CorruptSnapshotError(f"{path} 头部校验失败")
+        _, self.version, self.generation, n_concepts, self.n_students, concepts_off, self._index_off, _, file_size = fields
+        if self.version not in (1, _SNAP_VERSION) or file_size != size:
+            self.close()
+            raise CorruptSnapshotError(f"{path} 版本不符或大小不符（期望 {file_size}，实际 {size}）")
+        self._prefix = _U16 if self.version == 1 else _U32
+
+        self.concepts: List[str] = []
+        offset = concepts_off
+        for _ in range(n_concepts):
+            name, offset = _unpack_str(self._mm, offset, self._prefix)
+            self.concepts.append(name)
+        # 快照内概念 id -> 当前进程 CONCEPTS id
+        self._concept_map = [CONCEPTS.intern(name) for name in self.concepts]
+        self._hashes: Optional[List[int]] = None
+
+    def _hash_at(self, i: int) -> int:
+        return _INDEX_ENTRY.unpack_from(self._mm, self._index_off + i * _INDEX_ENTRY.size)[0]
+
+    def _find_offset(self, student_id: str) -> Optional[int]:
+        target = _hash_id(student_id)
+        lo, hi = 0, self.n_students
+        while lo < hi:  # 直接在 mmap 上二分，不把索引整体读进内存
+            mid = (lo + hi) // 2
+            if self._hash_at(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        while lo < self.n_students:
+            h, offset = _INDEX_ENTRY.unpack_from(self._mm, self._index_off + lo * _INDEX_ENTRY.size)
+            if h != target:
+                return None
+            if self._record_id(offset) == student_id:
+                return offset
+            lo += 1
+        return None
+
+    def _payload(self, offset: int) -> memoryview:
+        length, crc = _FRAME.unpack_from(self._mm, offset)
+        payload = memoryview(self._mm)[offset + _FRAME.size : offset + _FRAME.size + length]
+        if len(payload) != length or zlib.crc32(payload) != crc:
+            raise CorruptSnapshotError(f"快照记录 @{offset} 校验失败")
+        return payload
+
+    def _record_id(self, offset: int) -> str:
+        start = offset + _FRAME.size
+        return _unpack_str(self._mm, start, self._prefix)[0]
+
+    def _decode(self, payload: memoryview) -> Tuple[str, str, int, bytes, List[EmotionLog]]:
+        """解码一条学生记录：(student_id, name, replay_from, levels, logs)。"""
+        student_id, pos = _unpack_str(payload, 0, self._prefix)
+        name, pos = _unpack_str(payload, pos, self._prefix)
+        (replay_from,) = _U64.unpack_from(payload, pos)
+        pos += _U64.size
+        (n_levels,) = _U32.unpack_from(payload, pos)
+        pos += _U32.size
+        levels = bytes(payload[pos : pos + n_levels])
+        pos += n_levels
+        (n_logs,) = _U32.unpack_from(payload, pos)
+        pos += _U32.size
+        logs = []
+        for _ in range(n_logs):
+            log, pos = _unpack_emotion(payload, pos, self._prefix)
+            logs.append(log)
+        return student_id, name, replay_from, levels, logs
+
+    def load(
+        self, student_id: str, new_history: Callable[[Iterable[EmotionLog]], EmotionHistory]
+    ) -> Optional[Tuple[Student, int]]:
+        """返回 (学生, replay_from)；快照中没有返回 None。情绪历史由后端的 ``new_history`` 按其容量/context 设置构建。"""
+        offset = self._find_offset(student_id)
+        if offset is None:
+            return None
+        payload = self._payload(offset)
+        _, name, replay_from, levels, logs = self._decode(payload)
+        payload.release()
+
+        student = Student(student_id, name=name, emotion_history=new_history(logs))
+        concept_map = self._concept_map
+        for snap_id, stored in enumerate(levels):
+            if stored:
+                student.set_level(concept_map[snap_id], stored - 1)
+        return student, replay_from
+
+    def raw_records(self):
+        """逐个产出 (student_id, replay_from 之前的负载头部, 之后的尾部)，用于写新快照时拷贝。
+
+        当前版本的记录原样拷贝；旧版本的记录解码后按当前格式重新编码。
+        """
+        for i in range(self.n_students):
+            _, offset = _INDEX_ENTRY.unpack_from(self._mm, self._index_off + i * _INDEX_ENTRY.size)
+            payload = self._payload(offset)
+            if self.version == _SNAP_VERSION:
+                student_id, pos = _unpack_str(payload, 0)
+                _, pos = _unpack_str(payload, pos)
+                head = bytes(payload[:pos])
+                tail = bytes(payload[pos + _U64.size :])
+            else:
+                student_id, name, _, levels, logs = self._decode(payload)
+                encoded = _encode_student(student_id, name, levels, logs, 0)
+                head_size = len(_pack_str(student_id)) + len(_pack_str(name))
+                head, tail = encoded[:head_size], encoded[head_size + _U64.size :]
+            payload.release()
+            yield student_id, head, tail
+
+    def close(self) -> None:
+        if getattr(self, "_mm", None) is not None:
+            self._mm.close()
+        self._file.close()
+
+
+def _encode_student(student_id: str, name: str, levels: bytes, logs: List[EmotionLog], replay_from: int) -> bytes:
+    parts = [
+        _pack_str(student_id),
+        _pack_str(name),
+        _U64.pack(replay_from),
+        _U32.pack(len(levels)),
+        levels,
+        _U32.pack(len(logs)),
+    ]
+    parts.extend(_pack_emotion(log) for log in logs)
+    return b"".join(parts)
+
+
+def write_snapshot(path: str, generation: int, concepts: List[str], records: List[Tuple[str, bytes]]) -> None:
+    """records 为 (student_id, 负载) 列表；先写临时文件再原子替换。"""
+    concept_bytes = b"".join(_pack_str(name) for name in concepts)
+    concepts_off = _SNAP_HEADER_SIZE
+    index_off = concepts_off + len(concept_bytes)
+    records_off = index_off + len(records) * _INDEX_ENTRY.size
+
+    index: List[Tuple[int, int]] = []
+    offset = records_off
+    frames: List[bytes] = []
+    for student_id, payload in records:
+        frame = _frame(payload)
+        index.append((_hash_id(student_id), offset))
+        frames.append(frame)
+        offset += len(frame)
+    index.sort()
+
+    header = _SNAP_HEADER.pack(
+        _SNAP_MAGIC, _SNAP_VERSION, generation, len(concepts), len(records), concepts_off, index_off, records_off, offset
+    )
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(header + _U32.pack(zlib.crc32(header)))
+        f.write(bytes(_SNAP_HEADER_SIZE - _SNAP_HEADER.size - _U32.size))
+        f.write(concept_bytes)
+        f.write(b"".join(_INDEX_ENTRY.pack(h, o) for h, o in index))
+        for frame in frames:
+            f.write(frame)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read_log(path: str) -> Tuple[List[Tuple[int, bytes]], int]:
+    """读出日志中所有完整记录 (偏移, 负载)，以及最后一条完整记录之后的偏移。"""
+    with open(path, "rb") as f:
+        data = f.read()
+    records: List[Tuple[int, bytes]] = []
+    offset = 0
+    while offset + _FRAME.size <= len(data):
+        length, crc = _FRAME.unpack_from(data, offset)
+        end = offset + _FRAME.size + length
+        payload = data[offset + _FRAME.size : end]
+        if end > len(data) or zlib.crc32(payload) != crc:
+            break
+        records.append((offset, payload))
+        offset = end
+    return records, offset
+
+
+class JournaledBackend(MemoryBackend):
+    SNAPSHOT_NAME = "snapshot.bin"
+
+    def __init__(
+        self,
+        directory: str,
+        *,
+        fsync_interval: float = 0.05,
+        snapshot_bytes: Optional[int] = 64 * 1024 * 1024,
+        emotion_capacity: int = DEFAULT_CAPACITY,
+        emotion_context: bool = True,
+    ) -> None:
+        super().__init__(emotion_capacity=emotion_capacity, emotion_context=emotion_context)
+        self.directory = directory
+        self.fsync_interval = fsync_interval
+        self.snapshot_bytes = snapshot_bytes
+        os.makedirs(directory, exist_ok=True)
+
+        self._log_lock = threading.Lock()  # 保护缓冲区与逻辑偏移；在学生锁内获取
+        self._io_lock = threading.Lock()  # 串行化文件写入/fsync/轮转
+        self._snapshot_lock = threading.Lock()
+        self._buffer = bytearray()
+        self._snapshots: List[_Snapshot] = []  # 旧 mmap 延迟到 close 时关闭，避免并发读者失效
+        self._snap: Optional[_Snapshot] = None
+        self._replay_cutoffs: Optional[Dict[str, int]] = None
+
+        snap_path = os.path.join(directory, self.SNAPSHOT_NAME)
+        if os.path.exists(snap_path):
+            self._snap = _Snapshot(snap_path)
+            self._snapshots.append(self._snap)
+        snap_gen = self._snap.generation if self._snap else 0
+        self.replayed_records = self._replay(snap_gen)
+
+        gens = self._log_generations()
+        self._gen = gens[-1] if gens else max(snap_gen, 1)
+        self._log_file = open(self._log_path(self._gen), "ab")
+        self._log_offset = self._log_file.tell()
+        self._flushed_offset = self._log_offset
+
+        self._closed = False
+        self._snapshotter: Optional[threading.Thread] = None
+        self._wake = threading.Event()
+        self._committer = threading.Thread(target=self._commit_loop, name="journal-commit", daemon=True)
+        self._committer.start()
+        # 正常退出时把尚未 group commit 的缓冲写盘
+        atexit.register(self.close)
+
+    # ---- 文件与代次 ----
+
+    def _log_path(self, gen: int) -> str:
+        return os.path.join(self.directory, f"log-{gen:08d}.bin")
+
+    def _log_generations(self) -> List[int]:
+        gens = []
+        for name in os.listdir(self.directory):
+            if name.startswith("log-") and name.endswith(".bin"):
+                gens.append(int(name[4:-4]))
+        return sorted(gens)
+
+    # ---- 启动重放 ----
+
+    def _replay(self, snap_gen: int) -> int:
+        gens = self._log_generations()
+        for gen in gens:
+            if gen < snap_gen:  # 已并入快照，上次删除前崩溃留下的
+                os.remove(self._log_path(gen))
+        gens = [gen for gen in gens if gen >= snap_gen]
+
+        applied = 0
+        self._replay_cutoffs = {}
+        try:
+            for i, gen in enumerate(gens):
+                path = self._log_path(gen)
+                records, good_end = read_log(path)
+                if good_end != os.path.getsize(path):
+                    logger.warning("日志 %s 在偏移 %d 之后损坏或被截断，已丢弃尾部", path, good_end)
+                    if i == len(gens) - 1:
+                        with open(path, "r+b") as f:
+                            f.truncate(good_end)
+                for offset, payload in records:
+                    applied += self._apply(payload, offset if gen == snap_gen else None)
+        finally:
+            self._replay_cutoffs = None
+        return applied
+
+    def _apply(self, payload: bytes, offset: Optional[int]) -> int:
+        (kind,) = _U8.unpack_from(payload, 0)
+        prefix = _U16 if kind in (_REC_MASTERY_V1, _REC_EMOTION_V1) else _U32
+        student_id, pos = _unpack_str(payload, 1, prefix)
+        student = self.get_student(student_id)
+        if offset is not None and offset < self._replay_cutoffs.get(student_id, 0):
+            return 0  # 已包含在快照里
+        if kind in (_REC_MASTERY, _REC_MASTERY_V1):
+            concept, pos = _unpack_str(payload, pos, prefix)
+            (level,) = _U8.unpack_from(payload, pos)
+            student.set_level(CONCEPTS.intern(concept), level)
+        elif kind in (_REC_EMOTION, _REC_EMOTION_V1):
+            log, _ = _unpack_emotion(payload, pos, prefix)
+            student.emotion_logs.append(log)
+        else:
+            raise ValueError(f"未知日志记录类型: {kind}")
+        return 1
+
+    def _load_student(self, student_id: str) -> Optional[Student]:
+        if self._snap is None:
+            return None
+        loaded = self._snap.load(student_id, self._new_history)
+        if loaded is None:
+            return None
+        student, replay_from = loaded
+        if self._replay_cutoffs is not None:
+            self._replay_cutoffs[student_id] = replay_from
+        return student
+
+    # ---- 写入记录 ----
+
+    def _append(self, payload: bytes) -> None:
+        frame = _frame(payload)
+        with self._log_lock:
+            self._buffer += frame
+            self._log_offset += len(frame)
+
+    def _on_mastery_written(self, student_id: str, concept: str, level: int) -> None:
+        self._append(_U8.pack(_REC_MASTERY) + _pack_str(student_id) + _pack_str(concept) + _U8.pack(level))
+
+    def _on_emotion_logged(self, student_id: str, log: EmotionLog) -> None:
+        self._append(_U8.pack(_REC_EMOTION) + _pack_str(student_id) + _pack_emotion(log))
+
+    # ---- group commit ----
+
+    def _commit_loop(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.fsync_interval)
+            self._wake.clear()
+            self.flush()
+            if self.snapshot_bytes is not None and self._flushed_offset >= self.snapshot_bytes:
+                self._start_snapshot()
+
+    def _start_snapshot(self) -> None:
+        """在独立线程里写快照：轮转在锁内完成，写文件期间提交线程继续按 fsync_interval 落盘新日志。"""
+        if self._snapshotter is not None and self._snapshotter.is_alive():
+            return
+        self._snapshotter = threading.Thread(target=self._snapshot_quietly, name="journal-snapshot", daemon=True)
+        self._snapshotter.start()
+
+    def _snapshot_quietly(self) -> None:
+        try:
+            self.snapshot()
+        except Exception:  # 保留旧快照与全部日志，下次超过阈值时重试
+            logger.exception("日志目录 %s 写快照失败", self.directory)
+
+    def flush(self) -> None:
+        with self._io_lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        with self._log_lock:
+            data, self._buffer = self._buffer, bytearray()
+            end = self._log_offset
+        if data:
+            self._log_file.write(data)
+            self._log_file.flush()
+            os.fsync(self._log_file.fileno())
+        self._flushed_offset = end
+
+    # ---- 快照 ----
+
+    def snapshot(self) -> None:
+        with self._snapshot_lock:
+            with self._io_lock:
+                self._flush_locked()
+                with self._log_lock:
+                    self._log_file.close()
+                    self._gen += 1
+                    gen = self._gen
+                    self._log_file = open(self._log_path(gen), "ab")
+                    self._log_offset = self._flushed_offset = 0
+
+            captured: Dict[str, Tuple[str, bytes, List[EmotionLog], int]] = {}
+            for student_id, student in list(self._students.items()):
+                with student.lock:
+                    with self._log_lock:
+                        replay_from = self._log_offset
+                    captured[student_id] = (student.name, student.mastery_snapshot(), list(student.emotion_logs), replay_from)
+
+            old = self._snap
+            concepts = list(old.concepts) if old else []
+            known = set(concepts)
+            concepts.extend(name for name in list(CONCEPTS.names) if name not in known)
+            to_snap = {name: i for i, name in enumerate(concepts)}
+            names = CONCEPTS.names
+
+            records: List[Tuple[str, bytes]] = []
+            for student_id, (name, row, logs, replay_from) in captured.items():
+                levels = bytearray(len(concepts))
+                for concept_id, stored in row.items():
+                    levels[to_snap[names[concept_id]]] = stored
+                records.append((student_id, _encode_student(student_id, name, bytes(levels), logs, replay_from)))
+            if old is not None:
+                for student_id, head, tail in old.raw_records():
+                    if student_id not in captured:
+                        # 旧快照的概念 id 在新表中保持不变，只需把 replay_from 清零
+                        records.append((student_id, head + _U64.pack(0) + tail))
+
+            path = os.path.join(self.directory, self.SNAPSHOT_NAME)
+            write_snapshot(path, gen, concepts, records)
+            self._snap = _Snapshot(path)
+            self._snapshots.append(self._snap)
+            for old_gen in self._log_generations():
+                if old_gen < gen:
+                    os.remove(self._log_path(old_gen))
+
+    def stats(self) -> Dict[str, int]:
+        result = super().stats()
+        result.update(
+            generation=self._gen,
+            log_bytes=self._log_offset,
+            snapshot_students=self._snap.n_students if self._snap else 0,
+        )
+        return result
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._committer.join()
+        if self._snapshotter is not None:
+            self._snapshotter.join()
+        self.flush()
+        self._log_file.close()
+        for snap in self._snapshots:
+            snap.close()
+        super().close()
+        atexit.unregister(self.close)
@@ -0,0 +1,235 @@
+"""纯内存后端（默认），也是带缓存后端的读写基座。
+
+并发约定（路由是普通 def，会在 FastAPI 线程池里并发执行）：
+- 学生目录按 student_id 分段加锁（lock striping），只在首次装载/创建 Student 时加锁，
+  保证同一个 id 不会创建出两个对象；
+- 每个 Student 自带写锁，掌握度/情绪的读-改-写只锁自己，不同学生互不竞争；
+- 掌握度存放在按概念 id 下标的 ``array('B')`` 中，写者在锁内原地改单个字节，
+  读者用一次 ``tobytes()`` 拷贝整行，因而 dump_mastery 总能得到一致快照且不阻塞写者。
+
+容量（``capacity``）：设置后按 LRU 淘汰冷学生，淘汰的学生写入溢出文件（``spill_path``，
+缺省为临时文件），再次访问时透明取回。只读接口（find_student / latest_emotion / dump_mastery）
+对未知 id 不会创建学生。命中/未命中/淘汰计数是近似值，仅用于容量规划。
+
+情绪历史每个学生最多保留 ``emotion_capacity`` 条；``emotion_context=False`` 时不在内存里保存
+context 文本（持久化后端照常落盘）。
+
+子类通过 ``_load_student`` 决定缺失学生从哪里装载，通过 ``_on_mastery_written`` /
+``_on_emotion_logged`` 在学生锁内拿到每次写入（用于落盘等），通过 ``_on_evicted`` 接管淘汰。
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional
+
+from storage.base import CONCEPTS, EmotionLog, StoreBackend, Student
+from storage.emotions import DEFAULT_CAPACITY, EmotionHistory
+from storage.spill import SpillFile
+
+_LOCK_STRIPES = 64
+
+
+class MemoryBackend(StoreBackend):
+    # 淘汰时是否写溢出文件；自带持久层的子类（如 SQLite）关掉即可
+    _spill_on_evict = True
+
+    def __init__(
+        self,
+        *,
+        capacity: Optional[int] = None,
+        spill_path: Optional[str] = None,
+        emotion_capacity: int = DEFAULT_CAPACITY,
+        emotion_context: bool = True,
+    ) -> None:
+        if capacity is not None and capacity <= 0:
+            raise ValueError("capacity 必须为正整数")
+        if emotion_capacity <= 0:
+            raise ValueError("emotion_capacity 必须为正整数")
+        self.capacity = capacity
+        self.emotion_capacity = emotion_capacity
+        self.emotion_context = emotion_context
+        self._students: "OrderedDict[str, Student]" = OrderedDict()
+        self._stripe_locks = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+        self._evict_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._reloads = 0
+
+        self._spill: Optional[SpillFile] = None
+        self._spill_tmp: Optional[str] = None
+        if capacity is not None and self._spill_on_evict:
+            if spill_path is None:
+                fd, spill_path = tempfile.mkstemp(prefix="edu-spill-", suffix=".db")
+                os.close(fd)
+                self._spill_tmp = spill_path
+            self._spill = SpillFile(spill_path)
+
+    # ---- 扩展点 ----
+
+    def _new_history(self, logs: Iterable[EmotionLog] = ()) -> EmotionHistory:
+        return EmotionHistory(logs, capacity=self.emotion_capacity, keep_context=self.emotion_context)
+
+    def _load_student(self, student_id: str) -> Optional[Student]:
+        """缓存未命中时装载已有学生；没有则返回 None。"""
+        if self._spill is None:
+            return None
+        return self._spill.take(student_id, self._new_history)
+
+    def _on_evicted(self, student: Student) -> None:
+        """在学生分段锁与 student.lock 内调用：保存被淘汰的学生。"""
+        if self._spill is not None:
+            self._spill.put(student)
+
+    def _on_mastery_written(self, student_id: str, concept: str, level: int) -> None:
+        pass
+
+    def _on_emotion_logged(self, student_id: str, log: EmotionLog) -> None:
+        pass
+
+    # ---- 目录与 LRU ----
+
+    def _stripe(self, student_id: str) -> threading.Lock:
+        return self._stripe_locks[hash(student_id) % _LOCK_STRIPES]
+
+    def _resident(self, student_id: str) -> Optional[Student]:
+        student = self._students.get(student_id)
+        if student is not None:
+            self._hits += 1
+            if self.capacity is not None:
+                try:
+                    self._students.move_to_end(student_id)
+                except KeyError:  # 恰好被并发淘汰，本次读到的仍是一致快照
+                    pass
+        return student
+
+    def _fetch(self, student_id: str, create: bool) -> Optional[Student]:
+        student = self._resident(student_id)
+        if student is not None:
+            return student
+        with self._stripe(student_id):
+            student = self._students.get(student_id)
+            if student is None:
+                self._misses += 1
+                student = self._load_student(student_id)
+                if student is not None:
+                    self._reloads += 1
+                elif create:
+                    student = Student(id=student_id, emotion_history=self._new_history())
+                else:
+                    return None
+                self._students[student_id] = student
+        if self.capacity is not None and len(self._students) > self.capacity:
+            self._evict()
+        return student
+
+    def _evict(self) -> None:
+        # 单一淘汰者，且不持有任何分段锁进入，避免与装载路径死锁
+        if not self._evict_lock.acquire(blocking=False):
+            return
+        try:
+            skipped = 0
+            while len(self._students) > self.capacity and skipped < len(self._students):
+                try:
+                    student_id = next(iter(self._students))
+                except (StopIteration, RuntimeError):
+                    break
+                with self._stripe(student_id):
+                    student = self._students.get(student_id)
+                    if student is None:
+                        continue
+                    if not student.lock.acquire(blocking=False):
+                        # 正在被写，换下一个最久未用的
+                        self._students.move_to_end(student_id)
+                        skipped += 1
+                        continue
+                    try:
+                        self._on_evicted(student)
+                        student.evicted = True
+                        del self._students[student_id]
+                        self._evictions += 1
+                    finally:
+                        student.lock.release()
+        finally:
+            self._evict_lock.release()
+
+    @contextmanager
+    def _locked(self, student_id: str) -> Iterator[Student]:
+        """拿到仍在缓存中的学生并持有其写锁；若拿到时已被淘汰则重新装载。"""
+        while True:
+            student = self.get_student(student_id)
+            with student.lock:
+                if not student.evicted:
+                    yield student
+                    return
+
+    # ---- 接口实现 ----
+
+    def get_student(self, student_id: str) -> Student:
+        return self._fetch(student_id, create=True)
+
+    def find_student(self, student_id: str) -> Optional[Student]:
+        return self._fetch(student_id, create=False)
+
+    def update_mastery(self, student_id: str, concept: str, delta: int) -> int:
+        concept_id = CONCEPTS.intern(concept)
+        with self._locked(student_id) as student:
+            current = student.get_level(concept_id) or 0
+            level = max(0, min(100, current + delta))
+            student.set_level(concept_id, level)
+            student.bump_version()
+            self._on_mastery_written(student_id, concept, level)
+        return level
+
+    def set_mastery(self, student_id: str, concept: str, value: float) -> int:
+        concept_id = CONCEPTS.intern(concept)
+        level = int(max(0, min(100, value * 100)))
+        with self._locked(student_id) as student:
+            student.set_level(concept_id, level)
+            student.bump_version()
+            self._on_mastery_written(student_id, concept, level)
+        return level
+
+    def latest_emotion(self, student_id: str) -> Optional[EmotionLog]:
+        student = self.find_student(student_id)
+        if student is None:
+            return None
+        return student.emotion_logs.latest()
+
+    def log_emotion(self, student_id: str, emotion: str, confidence: float, context: Optional[str] = None) -> None:
+        log = EmotionLog(emotion=emotion, confidence=confidence, context=context)
+        with self._locked(student_id) as student:
+            student.emotion_logs.append(log)
+            self._on_emotion_logged(student_id, log)
+
+    def dump_mastery(self, student_id: str) -> Dict[str, float]:
+        student = self.find_student(student_id)
+        return student.dump_mastery() if student is not None else {}
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "resident": len(self._students),
+            "capacity": self.capacity or 0,
+            "hits": self._hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
+            "reloads": self._reloads,
+            "spilled": len(self._spill) if self._spill is not None else 0,
+        }
+
+    def close(self) -> None:
+        super().close()
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+            if self._spill_tmp is not None:
+                for suffix in ("", "-wal", "-shm"):
+                    try:
+                        os.remove(self._spill_tmp + suffix)
+                    except FileNotFoundError:
+                        pass
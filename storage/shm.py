@@ -0,0 +1,376 @@
+"""共享内存后端：让 ``uvicorn --workers N`` 的多个进程看到同一份掌握度。
+
+一整块 ``multiprocessing.shared_memory`` 段内布局：
+
+- 头部：魔数、版本与各项容量；
+- 三张只追加的名字表（学生 / 概念 / 情绪），把名字映射为整数下标，各进程本地缓存映射，
+  未命中时再扫描表尾新增的条目；
+- 稠密掌握度矩阵 ``students × concepts``（uint8，存 level+1，0 表示未记录，新段全零即可用）；
+- 每个学生一个最近情绪槽（情绪下标、置信度、时间戳）；
+- 每个学生一个掌握度版本号（uint64），每次写掌握度在学生锁内加一，供各进程的规划缓存判断是否过期。
+
+跨进程互斥用锁文件上的 ``fcntl.lockf`` 字节区间锁：学生按下标分段加锁，
+名字表追加各占一把锁；同进程内的线程再叠加一层 threading.Lock（fcntl 锁只区分进程）。
+名字表的本地缓存另有一把进程内锁，扫描表尾只在锁内进行；命中缓存的查询不加锁。
+容量（学生数、概念数）在创建共享段时固定，通过 ``shm:<name>?students=N&concepts=M`` 或
+``python main.py --max-students N --max-concepts M`` 设置；表满时抛 ``CapacityError``。
+完整情绪日志（含 context 文本）不进共享内存，只保留在本进程的环形缓冲里，
+因此 ``emotion_summary`` 只汇总本进程看到的情绪。仅支持类 Unix 系统。
+"""
+
+from __future__ import annotations
+
+import fcntl
+import os
+import struct
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from storage.base import EmotionLog, StoreBackend, Student
+from storage.emotions import AffectSummary, EmotionHistory
+
+_MAGIC = b"EDUS"
+_VERSION = 2
+_HEADER = struct.Struct("<4sIIIIIII")  # magic, version, students, concepts, emotions, 三张名字表的字节容量
+_HEADER_SIZE = 64
+_TABLE_HEADER = struct.Struct("<IQ")  # 条目数, 已用字节
+_TABLE_HEADER_SIZE = 16
+_ENTRY_LEN = struct.Struct("<H")
+_EMOTION_SLOT = struct.Struct("<i4xqd")  # 情绪下标+1(0 表示无), 时间戳(微秒), 置信度
+_MASTERY_VERSION = struct.Struct("<Q")
+_EPOCH = datetime(1970, 1, 1)
+
+DEFAULT_MAX_STUDENTS = 100_000
+DEFAULT_MAX_CONCEPTS = 256
+DEFAULT_MAX_EMOTIONS = 64
+
+_LOCK_STRIPES = 64
+_TABLE_LOCK_BASE = _LOCK_STRIPES  # 名字表的锁排在学生分段锁之后
+
+
+class CapacityError(RuntimeError):
+    """共享内存名字表已满（学生、概念或情绪数超过创建共享段时的容量）。"""
+
+
+class _Locks:
+    """线程锁 + 锁文件字节区间锁，同一个 slot 在所有进程的所有线程间互斥。"""
+
+    def __init__(self, path: str, slots: int) -> None:
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._thread_locks = [threading.Lock() for _ in range(slots)]
+
+    @contextmanager
+    def hold(self, slot: int) -> Iterator[None]:
+        with self._thread_locks[slot]:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, slot)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, slot)
+
+    @contextmanager
+    def hold_file(self) -> Iterator[None]:
+        """整文件锁，用于串行化共享内存段的创建/挂载。"""
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class _NameTable:
+    """共享内存中的只追加名字表：[count, used] + 连续的 [len][utf-8 bytes] 条目。"""
+
+    def __init__(self, buf: memoryview, offset: int, capacity: int, max_entries: int, locks: _Locks, slot: int):
+        self._buf = buf
+        self._offset = offset
+        self._data = offset + _TABLE_HEADER_SIZE
+        self._capacity = capacity
+        self._max_entries = max_entries
+        self._locks = locks
+        self._slot = slot
+        self._index: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._cursor = 0  # 已扫描到的数据偏移
+        # 本地缓存只在锁内追加：并发扫描表尾会重复登记同一条目，使后续下标整体错位
+        self._local_lock = threading.Lock()
+
+    def _refresh(self) -> None:
+        with self._local_lock:
+            count, _ = _TABLE_HEADER.unpack_from(self._buf, self._offset)
+            while len(self._names) < count:
+                (length,) = _ENTRY_LEN.unpack_from(self._buf, self._data + self._cursor)
+                start = self._data + self._cursor + _ENTRY_LEN.size
+                name = bytes(self._buf[start : start + length]).decode("utf-8")
+                self._index[name] = len(self._names)
+                self._names.append(name)
+                self._cursor += _ENTRY_LEN.size + length
+
+    def lookup(self, name: str) -> Optional[int]:
+        index = self._index.get(name)
+        if index is None:
+            self._refresh()  # 锁内扫描完成后再查一次，其他线程刚登记的条目也能看到
+            index = self._index.get(name)
+        return index
+
+    def intern(self, name: str) -> int:
+        index = self.lookup(name)
+        if index is not None:
+            return index
+        encoded = name.encode("utf-8")
+        with self._locks.hold(self._slot):
+            self._refresh()
+            index = self._index.get(name)
+            if index is not None:
+                return index
+            count, used = _TABLE_HEADER.unpack_from(self._buf, self._offset)
+            size = _ENTRY_LEN.size + len(encoded)
+            if count >= self._max_entries or used + size > self._capacity:
+                raise CapacityError(
+                    f"共享内存名字表已满（{count}/{self._max_entries} 项），无法登记 {name!r}；"
+                    "请用 shm:<name>?students=N&concepts=M 或 --max-students/--max-concepts 调大容量"
+                )
+            _ENTRY_LEN.pack_into(self._buf, self._data + used, len(encoded))
+            self._buf[self._data + used + _ENTRY_LEN.size : self._data + used + size] = encoded
+            # 先写条目再更新计数，无锁读者只会看到完整条目
+            _TABLE_HEADER.pack_into(self._buf, self._offset, count + 1, used + size)
+            self._refresh()
+            return self._index[name]
+
+    def names(self) -> List[str]:
+        self._refresh()
+        return self._names
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    try:
+        return shared_memory.SharedMemory(name=name, create=False, track=False)
+    except TypeError:
+        pass
+    # Python < 3.13 没有 track 参数，挂载方也会被 resource_tracker 登记并在退出时删掉共享段；
+    # 挂载期间跳过登记（事后 unregister 会与同一 tracker 下创建方的登记冲突）
+    register = resource_tracker.register
+    resource_tracker.register = lambda n, rtype: None if rtype == "shared_memory" else register(n, rtype)
+    try:
+        return shared_memory.SharedMemory(name=name, create=False)
+    finally:
+        resource_tracker.register = register
+
+
+class SharedMemoryBackend(StoreBackend):
+    def __init__(
+        self,
+        name: str,
+        *,
+        max_students: int = DEFAULT_MAX_STUDENTS,
+        max_concepts: int = DEFAULT_MAX_CONCEPTS,
+        max_emotions: int = DEFAULT_MAX_EMOTIONS,
+        student_name_bytes: Optional[int] = None,
+        concept_name_bytes: Optional[int] = None,
+        emotion_name_bytes: int = 4096,
+    ) -> None:
+        self.name = name
+        self._lock_path = os.path.join(tempfile.gettempdir(), f"{name}.lock")
+        self._locks = _Locks(self._lock_path, _TABLE_LOCK_BASE + 3)
+        wanted = (
+            max_students,
+            max_concepts,
+            max_emotions,
+            student_name_bytes or max_students * 32,
+            concept_name_bytes or max_concepts * 64,
+            emotion_name_bytes,
+        )
+        with self._locks.hold_file():
+            try:
+                self._shm = _attach(name)
+                self.owner = False
+            except FileNotFoundError:
+                size = self._layout(*wanted)[-1]
+                self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+                self.owner = True
+                _HEADER.pack_into(self._shm.buf, 0, _MAGIC, _VERSION, *wanted)
+
+        magic, version, *dims = _HEADER.unpack_from(self._shm.buf, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise RuntimeError(f"共享内存段 {name} 不是本服务创建的（或版本不兼容）")
+        # 以段头为准，挂载方无需知道创建方的容量参数
+        self.max_students, self.max_concepts, max_emotions = dims[:3]
+        s_off, c_off, e_off, matrix_off, slots_off, versions_off, _ = self._layout(*dims)
+        buf = self._shm.buf
+        self._students = _NameTable(buf, s_off, dims[3], self.max_students, self._locks, _TABLE_LOCK_BASE)
+        self._concepts = _NameTable(buf, c_off, dims[4], self.max_concepts, self._locks, _TABLE_LOCK_BASE + 1)
+        self._emotions = _NameTable(buf, e_off, dims[5], max_emotions, self._locks, _TABLE_LOCK_BASE + 2)
+        self._matrix = buf[matrix_off:slots_off]
+        self._slots_off = slots_off
+        self._versions_off = versions_off
+        self._local_logs: Dict[str, EmotionHistory] = {}
+        self._closed = False
+
+    @classmethod
+    def from_url(cls, rest: str) -> "SharedMemoryBackend":
+        """解析 ``shm:<name>?students=100000&concepts=256&emotions=64`` 中冒号之后的部分。"""
+        name, _, query = rest.partition("?")
+        if not name:
+            raise ValueError("shm 后端需要共享内存段名，如 shm:edu")
+        params = {k: int(v[-1]) for k, v in parse_qs(query).items()}
+        return cls(
+            name,
+            max_students=params.get("students", DEFAULT_MAX_STUDENTS),
+            max_concepts=params.get("concepts", DEFAULT_MAX_CONCEPTS),
+            max_emotions=params.get("emotions", DEFAULT_MAX_EMOTIONS),
+        )
+
+    @staticmethod
+    def _layout(
+        students: int, concepts: int, emotions: int, s_bytes: int, c_bytes: int, e_bytes: int
+    ) -> Tuple[int, int, int, int, int, int, int]:
+        s_off = _HEADER_SIZE
+        c_off = s_off + _TABLE_HEADER_SIZE + s_bytes
+        e_off = c_off + _TABLE_HEADER_SIZE + c_bytes
+        matrix_off = e_off + _TABLE_HEADER_SIZE + e_bytes
+        slots_off = matrix_off + students * concepts
+        versions_off = slots_off + students * _EMOTION_SLOT.size
+        total = versions_off + students * _MASTERY_VERSION.size
+        return s_off, c_off, e_off, matrix_off, slots_off, versions_off, total
+
+    def _cell(self, student: int, concept: int) -> int:
+        return student * self.max_concepts + concept
+
+    def _student_lock(self, student: int):
+        return self._locks.hold(student % _LOCK_STRIPES)
+
+    def _bump_version(self, student: int) -> None:
+        """在学生锁内调用。"""
+        offset = self._versions_off + student * _MASTERY_VERSION.size
+        (version,) = _MASTERY_VERSION.unpack_from(self._shm.buf, offset)
+        _MASTERY_VERSION.pack_into(self._shm.buf, offset, version + 1)
+
+    # ---- 接口实现 ----
+
+    def get_student(self, student_id: str) -> Student:
+        self._students.intern(student_id)
+        return self._snapshot(student_id)
+
+    def find_student(self, student_id: str) -> Optional[Student]:
+        if self._students.lookup(student_id) is None:
+            return None
+        return self._snapshot(student_id)
+
+    def _snapshot(self, student_id: str) -> Student:
+        return Student.from_levels(
+            student_id,
+            {c: round(v * 100) for c, v in self.dump_mastery(student_id).items()},
+            emotion_logs=self._local_logs.get(student_id, ()),
+        )
+
+    def update_mastery(self, student_id: str, concept: str, delta: int) -> int:
+        s, c = self._students.intern(student_id), self._concepts.intern(concept)
+        cell = self._cell(s, c)
+        with self._student_lock(s):
+            current = self._matrix[cell]
+            level = max(0, min(100, (current - 1 if current else 0) + delta))
+            self._matrix[cell] = level + 1
+            self._bump_version(s)
+        return level
+
+    def set_mastery(self, student_id: str, concept: str, value: float) -> int:
+        s, c = self._students.intern(student_id), self._concepts.intern(concept)
+        level = int(max(0, min(100, value * 100)))
+        with self._student_lock(s):  # 与 update_mastery 的读-改-写互斥
+            self._matrix[self._cell(s, c)] = level + 1
+            self._bump_version(s)
+        return level
+
+    def latest_emotion(self, student_id: str) -> Optional[EmotionLog]:
+        s = self._students.lookup(student_id)
+        if s is None:
+            return None
+        emotion, micros, confidence = _EMOTION_SLOT.unpack_from(
+            self._shm.buf, self._slots_off + s * _EMOTION_SLOT.size
+        )
+        if not emotion:
+            return None
+        local = self._local_logs.get(student_id)
+        timestamp = _EPOCH + timedelta(microseconds=micros)
+        mine = local.latest() if local is not None else None
+        if mine is not None and mine.timestamp == timestamp:
+            return mine  # 本进程写的，带 context
+        return EmotionLog(emotion=self._emotions.names()[emotion - 1], confidence=confidence, timestamp=timestamp)
+
+    def log_emotion(self, student_id: str, emotion: str, confidence: float, context: Optional[str] = None) -> None:
+        s, e = self._students.intern(student_id), self._emotions.intern(emotion)
+        log = EmotionLog(emotion=emotion, confidence=confidence, context=context)
+        micros = (log.timestamp - _EPOCH) // timedelta(microseconds=1)
+        with self._student_lock(s):
+            _EMOTION_SLOT.pack_into(
+                self._shm.buf, self._slots_off + s * _EMOTION_SLOT.size, e + 1, micros, confidence
+            )
+            history = self._local_logs.get(student_id)
+            if history is None:
+                history = self._local_logs[student_id] = EmotionHistory()
+            history.append(log)
+
+    def emotion_summary(
+        self, student_id: str, window_seconds: float, now: Optional[datetime] = None
+    ) -> Optional[AffectSummary]:
+        s = self._students.lookup(student_id)
+        if s is None:
+            return None
+        with self._student_lock(s):
+            return self._local_logs.get(student_id, EmotionHistory()).summary(window_seconds, now)
+
+    def mastery_version(self, student_id: str) -> Optional[int]:
+        s = self._students.lookup(student_id)
+        if s is None:
+            return None
+        # 8 字节对齐读，不加锁；与写者并发时读到旧值或新值，调用方据此判断快照前后是否有写入
+        return _MASTERY_VERSION.unpack_from(self._shm.buf, self._versions_off + s * _MASTERY_VERSION.size)[0]
+
+    def dump_mastery(self, student_id: str) -> Dict[str, float]:
+        s = self._students.lookup(student_id)
+        if s is None:
+            return {}
+        start = self._cell(s, 0)
+        row = bytes(self._matrix[start : start + self.max_concepts])  # 一次拷贝整行即快照
+        names = self._concepts.names()
+        return {names[c]: (row[c] - 1) / 100 for c in range(len(names)) if row[c]}
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "resident": len(self._students.names()),
+            "capacity": self.max_students,
+            "concepts": len(self._concepts.names()),
+            "concept_capacity": self.max_concepts,
+        }
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        # 先释放对共享内存的所有视图，否则 SharedMemory.close 会报 BufferError
+        for table in (self._students, self._concepts, self._emotions):
+            table._buf = None  # type: ignore[assignment]
+        self._matrix.release()
+        self._shm.close()
+        self._locks.close()
+        if self.owner:
+            self.unlink()
+
+    def unlink(self) -> None:
+        """删除共享内存段与锁文件（通常由启动 worker 的父进程在退出时调用）。"""
+        try:
+            shared_memory.SharedMemory(name=self.name, create=False).unlink()
+        except FileNotFoundError:
+            pass
+        try:
+            os.remove(self._lock_path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,68 @@
+"""被 LRU 淘汰的学生的落盘文件（SQLite 单表，一行一个学生）。"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Callable, Iterable, Optional
+
+from storage.base import EmotionLog, Student
+from storage.emotions import EmotionHistory
+
+
+class SpillFile:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")  # 只是缓存溢出，进程退出即作废，不需要持久性
+        self._conn.execute("CREATE TABLE IF NOT EXISTS spill (student_id TEXT PRIMARY KEY, payload TEXT NOT NULL)")
+        self._lock = threading.Lock()
+
+    def put(self, student: Student) -> None:
+        payload = json.dumps(
+            {
+                "name": student.name,
+                "levels": dict(student.iter_levels()),
+                "emotions": [
+                    [log.emotion, log.confidence, log.timestamp.isoformat(), log.context] for log in student.emotion_logs
+                ],
+            },
+            ensure_ascii=False,
+        )
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO spill (student_id, payload) VALUES (?, ?)", (student.id, payload)
+            )
+
+    def take(
+        self,
+        student_id: str,
+        new_history: Callable[[Iterable[EmotionLog]], EmotionHistory] = EmotionHistory,
+    ) -> Optional[Student]:
+        """取回并删除；不存在返回 None。``new_history`` 决定情绪历史的容量等参数。"""
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM spill WHERE student_id = ?", (student_id,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("DELETE FROM spill WHERE student_id = ?", (student_id,))
+        data = json.loads(row[0])
+        return Student.from_levels(
+            student_id,
+            data["levels"],
+            name=data["name"],
+            emotion_history=new_history(
+                EmotionLog(emotion=e, confidence=c, timestamp=datetime.fromisoformat(ts), context=ctx)
+                for e, c, ts, ctx in data["emotions"]
+            ),
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM spill").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
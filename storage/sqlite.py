@@ -0,0 +1,235 @@
+"""SQLite 持久化后端（WAL 模式）+ 写回（write-behind）批量落盘。
+
+- 读：内存缓存即 MemoryBackend，学生首次访问时从 SQLite 装载，之后读全部命中内存；
+- 写：先写缓存（立即可见），再登记到待落盘缓冲区；同一 (学生, 概念) 的多次写入只保留最后一次；
+- 后台 flusher 每 ``flush_interval`` 秒或缓冲区达到 ``batch_size`` 条时，用一个事务批量写出，
+  所以进程崩溃时最多丢失约 ``flush_interval`` 秒的写入（有界陈旧窗口）；落盘失败（如 ``database is locked``、
+  磁盘满）时整批放回缓冲区，flusher 记录错误后按指数退避（最长 ``MAX_RETRY_INTERVAL`` 秒）重试，直到 ``close()``；
+- ``write_behind=False`` 时每次写入同步提交，便于对比；
+- 设置 ``capacity`` 后缓存按 LRU 淘汰，数据库本身即溢出存储；重新装载时会叠加尚未提交的写入；
+- 情绪日志全部落库，内存里每个学生只保留最近 ``emotion_cache_size`` 条（环形缓冲）。
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from storage.base import EmotionLog, Student
+from storage.memory import MemoryBackend
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRY_INTERVAL = 5.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS mastery (
+    student_id TEXT NOT NULL,
+    concept TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    PRIMARY KEY (student_id, concept)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS emotion_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    student_id TEXT NOT NULL,
+    emotion TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    timestamp TEXT NOT NULL,
+    context TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_emotion_logs_student ON emotion_logs (student_id, id);
+"""
+
+
+class SQLiteBackend(MemoryBackend):
+    _spill_on_evict = False
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        capacity: Optional[int] = None,
+        write_behind: bool = True,
+        flush_interval: float = 0.2,
+        batch_size: int = 1000,
+        emotion_cache_size: int = 50,
+        emotion_context: bool = True,
+    ) -> None:
+        super().__init__(capacity=capacity, emotion_capacity=emotion_cache_size, emotion_context=emotion_context)
+        self.path = path
+        self.write_behind = write_behind
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.emotion_cache_size = emotion_cache_size
+
+        self._writer = self._connect()
+        self._writer.executescript(_SCHEMA)
+        self._write_lock = threading.Lock()
+        self._readers = threading.local()
+        self._reader_conns: List[sqlite3.Connection] = []
+
+        self._pending_lock = threading.Lock()
+        self._pending_mastery: Dict[Tuple[str, str], int] = {}
+        self._pending_emotions: List[Tuple[str, str, float, str, Optional[str]]] = []
+        # 已从缓冲区取出、事务尚未提交的批次，装载时同样需要叠加
+        self._inflight_mastery: Dict[Tuple[str, str], int] = {}
+        self._inflight_emotions: List[Tuple[str, str, float, str, Optional[str]]] = []
+
+        self._closed = False
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        if write_behind:
+            self._flusher = threading.Thread(target=self._flush_loop, name="sqlite-flusher", daemon=True)
+            self._flusher.start()
+        atexit.register(self.close)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._readers, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._readers.conn = conn
+            with self._pending_lock:
+                self._reader_conns.append(conn)
+        return conn
+
+    # ---- 缓存装载 ----
+
+    def _load_student(self, student_id: str) -> Optional[Student]:
+        conn = self._reader()
+        # 先取未提交的写入再读库：期间若恰好提交，库里读到的也是同样的值
+        with self._pending_lock:
+            unflushed = {
+                concept: level
+                for source in (self._inflight_mastery, self._pending_mastery)
+                for (sid, concept), level in source.items()
+                if sid == student_id
+            }
+            unflushed_logs = [
+                row[1:] for source in (self._inflight_emotions, self._pending_emotions) for row in source if row[0] == student_id
+            ]
+        levels = dict(conn.execute("SELECT concept, level FROM mastery WHERE student_id = ?", (student_id,)).fetchall())
+        levels.update(unflushed)
+        logs = conn.execute(
+            "SELECT emotion, confidence, timestamp, context FROM emotion_logs "
+            "WHERE student_id = ? ORDER BY id DESC LIMIT ?",
+            (student_id, self.emotion_cache_size),
+        ).fetchall()
+        logs = list(reversed(logs))
+        committed = set(logs)
+        logs.extend(row for row in unflushed_logs if row not in committed)
+        if not levels and not logs:
+            return None
+        return Student.from_levels(
+            student_id,
+            levels,
+            emotion_history=self._new_history(
+                EmotionLog(emotion=e, confidence=conf, timestamp=datetime.fromisoformat(ts), context=ctx)
+                for e, conf, ts, ctx in logs
+            ),
+        )
+
+    # ---- 写入登记 ----
+
+    def _on_mastery_written(self, student_id: str, concept: str, level: int) -> None:
+        with self._pending_lock:
+            self._pending_mastery[(student_id, concept)] = level
+            pending = len(self._pending_mastery) + len(self._pending_emotions)
+        self._after_write(pending)
+
+    def _on_emotion_logged(self, student_id: str, log: EmotionLog) -> None:
+        row = (student_id, log.emotion, log.confidence, log.timestamp.isoformat(), log.context)
+        with self._pending_lock:
+            self._pending_emotions.append(row)
+            pending = len(self._pending_mastery) + len(self._pending_emotions)
+        self._after_write(pending)
+
+    def _after_write(self, pending: int) -> None:
+        if not self.write_behind:
+            self.flush()
+        elif pending >= self.batch_size:
+            self._wake.set()
+
+    # ---- 落盘 ----
+
+    def _flush_loop(self) -> None:
+        retry = 0.0
+        while not self._closed:
+            if retry:
+                # 退避期间不理会写入方的唤醒，避免库被锁时空转；close() 仍可立即打断
+                self._stop.wait(retry)
+            else:
+                self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._closed:
+                break  # 最后一次落盘由 close() 完成
+            try:
+                self.flush()
+            except Exception:
+                retry = min(max(retry * 2, self.flush_interval), MAX_RETRY_INTERVAL)
+                with self._pending_lock:
+                    pending = len(self._pending_mastery) + len(self._pending_emotions)
+                logger.exception("SQLite 批量落盘失败，%d 条写入留在缓冲区，%.1fs 后重试", pending, retry)
+            else:
+                retry = 0.0
+
+    def flush(self) -> None:
+        with self._write_lock:
+            with self._pending_lock:
+                mastery, self._pending_mastery = self._pending_mastery, {}
+                emotions, self._pending_emotions = self._pending_emotions, []
+                self._inflight_mastery, self._inflight_emotions = mastery, emotions
+            if not mastery and not emotions:
+                return
+            conn = self._writer
+            try:
+                conn.execute("BEGIN")
+                conn.executemany(
+                    "INSERT INTO mastery (student_id, concept, level) VALUES (?, ?, ?) "
+                    "ON CONFLICT (student_id, concept) DO UPDATE SET level = excluded.level",
+                    [(sid, concept, level) for (sid, concept), level in mastery.items()],
+                )
+                conn.executemany(
+                    "INSERT INTO emotion_logs (student_id, emotion, confidence, timestamp, context) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    emotions,
+                )
+                conn.execute("COMMIT")
+                with self._pending_lock:
+                    self._inflight_mastery, self._inflight_emotions = {}, []
+            except Exception:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                # 放回缓冲区等待下次重试；期间更新的值优先
+                with self._pending_lock:
+                    mastery.update(self._pending_mastery)
+                    self._pending_mastery = mastery
+                    self._pending_emotions[:0] = emotions
+                    self._inflight_mastery, self._inflight_emotions = {}, []
+                raise
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._stop.set()
+        self._wake.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+        with self._write_lock:
+            self._writer.close()
+        for conn in self._reader_conns:
+            conn.close()
+        super().close()
+        atexit.unregister(self.close)
@@ -0,0 +1,196 @@
+"""增量知识追踪的事件溯源状态。
+
+每个学生一个 ``TraceLog``：
+- 当前状态是每个技能的掌握概率与最近两次对错（判断 ``trend`` 用），外加首次接触时的先验；
+- 客户端给每条交互编号 ``seq``（学生内单调），服务端记录已应用的最大编号 ``cursor``，
+  客户端下次只需发送 ``seq > cursor`` 的新交互；
+- 每应用 ``snapshot_every`` 条事件留一份快照，最多保留 ``max_snapshots`` 份；最早快照之后的事件原样保留，
+  用于重放与去重。最早快照之前的事件已压缩，编号不大于它的事件一律视为重复丢弃；
+- 迟到事件（``seq < cursor``）：回退到它之前最近的快照，把保留的事件与新事件按编号合并后重放。
+  重放量不超过“迟到距离 + snapshot_every”，按序到达时只应用新事件本身。
+
+事件的具体更新规则由调用方以 ``replay(prob_map, interactions) -> history`` 传入
+（即 ``knowledge_tracking`` 的回放函数），这里只管顺序、去重与快照。状态只在本进程内存中，
+``TraceStore`` 按 LRU 限制常驻学生数；被淘汰的学生下次从数据库里的掌握度重新起步。
+"""
+
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+Replay = Callable[[Dict[str, float], Sequence], Dict[str, List[bool]]]
+
+SNAPSHOT_EVERY = 256
+MAX_SNAPSHOTS = 8
+
+
+class _Snapshot:
+    __slots__ = ("seq", "prob", "recent")
+
+    def __init__(self, seq: int, prob: Dict[str, float], recent: Dict[str, Tuple[bool, ...]]) -> None:
+        self.seq = seq
+        self.prob = prob
+        self.recent = recent
+
+
+class TraceLog:
+    """单个学生的追踪状态。``apply`` 自带锁，可并发调用。"""
+
+    def __init__(
+        self,
+        priors: Optional[Dict[str, float]] = None,
+        *,
+        snapshot_every: int = SNAPSHOT_EVERY,
+        max_snapshots: int = MAX_SNAPSHOTS,
+    ) -> None:
+        if snapshot_every <= 0 or max_snapshots <= 0:
+            raise ValueError("snapshot_every 与 max_snapshots 必须为正整数")
+        self.snapshot_every = snapshot_every
+        self.max_snapshots = max_snapshots
+        self.priors: Dict[str, float] = dict(priors or {})
+        self.prob: Dict[str, float] = {}
+        self.recent: Dict[str, Tuple[bool, ...]] = {}
+        self.cursor = -1
+        self.lock = threading.Lock()
+        self._seqs: List[int] = []  # 最早快照之后已应用事件的编号（升序）与事件本身
+        self._events: List = []
+        self._pending = snapshot_every  # 距下一份快照还差的事件数
+        self._snapshots: List[_Snapshot] = [_Snapshot(-1, {}, {})]
+        self.replayed = 0  # 累计重放（含首次应用）的事件数
+
+    @property
+    def floor(self) -> int:
+        """不大于该编号的事件已压缩进最早快照，无法再区分重复与迟到。"""
+        return self._snapshots[0].seq
+
+    def seed(self, priors: Dict[str, float]) -> None:
+        """补充尚未见过的技能的先验；已有先验或已追踪的技能不受影响。"""
+        for skill, value in priors.items():
+            if skill not in self.prob:
+                self.priors.setdefault(skill, value)
+
+    def value(self, skill: str) -> float:
+        prob = self.prob.get(skill)
+        return prob if prob is not None else self.priors.get(skill, 0.5)
+
+    def apply(self, events: Iterable, replay: Replay) -> Tuple[List[str], int]:
+        """应用一批交互（带 ``seq`` 属性，None 表示排在当前所有事件之后），返回 (受影响的技能, 丢弃的重复数)。"""
+        with self.lock:
+            events = list(events)
+            next_seq = max([self.cursor] + [e.seq for e in events if e.seq is not None]) + 1
+            fresh: Dict[int, object] = {}
+            duplicates = 0
+            for event in events:
+                seq = event.seq
+                if seq is None:
+                    seq, next_seq = next_seq, next_seq + 1
+                if seq <= self.floor or seq in fresh or self._contains(seq):
+                    duplicates += 1
+                    continue
+                fresh[seq] = event
+            if not fresh:
+                return [], duplicates
+
+            new_seqs = sorted(fresh)
+            if new_seqs[0] > self.cursor:
+                batch = [fresh[seq] for seq in new_seqs]
+                self._append(new_seqs, batch, replay)
+                return list(dict.fromkeys(e.skill for e in batch)), duplicates
+
+            # 迟到事件：回到它之前最近的快照，合并后重放
+            k = bisect_left([s.seq for s in self._snapshots], new_seqs[0]) - 1
+            snapshot = self._snapshots[k]
+            del self._snapshots[k + 1 :]
+            start = bisect_right(self._seqs, snapshot.seq)
+            merged = dict(zip(self._seqs[start:], self._events[start:]))
+            merged.update(fresh)
+            del self._seqs[start:], self._events[start:]
+            self.prob, self.recent = dict(snapshot.prob), dict(snapshot.recent)
+            self._pending = self.snapshot_every
+            seqs = sorted(merged)
+            batch = [merged[seq] for seq in seqs]
+            self._append(seqs, batch, replay)
+            return list(dict.fromkeys(e.skill for e in batch)), duplicates
+
+    def _contains(self, seq: int) -> bool:
+        i = bisect_left(self._seqs, seq)
+        return i < len(self._seqs) and self._seqs[i] == seq
+
+    def _append(self, seqs: List[int], events: List, replay: Replay) -> None:
+        """按编号顺序应用，编号均大于快照/已保留事件；每满 ``snapshot_every`` 条留一份快照。"""
+        pos = 0
+        while pos < len(events):
+            chunk = events[pos : pos + self._pending]
+            prob_map: Dict[str, float] = defaultdict(lambda: 0.5)
+            for skill in dict.fromkeys(e.skill for e in chunk):
+                prob_map[skill] = self.value(skill)
+            history = replay(prob_map, chunk)
+            self.prob.update(prob_map)
+            for skill, outcomes in history.items():
+                self.recent[skill] = (self.recent.get(skill, ()) + tuple(outcomes[-2:]))[-2:]
+            self._seqs.extend(seqs[pos : pos + len(chunk)])
+            self._events.extend(chunk)
+            pos += len(chunk)
+            self.cursor = self._seqs[-1]
+            self.replayed += len(chunk)
+            self._pending -= len(chunk)
+            if not self._pending:
+                self._pending = self.snapshot_every
+                self._snapshots.append(_Snapshot(self.cursor, dict(self.prob), dict(self.recent)))
+                if len(self._snapshots) > self.max_snapshots:
+                    del self._snapshots[0]
+                    drop = bisect_right(self._seqs, self.floor)
+                    del self._seqs[:drop], self._events[:drop]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "cursor": self.cursor,
+            "floor": self.floor,
+            "skills": len(self.prob),
+            "retained_events": len(self._events),
+            "snapshots": len(self._snapshots),
+            "replayed": self.replayed,
+        }
+
+
+class TraceStore:
+    """student_id -> TraceLog，超过 ``capacity`` 时淘汰最久未用的学生。"""
+
+    def __init__(self, capacity: int = 10000, **log_options) -> None:
+        if capacity <= 0:
+            raise ValueError("capacity 必须为正整数")
+        self.capacity = capacity
+        self._log_options = log_options
+        self._logs: "OrderedDict[str, TraceLog]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, student_id: str, seed: Callable[[], Dict[str, float]]) -> TraceLog:
+        """取学生的追踪状态；首次出现（或已被淘汰）时以 ``seed()`` 的掌握度为先验新建。"""
+        with self._lock:
+            log = self._logs.get(student_id)
+            if log is not None:
+                self._logs.move_to_end(student_id)
+                return log
+        log = TraceLog(seed(), **self._log_options)  # seed 可能读数据库，不在表锁内执行
+        with self._lock:
+            log = self._logs.setdefault(student_id, log)
+            self._logs.move_to_end(student_id)
+            while len(self._logs) > self.capacity:
+                self._logs.popitem(last=False)
+                self.evictions += 1
+            return log
+
+    def clear(self) -> None:
+        with self._lock:
+            self._logs.clear()
+
+    def __len__(self) -> int:
+        return len(self._logs)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"students": len(self._logs), "capacity": self.capacity, "evictions": self.evictions}